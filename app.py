@@ -1,12 +1,25 @@
 import streamlit as st
-import pandas as pd
-import PyPDF2
-import openpyxl
-from openpyxl.styles import PatternFill
-from openpyxl.styles import Font, Alignment
-import fitz  # PyMuPDF
 import io
+import os
+import threading
 import time
+from contextlib import nullcontext
+
+from instrumentation import PerfRecorder, ProfileCapture, import_timings, record_import_time
+
+# Engine modules (pandas/NumPy); PyMuPDF, PyPDF2 and openpyxl load lazily on first use
+_import_start = time.perf_counter()
+import pandas as pd
+from compare_engine import SCORERS, compare_uploads, warm_up
+from job_runner import JobStore, ThrottledProgress
+from pdf_cache import DEFAULT_CACHE_DIR, PdfLineCache
+from report_writer import REPORT_MODES
+from result_store import DEFAULT_SPILL_DIR, ResultStore
+from result_export import EXPORT_MIME_TYPES, available_formats, export_pdf_lines, export_results, export_to_tempfile
+from results_view import PAGE_SIZES, ResultsView, page_bounds
+from similarity_join import DEFAULT_THRESHOLD, line_mapping_table
+# Only the first run in a process pays for these; later reruns reuse the modules
+record_import_time("app (engine modules)", time.perf_counter() - _import_start)
 
 # Page configuration
 st.set_page_config(page_title="PDF Line-by-Line Excel Comparator", layout="wide")
@@ -16,212 +29,267 @@ st.markdown("""
 **Line-by-Line Comparison:** PDF की हर line को Excel की हर row से compare करें
 """)
 
-# Function definitions
-def extract_pdf_lines(pdf_file):
-    """PDF से lines निकालो (line-by-line)"""
-    pdf_lines = []
-    
-    try:
-        # PyMuPDF use करो जो better lines देता है
-        pdf_doc = fitz.open(stream=pdf_file.read(), filetype="pdf")
-        
-        for page_num in range(len(pdf_doc)):
-            page = pdf_doc.load_page(page_num)
-            page_text = page.get_text()
-            
-            # Split into lines और clean करो
-            lines = page_text.split('\n')
-            for line_num, line in enumerate(lines, 1):
-                line_clean = line.strip()
-                if line_clean:  # Only non-empty lines
-                    pdf_lines.append({
-                        'page': page_num + 1,
-                        'line_num': line_num,
-                        'original_line': line,
-                        'clean_line': line_clean,
-                        'lower_line': line_clean.lower()
-                    })
-        
-        pdf_doc.close()
-        
-    except Exception as e:
-        st.error(f"PDF extraction error: {e}")
-        # Fallback to PyPDF2
-        pdf_file.seek(0)
-        pdf_reader = PyPDF2.PdfReader(pdf_file)
-        
-        line_counter = 1
-        for page_num, page in enumerate(pdf_reader.pages, 1):
-            page_text = page.extract_text()
-            lines = page_text.split('\n')
-            
-            for line in lines:
-                line_clean = line.strip()
-                if line_clean:
-                    pdf_lines.append({
-                        'page': page_num,
-                        'line_num': line_counter,
-                        'original_line': line,
-                        'clean_line': line_clean,
-                        'lower_line': line_clean.lower()
-                    })
-                    line_counter += 1
-    
-    return pdf_lines
+@st.cache_resource
+def get_pdf_line_cache():
+    """Process-wide PDF line cache (hit/miss counters survive reruns)"""
+    return PdfLineCache(
+        os.environ.get("PDF_LINE_CACHE_DIR", DEFAULT_CACHE_DIR),
+        max_bytes=int(os.environ.get("PDF_LINE_CACHE_MAX_MB", "512")) * 1024 * 1024
+    )
 
-def create_highlighted_excel_line_compare(excel_file, comparison_results, pdf_lines_sample):
-    """Create Excel file with line-by-line comparison results"""
-    # Read the original Excel file
-    if excel_file.name.endswith('.xlsx'):
-        wb = openpyxl.load_workbook(excel_file)
-    else:
-        # Convert .xls to .xlsx
-        df = pd.read_excel(excel_file)
-        wb = openpyxl.Workbook()
-        ws = wb.active
-        
-        # Write headers
-        for col_idx, col_name in enumerate(df.columns, 1):
-            ws.cell(row=1, column=col_idx, value=col_name)
-            ws.cell(row=1, column=col_idx).font = Font(bold=True)
-            ws.cell(row=1, column=col_idx).alignment = Alignment(horizontal='center')
-        
-        # Write data
-        for row_idx, row in df.iterrows():
-            for col_idx, value in enumerate(row, 1):
-                ws.cell(row=row_idx + 2, column=col_idx, value=value)
-    
-    ws = wb.active
-    
-    # Define styles
-    red_fill = PatternFill(start_color="FFCCCC", end_color="FFCCCC", fill_type="solid")
-    red_font = Font(color="FF0000", bold=True)
-    green_fill = PatternFill(start_color="C6EFCE", end_color="C6EFCE", fill_type="solid")
-    green_font = Font(color="00AA00", bold=True)
-    yellow_fill = PatternFill(start_color="FFEB9C", end_color="FFEB9C", fill_type="solid")
-    yellow_font = Font(color="FF9900", bold=True)
-    
-    # Map column names to indices
-    col_map = {}
-    for idx, cell in enumerate(ws[1], 1):
-        col_map[cell.value] = idx
-    
-    # Apply formatting based on comparison results
-    for result in comparison_results:
-        col_idx = col_map.get(result['excel_column'])
-        if not col_idx:
-            continue
-            
-        cell = ws.cell(row=result['excel_row'], column=col_idx)
-        
-        if result['match_status'] == '✅ Perfect Match':
-            cell.fill = green_fill
-            cell.font = green_font
-            cell.value = f"✅ {result['excel_value']}"
-            
-        elif result['match_status'] == '⚠️ Partial Match':
-            cell.fill = yellow_fill
-            cell.font = yellow_font
-            cell.value = f"⚠️ {result['excel_value']}"
-            
-        elif result['match_status'] == '❌ No Match':
-            cell.fill = red_fill
-            cell.font = red_font
-            cell.value = f"❌ {result['excel_value']}"
-            
-        elif result['match_status'] == '⚪ Empty':
-            cell.value = f"⚪ {result['excel_value']}"
-    
-    # Add comparison summary sheet
-    wb.create_sheet("Line-by-Line Analysis")
-    analysis_ws = wb["Line-by-Line Analysis"]
-    
-    # Title
-    analysis_ws['A1'] = "📊 PDF LINE-BY-LINE COMPARISON REPORT"
-    analysis_ws['A1'].font = Font(size=16, bold=True)
-    
-    # Summary statistics
-    total_checks = len(comparison_results)
-    perfect_matches = len([r for r in comparison_results if r['match_status'] == '✅ Perfect Match'])
-    partial_matches = len([r for r in comparison_results if r['match_status'] == '⚠️ Partial Match'])
-    no_matches = len([r for r in comparison_results if r['match_status'] == '❌ No Match'])
-    
-    analysis_ws['A3'] = "📈 COMPARISON STATISTICS"
-    analysis_ws['A3'].font = Font(bold=True)
-    
-    analysis_ws['A5'] = f"Total Excel Cells Checked: {total_checks}"
-    analysis_ws['A6'] = f"✅ Perfect Matches: {perfect_matches} ({(perfect_matches/total_checks*100):.1f}%)"
-    analysis_ws['A7'] = f"⚠️ Partial Matches: {partial_matches} ({(partial_matches/total_checks*100):.1f}%)"
-    analysis_ws['A8'] = f"❌ No Matches: {no_matches} ({(no_matches/total_checks*100):.1f}%)"
-    
-    accuracy = (perfect_matches + partial_matches * 0.5) / total_checks * 100
-    analysis_ws['A10'] = f"🎯 OVERALL ACCURACY: {accuracy:.1f}%"
-    analysis_ws['A10'].font = Font(color="FF0000", bold=True, size=14)
-    
-    # PDF Lines Sample
-    analysis_ws['A12'] = "📄 PDF LINES SAMPLE (First 50 lines)"
-    analysis_ws['A12'].font = Font(bold=True)
-    
-    row_num = 14
-    for i, line in enumerate(pdf_lines_sample[:50], 1):
-        analysis_ws.cell(row=row_num, column=1, value=f"Line {i}:")
-        analysis_ws.cell(row=row_num, column=2, value=line['clean_line'][:100])
-        row_num += 1
-    
-    # Detailed comparison results
-    row_num += 2
-    analysis_ws.cell(row=row_num, column=1, value="🔍 DETAILED COMPARISON RESULTS")
-    analysis_ws.cell(row=row_num, column=1).font = Font(bold=True)
-    
-    headers = ['Excel Cell', 'Excel Value', 'Match Status', 'Matched PDF Line', 'Similarity %']
-    for col_idx, header in enumerate(headers, 1):
-        analysis_ws.cell(row=row_num + 2, column=col_idx, value=header)
-        analysis_ws.cell(row=row_num + 2, column=col_idx).font = Font(bold=True)
-    
-    data_start_row = row_num + 3
-    for idx, result in enumerate(comparison_results[:100]):  # Show first 100 results
-        analysis_ws.cell(row=data_start_row + idx, column=1, value=result['excel_cell'])
-        analysis_ws.cell(row=data_start_row + idx, column=2, value=str(result['excel_value'])[:50])
-        analysis_ws.cell(row=data_start_row + idx, column=3, value=result['match_status'])
-        
-        if result['matched_pdf_line']:
-            analysis_ws.cell(row=data_start_row + idx, column=4, value=result['matched_pdf_line'][:50])
+@st.cache_resource
+def start_engine_warmup():
+    """Process में एक बार: heavy libraries background thread में load करो"""
+    if os.environ.get("COMPARE_WARMUP", "1") == "0":
+        return None
+    thread = threading.Thread(target=warm_up, name="engine-warmup", daemon=True)
+    thread.start()
+    return thread
+
+@st.cache_resource
+def get_job_store():
+    """Process-wide background job store (jobs outlive reruns and page reloads)"""
+    return JobStore(max_workers=int(os.environ.get("COMPARE_JOB_WORKERS", "2")))
+
+@st.cache_resource
+def get_result_store():
+    """Process-wide result store; sessions only keep a handle into it"""
+    return ResultStore(
+        os.environ.get("RESULT_STORE_DIR", DEFAULT_SPILL_DIR),
+        memory_budget=int(os.environ.get("RESULT_STORE_MEMORY_MB", "1024")) * 1024 * 1024,
+        disk_budget=int(os.environ.get("RESULT_STORE_DISK_MB", "4096")) * 1024 * 1024,
+        ttl_seconds=int(os.environ.get("RESULT_STORE_TTL_MINUTES", "240")) * 60
+    )
+
+# Seconds between job panel refreshes while a comparison runs
+JOB_POLL_SECONDS = 0.5
+
+def uploaded_copy(uploaded_file):
+    """Upload का in-memory copy जो job thread में पढ़ा जा सके"""
+    data = io.BytesIO(uploaded_file.getvalue())
+    data.name = uploaded_file.name
+    return data
+
+def make_comparison_job(pdf_file, excel_file, result_store, capture_profile=False, **options):
+    """``compare_uploads`` को job function में लपेटो (perf + optional profile)
+
+    The full result goes into ``result_store``; the job only returns its
+    handle plus the small per-run reports.
+    """
+    def run(job):
+        perf = PerfRecorder()
+        progress = ThrottledProgress(job)
+        profile_capture = ProfileCapture() if capture_profile else nullcontext()
+        with profile_capture:
+            result = compare_uploads(
+                pdf_file, excel_file, perf=perf, progress_callback=progress,
+                on_stage=job.set_stage, on_error=lambda e: job.warn(f"PDF extraction error: {e}"),
+                check_cancelled=job.check_cancelled, **options
+            )
+        # Time spent inside progress callbacks (already included in "match")
+        perf.add("progress_updates", progress.wall_seconds, calls=progress.calls,
+                 published=progress.published)
+        job.set_stage("Storing results")
+        with perf.stage("result_store", results=len(result['comparison_results'])):
+            handle = result_store.put(
+                result, excel_bytes=excel_file.getvalue(),
+                report_mode=options.get('report_mode', 'in_memory'), label=excel_file.name
+            )
+        return {
+            'handle': handle,
+            'excel_name': excel_file.name,
+            'match_stats': result['match_stats'],
+            'perf': perf,
+            'profile': {
+                'text': profile_capture.text_report(),
+                'prof': profile_capture.prof_bytes(),
+            } if capture_profile else None,
+        }
+    return run
+
+def forget_job():
+    """Session और URL से job id हटाओ"""
+    st.session_state.job_id = None
+    if 'job' in st.query_params:
+        del st.query_params['job']
+
+def reattach_job():
+    """Sidebar में दिया job id follow करो"""
+    job_id = st.session_state.reattach_job_id.strip()
+    st.session_state.reattach_job_id = ""
+    if job_id:
+        st.session_state.job_id = job_id
+        st.query_params['job'] = job_id
+
+def release_result():
+    """Session का पिछला result store से हटाओ"""
+    if st.session_state.result_handle:
+        get_result_store().release(st.session_state.result_handle)
+        st.session_state.result_handle = None
+
+def adopt_job_result(result):
+    """Finished job का result handle session state में रखो"""
+    # The new run's snapshot already covers the previous result
+    release_result()
+    st.session_state.result_handle = result['handle']
+    st.session_state.excel_name = result['excel_name']
+    st.session_state.match_stats = result['match_stats']
+    st.session_state.perf_report = result['perf']
+    st.session_state.profile_report = result['profile']
+    st.session_state.compare_done = True
+
+@st.fragment(run_every=JOB_POLL_SECONDS)
+def show_job(job_id):
+    """Running job का live panel; job खत्म होने पर पूरा app rerun करो"""
+    job_store = get_job_store()
+    job = job_store.get(job_id)
+    if job is None:
+        forget_job()
+        st.rerun(scope="app")
+    status = job.snapshot()
+    for message in status['messages']:
+        st.error(message)
+    if job.finished_state:
+        if status['state'] == 'done':
+            adopt_job_result(job.result)
+            st.session_state.job_outcome = ('success', "🎯 Line-by-line comparison completed! View results below.")
+        elif status['state'] == 'failed':
+            st.session_state.job_outcome = ('error', status['error'])
         else:
-            analysis_ws.cell(row=data_start_row + idx, column=4, value="No match")
-        
-        analysis_ws.cell(row=data_start_row + idx, column=5, value=f"{result['similarity_percent']:.1f}%")
-    
-    # Auto-adjust column widths
-    for column in analysis_ws.columns:
-        max_length = 0
-        column_letter = column[0].column_letter
-        for cell in column:
-            try:
-                if len(str(cell.value)) > max_length:
-                    max_length = len(str(cell.value))
-            except:
-                pass
-        adjusted_width = min(max_length + 2, 50)
-        analysis_ws.column_dimensions[column_letter].width = adjusted_width
-    
-    # Save to bytes
-    output = io.BytesIO()
-    wb.save(output)
-    output.seek(0)
-    
-    return output
+            st.session_state.job_outcome = ('warning', "⏹️ Comparison cancelled.")
+        job_store.release(job_id)
+        forget_job()
+        st.rerun(scope="app")
+    
+    st.subheader(f"⏳ {status['stage']}...")
+    if status['total']:
+        st.progress(status['processed'] / status['total'])
+        st.caption(f"Comparing cell {status['processed']}/{status['total']} · "
+                   f"{status['elapsed_seconds']:.1f}s elapsed · job {job_id}")
+    else:
+        st.caption(f"{status['elapsed_seconds']:.1f}s elapsed · job {job_id}")
+    if status['cancel_requested']:
+        st.warning("Cancelling...")
+    else:
+        st.button("⏹️ Cancel comparison", key="cancel_job", on_click=job_store.cancel, args=(job_id,))
+
+def build_line_mapping(payload):
+    """Similarity join + उसके summary counts (result store में एक बार बनता है)"""
+    join_stats = {}
+    mapping_df = line_mapping_table(payload['excel_df'], payload['pdf_lines'], stats=join_stats)
+    line_keys = ['pdf_page', 'pdf_line_num']
+    mapping_counts = {
+        'lines_matched': mapping_df[line_keys].drop_duplicates().shape[0],
+        'multi_line_cells': mapping_df.loc[mapping_df['lines_for_cell'] > 1, 'excel_cell'].nunique(),
+        'multi_cell_lines': mapping_df.loc[mapping_df['cells_for_line'] > 1, line_keys].drop_duplicates().shape[0],
+    }
+    return mapping_df, join_stats, mapping_counts
+
+def line_mapping_csv(result_handle):
+    """Line mapping download का CSV (click पर बनता है)"""
+    mapping = get_result_store().derived(result_handle, 'line_mapping', build_line_mapping)
+    if mapping is None:
+        return b""
+    return mapping[0].to_csv(index=False).encode('utf-8')
+
+def export_download(result_handle, table, export, fmt):
+    """Full export download का file (click पर payload store से लेकर लिखा जाता है)"""
+    payload = get_result_store().get(result_handle)
+    if payload is None:
+        return b""
+    with export_to_tempfile(lambda out, fmt: export(payload[table], out, fmt), fmt) as export_file:
+        return export_file.read()
+
+def show_page(view, name, key, rows_per_page, height=300):
+    """Cached frame का सिर्फ current page render करो"""
+    total_rows = len(view.overlay() if name == 'overlay' else view.table(name))
+    page_count = page_bounds(total_rows, 1, rows_per_page)[2]
+    page = 1
+    if page_count > 1:
+        page = st.number_input(f"Page (of {page_count})", min_value=1, max_value=page_count,
+                               value=1, key=key)
+    rows, start, stop, _ = view.page(name, page, rows_per_page)
+    st.dataframe(rows, use_container_width=True, height=height)
+    st.caption(f"Rows {start + 1}–{stop} of {total_rows}")
+
+# Load the extraction/report libraries in the background while the user uploads
+start_engine_warmup()
 
 # Initialize session state
 if 'compare_done' not in st.session_state:
     st.session_state.compare_done = False
-if 'comparison_results' not in st.session_state:
-    st.session_state.comparison_results = None
-if 'excel_df' not in st.session_state:
-    st.session_state.excel_df = None
-if 'pdf_lines' not in st.session_state:
-    st.session_state.pdf_lines = []
-if 'highlighted_excel' not in st.session_state:
-    st.session_state.highlighted_excel = None
+if 'result_handle' not in st.session_state:
+    st.session_state.result_handle = None
+if 'match_stats' not in st.session_state:
+    st.session_state.match_stats = None
+if 'perf_report' not in st.session_state:
+    st.session_state.perf_report = None
+if 'profile_report' not in st.session_state:
+    st.session_state.profile_report = None
+if 'excel_name' not in st.session_state:
+    st.session_state.excel_name = None
+if 'job_id' not in st.session_state:
+    st.session_state.job_id = None
+if 'job_outcome' not in st.session_state:
+    st.session_state.job_outcome = None
+
+# Performance settings
+with st.sidebar:
+    st.header("⚙️ Settings")
+    extraction_workers = st.number_input(
+        "PDF extraction workers",
+        min_value=0,
+        max_value=os.cpu_count() or 1,
+        value=1,
+        help="Pages are split across this many processes (0 = one per CPU core)"
+    )
+    scorer = st.selectbox(
+        "Scoring engine",
+        options=SCORERS,
+        format_func=lambda name: {
+            'index': "Indexed loop",
+            'vectorized': "Vectorized (NumPy, whole sheet)"
+        }[name],
+        help="Both engines give identical results; vectorized is faster on large sheets"
+    )
+    report_mode = st.selectbox(
+        "Report writer",
+        options=REPORT_MODES,
+        format_func=lambda name: {
+            'in_memory': "In-memory (keeps original formatting)",
+            'streaming': "Streaming (large sheets, bounded memory)"
+        }[name],
+        help="Streaming rebuilds the workbook as values with shared styles and writes it to a temp file"
+    )
+    use_pdf_cache = st.checkbox(
+        "Cache extracted PDF lines",
+        value=True,
+        help="Skip extraction for PDFs that were already processed (kept on disk)"
+    )
+    rows_per_page = st.selectbox(
+        "Result rows per page",
+        options=PAGE_SIZES,
+        index=PAGE_SIZES.index(200),
+        help="Result tables are rendered one page at a time"
+    )
+    incremental = st.checkbox(
+        "Incremental re-compare",
+        value=True,
+        help="On re-upload against the same PDF, only changed cells are re-scored "
+             "and a copy of the previous highlighted workbook is patched"
+    )
+    capture_profile = st.checkbox(
+        "Capture profile (cProfile + tracemalloc)",
+        value=False,
+        help="Slows the run down; adds profile downloads next to the highlighted Excel"
+    )
+    st.text_input(
+        "Reattach to job ID",
+        key="reattach_job_id",
+        on_change=reattach_job,
+        help="Comparisons run in the background; paste a job ID (shown while it runs) "
+             "to follow it from another tab"
+    )
 
 # File upload section
 st.header("1️⃣ Upload Files")
@@ -238,6 +306,16 @@ with col2:
     st.caption("Excel जिसमें हर row PDF की line से match करना है")
     excel_file = st.file_uploader("Choose Excel file", type=['xlsx', 'xls'], key="excel_uploader")
 
+# Background comparison job (submitted by the button, survives reruns and reloads)
+job_store = get_job_store()
+if 'job' in st.query_params and st.session_state.job_id is None:
+    st.session_state.job_id = st.query_params['job']
+active_job = job_store.get(st.session_state.job_id) if st.session_state.job_id else None
+if st.session_state.job_id and active_job is None:
+    st.warning(f"Comparison job {st.session_state.job_id} was not found (finished and released, or the server restarted)")
+    forget_job()
+job_running = active_job is not None and not active_job.finished_state
+
 # Compare button (only show when both files uploaded)
 if pdf_file and excel_file:
     st.header("2️⃣ Start Line-by-Line Comparison")
@@ -248,145 +326,69 @@ if pdf_file and excel_file:
             "🔍 START LINE-BY-LINE COMPARISON", 
             type="primary", 
             use_container_width=True,
+            disabled=job_running,
             help="Click to compare PDF lines with Excel rows"
         )
     
-    if compare_btn:
-        with st.spinner("Extracting lines from PDF..."):
-            # Reset file pointers
-            pdf_file.seek(0)
-            excel_file.seek(0)
-            
-            # Extract PDF lines
-            pdf_lines = extract_pdf_lines(pdf_file)
-            st.session_state.pdf_lines = pdf_lines
-            
-            # Read Excel
-            excel_df = pd.read_excel(excel_file)
-            st.session_state.excel_df = excel_df
-            
-            if not pdf_lines:
-                st.error("No lines found in PDF! Please check the PDF file.")
-                st.stop()
-            
-            if excel_df.empty:
-                st.error("Excel file is empty!")
-                st.stop()
-            
-            # Show extracted info
-            st.info(f"📊 **Extracted:** {len(pdf_lines)} lines from PDF, {excel_df.shape[0]} rows from Excel")
-            
-            # Perform line-by-line comparison
-            progress_bar = st.progress(0)
-            status_text = st.empty()
-            
-            comparison_results = []
-            total_cells = excel_df.size
-            processed = 0
-            
-            # For each cell in Excel, find best matching line in PDF
-            for col_idx, column in enumerate(excel_df.columns):
-                for row_idx, cell_value in enumerate(excel_df[column]):
-                    processed += 1
-                    progress = processed / total_cells
-                    progress_bar.progress(progress)
-                    
-                    excel_row = row_idx + 2
-                    cell_str = str(cell_value) if not pd.isna(cell_value) else ""
-                    
-                    if processed % 10 == 0:
-                        status_text.text(f"Comparing cell {processed}/{total_cells}...")
-                    
-                    if not cell_str.strip():
-                        # Empty cell
-                        comparison_results.append({
-                            'excel_cell': f"{column}{excel_row}",
-                            'excel_column': column,
-                            'excel_row': excel_row,
-                            'excel_value': cell_str,
-                            'matched_pdf_line': None,
-                            'similarity_percent': 0,
-                            'match_status': '⚪ Empty'
-                        })
-                        continue
-                    
-                    # Find best matching line in PDF
-                    best_match = None
-                    best_similarity = 0
-                    best_line_info = None
-                    
-                    cell_lower = cell_str.lower()
-                    cell_words = set(cell_lower.split())
-                    
-                    for pdf_line in pdf_lines:
-                        line_lower = pdf_line['lower_line']
-                        line_words = set(line_lower.split())
-                        
-                        if cell_lower == line_lower:
-                            # Exact match found
-                            best_match = pdf_line['clean_line']
-                            best_similarity = 100
-                            best_line_info = pdf_line
-                            break
-                        
-                        # Calculate word similarity
-                        if cell_words and line_words:
-                            common_words = cell_words.intersection(line_words)
-                            similarity = len(common_words) / len(cell_words) * 100
-                            
-                            if similarity > best_similarity:
-                                best_similarity = similarity
-                                best_match = pdf_line['clean_line']
-                                best_line_info = pdf_line
-                    
-                    # Determine match status
-                    if best_similarity == 100:
-                        match_status = '✅ Perfect Match'
-                    elif best_similarity >= 70:
-                        match_status = '⚠️ Partial Match'
-                    else:
-                        match_status = '❌ No Match'
-                    
-                    comparison_results.append({
-                        'excel_cell': f"{column}{excel_row}",
-                        'excel_column': column,
-                        'excel_row': excel_row,
-                        'excel_value': cell_str,
-                        'matched_pdf_line': best_match,
-                        'pdf_line_info': best_line_info,
-                        'similarity_percent': best_similarity,
-                        'match_status': match_status
-                    })
-            
-            st.session_state.comparison_results = comparison_results
-            status_text.text("✅ Line-by-line comparison complete!")
-            time.sleep(0.5)
-            
-            # Create highlighted Excel
-            excel_file.seek(0)
-            highlighted_excel = create_highlighted_excel_line_compare(
-                excel_file, 
-                comparison_results, 
-                pdf_lines[:50]  # Send first 50 lines for sample
-            )
-            st.session_state.highlighted_excel = highlighted_excel
-            
-            st.session_state.compare_done = True
-            
-            # Show completion message
-            st.success("🎯 Line-by-line comparison completed! View results below.")
+    if compare_btn and not job_running:
+        result_store = get_result_store()
+        previous = None
+        if incremental and st.session_state.result_handle:
+            previous = result_store.snapshot(st.session_state.result_handle)
+        active_job = job_store.submit(
+            make_comparison_job(
+                uploaded_copy(pdf_file),
+                uploaded_copy(excel_file),
+                result_store,
+                workers=extraction_workers,
+                cache=get_pdf_line_cache() if use_pdf_cache else None,
+                scorer=scorer,
+                report_mode=report_mode,
+                previous=previous,
+                capture_profile=capture_profile,
+            ),
+            label=excel_file.name
+        )
+        st.session_state.job_id = active_job.id
+        st.query_params['job'] = active_job.id
+        job_running = True
+
+if active_job is not None:
+    show_job(active_job.id)
+
+# Outcome of the last finished job (shown once)
+if st.session_state.job_outcome:
+    kind, message = st.session_state.job_outcome
+    getattr(st, kind)(message)
+    st.session_state.job_outcome = None
+
+# Results live in the shared store; the session only holds their handle
+result_store = get_result_store()
+stored = result_store.get(st.session_state.result_handle) if st.session_state.result_handle else None
+if st.session_state.result_handle and stored is None:
+    st.warning("These comparison results expired from the server's result store - please run the comparison again")
+    st.session_state.result_handle = None
+    st.session_state.compare_done = False
 
 # Show side-by-side comparison if comparison is done
-if st.session_state.compare_done and st.session_state.comparison_results:
+if st.session_state.compare_done and stored is not None:
     st.header("3️⃣ Line-by-Line Comparison Results")
+    result_handle = st.session_state.result_handle
+    pdf_lines = stored['pdf_lines']
+    
+    # Derived frames are built once per result and shared by every rerun and session
+    view = result_store.derived(
+        result_handle, 'view',
+        lambda payload: ResultsView(payload['comparison_results'], payload['excel_df'])
+    )
     
     # Statistics
-    results_df = pd.DataFrame(st.session_state.comparison_results)
-    total_checks = len(results_df)
-    perfect_matches = len(results_df[results_df['match_status'] == '✅ Perfect Match'])
-    partial_matches = len(results_df[results_df['match_status'] == '⚠️ Partial Match'])
-    no_matches = len(results_df[results_df['match_status'] == '❌ No Match'])
-    empty_cells = len(results_df[results_df['match_status'] == '⚪ Empty'])
+    status_counts = view.status_counts
+    total_checks = len(view.results)
+    perfect_matches = status_counts['✅ Perfect Match']
+    partial_matches = status_counts['⚠️ Partial Match']
+    no_matches = status_counts['❌ No Match']
+    empty_cells = status_counts['⚪ Empty']
     
     accuracy = (perfect_matches + partial_matches * 0.5) / total_checks * 100 if total_checks > 0 else 0
     
@@ -402,6 +404,23 @@ if st.session_state.compare_done and st.session_state.comparison_results:
     st.progress(accuracy / 100)
     st.success(f"✅ STATUS: COMPLETED - {total_checks} cells checked line-by-line")
     
+    match_stats = st.session_state.match_stats
+    if match_stats and match_stats['scored_cells']:
+        saved = match_stats['scored_cells'] - match_stats['distinct_values']
+        st.caption(
+            f"🔁 {match_stats['distinct_values']} distinct values scored for "
+            f"{match_stats['scored_cells']} non-empty cells "
+            f"({saved} repeat lookups saved)"
+        )
+    if match_stats and match_stats.get('incremental'):
+        st.info(
+            f"♻️ **Incremental re-compare:** {match_stats['reused_cells']} cells reused, "
+            f"{match_stats['recomputed_cells']} changed/new cells recomputed "
+            f"({match_stats['scored_values']} values scored), "
+            f"{match_stats['removed_cells']} cells removed"
+            + (" - highlighted workbook patched" if match_stats.get('report_patched') else "")
+        )
+    
     # Side-by-side layout
     st.subheader("📄 PDF Lines vs 📊 Excel Data")
     
@@ -412,45 +431,18 @@ if st.session_state.compare_done and st.session_state.comparison_results:
         st.markdown("### 📄 PDF Lines (First 30 lines)")
         
         pdf_lines_display = []
-        for i, line in enumerate(st.session_state.pdf_lines[:30], 1):
-            pdf_lines_display.append(f"Line {i}: {line['clean_line'][:80]}{'...' if len(line['clean_line']) > 80 else ''}")
+        for i, line in enumerate(pdf_lines[:30], 1):
+            pdf_lines_display.append(f"Line {i}: {line.clean_line[:80]}{'...' if len(line.clean_line) > 80 else ''}")
         
         st.text_area("PDF Lines", "\n".join(pdf_lines_display), height=400, label_visibility='collapsed')
         
-        st.caption(f"Total {len(st.session_state.pdf_lines)} lines extracted from PDF")
+        st.caption(f"Total {len(pdf_lines)} lines extracted from PDF")
     
     with right_col:
         st.markdown("### 📊 Excel Data with Line Matches")
         
-        # Create display dataframe
-        display_df = st.session_state.excel_df.copy()
-        
-        # Add match indicators
-        for result in st.session_state.comparison_results:
-            if result['match_status'] == '✅ Perfect Match':
-                indicator = "✅"
-            elif result['match_status'] == '⚠️ Partial Match':
-                indicator = "⚠️"
-            elif result['match_status'] == '❌ No Match':
-                indicator = "❌"
-            elif result['match_status'] == '⚪ Empty':
-                indicator = "⚪"
-            else:
-                indicator = ""
-            
-            col = result['excel_column']
-            row_idx = result['excel_row'] - 2  # Convert to 0-based index
-            
-            if 0 <= row_idx < len(display_df):
-                current_value = display_df.at[row_idx, col]
-                if pd.notna(current_value):
-                    display_df.at[row_idx, col] = f"{indicator} {current_value}"
-        
-        st.dataframe(
-            display_df,
-            use_container_width=True,
-            height=400
-        )
+        # Excel data with match indicators, one page at a time
+        show_page(view, 'overlay', "overlay_page", rows_per_page, height=400)
     
     # Detailed analysis
     st.subheader("🔍 Detailed Line-by-Line Analysis")
@@ -459,67 +451,102 @@ if st.session_state.compare_done and st.session_state.comparison_results:
     tab1, tab2, tab3, tab4 = st.tabs(["All Results", "No Matches", "Perfect Matches", "PDF Line Mapping"])
     
     with tab1:
-        display_results = results_df[['excel_cell', 'excel_value', 'match_status', 'similarity_percent']].copy()
-        display_results['similarity_percent'] = display_results['similarity_percent'].apply(lambda x: f"{x:.1f}%")
-        st.dataframe(display_results, use_container_width=True, height=300)
+        show_page(view, 'all', "all_results_page", rows_per_page)
     
     with tab2:
-        no_match_df = results_df[results_df['match_status'] == '❌ No Match']
-        if not no_match_df.empty:
-            st.warning(f"Found {len(no_match_df)} cells with no matching PDF line:")
-            display_cols = ['excel_cell', 'excel_value', 'similarity_percent']
-            no_match_df = no_match_df.copy()
-            no_match_df['similarity_percent'] = no_match_df['similarity_percent'].apply(lambda x: f"{x:.1f}%")
-            st.dataframe(no_match_df[display_cols], use_container_width=True, height=300)
+        if no_matches:
+            st.warning(f"Found {no_matches} cells with no matching PDF line:")
+            show_page(view, 'no_match', "no_match_page", rows_per_page)
         else:
             st.success("🎉 All cells have at least partial match with PDF lines!")
     
     with tab3:
-        perfect_match_df = results_df[results_df['match_status'] == '✅ Perfect Match']
-        if not perfect_match_df.empty:
-            st.info(f"Found {len(perfect_match_df)} cells with perfect line matches:")
+        if perfect_matches:
+            st.info(f"Found {perfect_matches} cells with perfect line matches:")
             
             # Show with PDF line mapping
-            perfect_display = perfect_match_df[['excel_cell', 'excel_value', 'matched_pdf_line']].copy()
-            perfect_display['matched_pdf_line'] = perfect_display['matched_pdf_line'].apply(
-                lambda x: str(x)[:60] + "..." if x and len(str(x)) > 60 else str(x)
-            )
-            st.dataframe(perfect_display, use_container_width=True, height=300)
+            show_page(view, 'perfect', "perfect_page", rows_per_page)
         else:
             st.warning("No perfect matches found")
     
     with tab4:
         st.write("**PDF Line to Excel Cell Mapping**")
         
-        # Group by PDF line
-        line_mapping = {}
-        for result in st.session_state.comparison_results:
-            if result['pdf_line_info']:
-                line_text = result['pdf_line_info']['clean_line'][:50]
-                if line_text not in line_mapping:
-                    line_mapping[line_text] = []
-                line_mapping[line_text].append({
-                    'excel_cell': result['excel_cell'],
-                    'similarity': result['similarity_percent']
-                })
+        mapping_mode = st.radio(
+            "Mapping mode",
+            ["Best match per cell", f"All pairs ≥{DEFAULT_THRESHOLD}% (similarity join)"],
+            horizontal=True,
+            label_visibility='collapsed'
+        )
         
-        # Display mapping
-        for line_text, matches in list(line_mapping.items())[:20]:  # Show first 20
-            with st.expander(f"📄 '{line_text}...'"):
-                for match in matches:
-                    st.write(f"- **{match['excel_cell']}**: {match['similarity']:.1f}% match")
+        if mapping_mode == "Best match per cell":
+            # Group by PDF line
+            line_mapping = view.best_line_groups(20)
+            
+            # Display mapping
+            for line_text, matches in line_mapping.items():  # First 20 lines
+                with st.expander(f"📄 '{line_text}...'"):
+                    for excel_cell, similarity in matches:
+                        st.write(f"- **{excel_cell}**: {similarity:.1f}% match")
+        else:
+            # Every line/cell pair above the threshold, computed once per comparison
+            with st.spinner("Joining all PDF lines with all Excel cells..."):
+                mapping_df, join_stats, mapping_counts = result_store.derived(
+                    result_handle, 'line_mapping', build_line_mapping
+                )
+            
+            map_col1, map_col2, map_col3, map_col4 = st.columns(4)
+            map_col1.metric("🔗 Line/Cell Pairs", len(mapping_df))
+            map_col2.metric("📄 Lines Matched", mapping_counts['lines_matched'])
+            map_col3.metric("🔁 Cells on 2+ Lines", mapping_counts['multi_line_cells'])
+            map_col4.metric("✂️ Lines with 2+ Cells", mapping_counts['multi_cell_lines'])
+            st.caption(
+                f"Verified {join_stats['candidate_pairs']:,} candidate pairs instead of "
+                f"{join_stats['brute_force_pairs']:,} (prefix + length filtering)"
+            )
+            
+            if mapping_df.empty:
+                st.warning(f"No PDF line / Excel cell pairs at {DEFAULT_THRESHOLD}% or more")
+            else:
+                st.dataframe(mapping_df.head(5000), use_container_width=True, height=300, hide_index=True)
+                if len(mapping_df) > 5000:
+                    st.caption(f"Showing first 5,000 of {len(mapping_df):,} pairs - download for the full table")
+                # CSV is only built when clicked, not on every rerun
+                st.download_button(
+                    label="📥 Download line mapping (CSV)",
+                    data=lambda: line_mapping_csv(result_handle),
+                    file_name="pdf_line_mapping.csv",
+                    mime="text/csv"
+                )
+    
+    # Per-stage timings
+    if st.session_state.perf_report:
+        perf = st.session_state.perf_report
+        with st.expander(f"⏱️ Performance ({perf.total_wall_seconds():.2f}s across stages)"):
+            st.dataframe(pd.DataFrame(perf.table_rows()), use_container_width=True, hide_index=True)
+            st.caption(
+                "progress_updates is time spent inside progress callbacks and is already part of match. "
+                "Memory peaks are process-wide, so stages marked concurrent (another job was running) have none."
+            )
+            st.download_button(
+                label="📥 Download performance JSON",
+                data=perf.to_json(),
+                file_name="performance.json",
+                mime="application/json"
+            )
     
     # Download section
     st.header("4️⃣ Download Results")
     
-    if st.session_state.highlighted_excel:
+    if stored['excel_bytes'] is not None:
         col1, col2 = st.columns([1, 2])
         
         with col1:
+            # Read from the store's disk copy (or rebuilt) only when clicked
             st.download_button(
                 label="📥 Download Highlighted Excel",
-                data=st.session_state.highlighted_excel,
-                file_name=f"LINE_COMPARE_{excel_file.name}",
+                data=lambda: result_store.report(result_handle) or b"",
+                file_name=f"LINE_COMPARE_{st.session_state.excel_name}",
                 mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
                 type="primary"
             )
@@ -533,23 +560,113 @@ if st.session_state.compare_done and st.session_state.comparison_results:
             - ⚪ **Gray cells** = Empty cells
             - 📝 **Analysis sheet** = Line-by-line mapping details
             """)
+        
+        if st.session_state.profile_report:
+            prof_col1, prof_col2 = st.columns(2)
+            with prof_col1:
+                st.download_button(
+                    label="📥 Download profile report (.txt)",
+                    data=st.session_state.profile_report['text'],
+                    file_name="profile_report.txt",
+                    mime="text/plain"
+                )
+            with prof_col2:
+                st.download_button(
+                    label="📥 Download cProfile stats (.prof)",
+                    data=st.session_state.profile_report['prof'],
+                    file_name="comparison.prof",
+                    mime="application/octet-stream"
+                )
+    
+    # Full results / PDF line table, written in chunks only when clicked
+    st.subheader("📦 Full Data Export")
+    export_format = st.radio(
+        "Export format",
+        available_formats(),
+        format_func=str.upper,
+        horizontal=True,
+        help="The workbook's analysis sheet only has a sample; these files contain every row"
+    )
+    comparison_results = stored['comparison_results']
+    # The callables only hold the handle; the rows are fetched from the store when clicked
+    export_base = os.path.splitext(st.session_state.excel_name or "comparison")[0]
+    export_col1, export_col2 = st.columns(2)
+    with export_col1:
+        st.download_button(
+            label=f"📥 All {len(comparison_results):,} results (.{export_format})",
+            data=lambda: export_download(result_handle, 'comparison_results', export_results, export_format),
+            file_name=f"LINE_COMPARE_{export_base}.results.{export_format}",
+            mime=EXPORT_MIME_TYPES[export_format]
+        )
+    with export_col2:
+        st.download_button(
+            label=f"📥 All {len(pdf_lines):,} PDF lines (.{export_format})",
+            data=lambda: export_download(result_handle, 'pdf_lines', export_pdf_lines, export_format),
+            file_name=f"LINE_COMPARE_{export_base}.pdf_lines.{export_format}",
+            mime=EXPORT_MIME_TYPES[export_format]
+        )
     
     # Reset button
     st.markdown("---")
     if st.button("🔄 Start New Line Comparison", type="secondary"):
+        release_result()
         st.session_state.compare_done = False
-        st.session_state.comparison_results = None
-        st.session_state.excel_df = None
-        st.session_state.pdf_lines = []
-        st.session_state.highlighted_excel = None
+        st.session_state.match_stats = None
+        st.session_state.perf_report = None
+        st.session_state.profile_report = None
+        st.session_state.excel_name = None
         st.rerun()
 
+elif job_running:
+    pass
+
 elif pdf_file and excel_file and not st.session_state.compare_done:
     st.info("👆 Click the 'START LINE-BY-LINE COMPARISON' button above to begin")
 
 else:
     st.info("📁 Please upload both PDF and Excel files to start line-by-line comparison")
 
+# PDF cache stats (rendered last so this run's hit/miss is included)
+with st.sidebar:
+    st.subheader("🗄️ PDF Line Cache")
+    cache_stats = get_pdf_line_cache().stats()
+    cache_col1, cache_col2 = st.columns(2)
+    cache_col1.metric("Hits", cache_stats['hits'])
+    cache_col2.metric("Misses", cache_stats['misses'])
+    st.caption(
+        f"{cache_stats['entries']} PDFs cached · "
+        f"{cache_stats['size_bytes'] / 1024 / 1024:.1f} / {cache_stats['max_bytes'] / 1024 / 1024:.0f} MB"
+    )
+    if st.button("🧹 Clear PDF cache"):
+        get_pdf_line_cache().clear()
+        st.rerun()
+    
+    # Shared by all sessions on this server
+    st.subheader("🗃️ Result Store")
+    store_stats = get_result_store().stats()
+    store_col1, store_col2 = st.columns(2)
+    store_col1.metric("Results", store_stats['entries'])
+    store_col2.metric("In memory", store_stats['in_memory'])
+    st.caption(
+        f"Memory {store_stats['memory_bytes'] / 1024 / 1024:.1f} / {store_stats['memory_budget'] / 1024 / 1024:.0f} MB · "
+        f"disk {store_stats['disk_bytes'] / 1024 / 1024:.1f} / {store_stats['disk_budget'] / 1024 / 1024:.0f} MB · "
+        f"{store_stats['reloads']} reloaded from disk"
+    )
+    
+    # Cold-start cost of this server process
+    timings = import_timings()
+    with st.expander(f"🚀 Startup imports ({sum(timings.values()):.2f}s)"):
+        st.dataframe(
+            [{'module': name, 'seconds': round(seconds, 3)} for name, seconds in timings.items()],
+            use_container_width=True, hide_index=True
+        )
+        warmup = start_engine_warmup()
+        st.caption(
+            "Measured once per server process. PyMuPDF and openpyxl "
+            + ("are loading in the background." if warmup is not None and warmup.is_alive()
+               else "load on first use (background warm-up at startup).")
+        )
+
 # Footer
 st.markdown("---")
 st.caption("🔧 Tool: PDF Line-by-Line Excel Comparator | Status: Ready")
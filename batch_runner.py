@@ -0,0 +1,282 @@
+"""Batch PDF ↔ Excel comparison over a manifest of pairs
+
+Usage::
+
+    python batch_runner.py month_end.csv --output-dir reports/ --workers 8
+
+The manifest is a CSV with ``pdf`` and ``excel`` columns and an optional
+``output`` column (default ``LINE_COMPARE_<excel name>.xlsx``); relative
+paths are resolved against the manifest's directory. Pairs run across a
+process pool with a bounded number of jobs in flight. Each workbook and
+its ``.summary.json`` are written as soon as the pair finishes, and every
+finished pair is appended to a checkpoint file, so re-running the same
+command after an interruption skips the pairs that already succeeded.
+
+PDFs are grouped by content hash: the first pair of each PDF extracts it
+into the batch's line cache and the other pairs of that PDF are only
+started once it is there, so identical PDFs are extracted once per run.
+"""
+import argparse
+import csv
+import json
+import logging
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from compare_engine import SCORERS, compare_files
+from pdf_cache import DEFAULT_MAX_BYTES, PdfLineCache, pdf_cache_key
+from pdf_extract import resolve_workers
+from report_writer import REPORT_MODES
+
+CHECKPOINT_FILE = "batch_checkpoint.jsonl"
+REPORT_FILE = "batch_report.json"
+CACHE_SUBDIR = ".pdf_cache"
+
+
+class BatchPair:
+    """Manifest की एक PDF/Excel pair"""
+
+    def __init__(self, pdf, excel, output):
+        self.pdf = pdf
+        self.excel = excel
+        self.output = output
+        self.pdf_key = None
+
+
+def read_manifest(manifest_path, output_dir):
+    """Manifest CSV पढ़ो, paths resolve करो; output paths unique होने चाहिए"""
+    base_dir = os.path.dirname(os.path.abspath(manifest_path))
+    pairs = []
+    with open(manifest_path, newline='', encoding='utf-8') as manifest_file:
+        reader = csv.DictReader(manifest_file)
+        missing = {'pdf', 'excel'} - set(reader.fieldnames or ())
+        if missing:
+            raise ValueError(f"Manifest {manifest_path} is missing column(s): {', '.join(sorted(missing))}")
+        for row in reader:
+            if not row['pdf'] or not row['excel']:
+                continue
+            pdf = os.path.join(base_dir, row['pdf'])
+            excel = os.path.join(base_dir, row['excel'])
+            output = row.get('output') or \
+                f"LINE_COMPARE_{os.path.splitext(os.path.basename(excel))[0]}.xlsx"
+            pairs.append(BatchPair(pdf, excel, os.path.join(output_dir, output)))
+
+    seen = set()
+    for pair in pairs:
+        if pair.output in seen:
+            raise ValueError(f"Two pairs write {pair.output}; set an 'output' column in the manifest")
+        seen.add(pair.output)
+    return pairs
+
+
+def load_checkpoint(checkpoint_path):
+    """पिछले run में जो pairs सफल हुए उनके output paths"""
+    done = {}
+    if not os.path.exists(checkpoint_path):
+        return done
+    with open(checkpoint_path, encoding='utf-8') as checkpoint_file:
+        for line in checkpoint_file:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # A line cut short by an interruption
+                continue
+            if record.get('status') == 'ok':
+                done[record['output_file']] = record
+    return done
+
+
+def _run_pair(pdf, excel, output, cache_dir, cache_max_bytes, scorer, report_mode):
+    """Worker process: एक pair compare करो, summary file लिखो"""
+    cache = PdfLineCache(cache_dir, max_bytes=cache_max_bytes)
+    try:
+        summary = compare_files(pdf, excel, output, cache=cache, scorer=scorer, report_mode=report_mode)
+    except Exception as e:
+        return {'status': 'error', 'pdf_file': pdf, 'excel_file': excel, 'output_file': output,
+                'error': f"{type(e).__name__}: {e}"}
+    summary['status'] = 'ok'
+    with open(f"{os.path.splitext(output)[0]}.summary.json", 'w', encoding='utf-8') as summary_file:
+        json.dump(summary, summary_file, indent=2, ensure_ascii=False)
+    return summary
+
+
+def run_batch(pairs, output_dir, workers=0, max_pending=None, cache_dir=None, cache_max_bytes=None,
+              scorer='index', report_mode='in_memory', progress=print):
+    """Pairs को process pool में चलाओ; checkpoint से resume होता है
+
+    At most ``max_pending`` pairs (default two per worker) are submitted at
+    a time. Returns the aggregate report (also written to
+    ``batch_report.json`` in ``output_dir``).
+    """
+    start = time.perf_counter()
+    workers = resolve_workers(workers)
+    max_pending = max_pending or workers * 2
+    cache_dir = cache_dir or os.path.join(output_dir, CACHE_SUBDIR)
+    cache_max_bytes = cache_max_bytes or DEFAULT_MAX_BYTES
+    os.makedirs(output_dir, exist_ok=True)
+
+    checkpoint_path = os.path.join(output_dir, CHECKPOINT_FILE)
+    done = load_checkpoint(checkpoint_path)
+    todo = [pair for pair in pairs if pair.output not in done]
+    progress(f"{len(pairs)} pairs in manifest, {len(pairs) - len(todo)} already done, "
+             f"{len(todo)} to run on {workers} workers")
+
+    # Group identical PDFs by content so each one is extracted once
+    for pair in todo:
+        try:
+            with open(pair.pdf, 'rb') as pdf_file:
+                pair.pdf_key = pdf_cache_key(pdf_file)
+        except OSError:
+            # Leave it ungrouped; the worker reports the error
+            pair.pdf_key = None
+
+    ready = deque(todo)
+    # PDF key -> pairs waiting for the first pair of that PDF to fill the cache
+    waiting = {}
+    extracting = set()
+    extracted = set()
+    in_flight = {}
+    results = []
+
+    with open(checkpoint_path, 'a', encoding='utf-8') as checkpoint_file, \
+            ProcessPoolExecutor(max_workers=workers) as pool:
+        try:
+            while ready or in_flight:
+                while ready and len(in_flight) < max_pending:
+                    pair = ready.popleft()
+                    key = pair.pdf_key
+                    if key is not None and key in extracting:
+                        waiting.setdefault(key, []).append(pair)
+                        continue
+                    if key is not None and key not in extracted:
+                        extracting.add(key)
+                    future = pool.submit(_run_pair, pair.pdf, pair.excel, pair.output, cache_dir,
+                                         cache_max_bytes, scorer, report_mode)
+                    in_flight[future] = pair
+
+                if not in_flight:
+                    continue
+                finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    pair = in_flight.pop(future)
+                    result = future.result()
+                    results.append(result)
+                    checkpoint_file.write(json.dumps(result, ensure_ascii=False) + "\n")
+                    checkpoint_file.flush()
+                    os.fsync(checkpoint_file.fileno())
+
+                    if pair.pdf_key in extracting:
+                        extracting.discard(pair.pdf_key)
+                        extracted.add(pair.pdf_key)
+                        # Run the rest of this PDF's pairs next
+                        ready.extendleft(reversed(waiting.pop(pair.pdf_key, [])))
+
+                    if result['status'] == 'ok':
+                        progress(f"[{len(results)}/{len(todo)}] ok     {pair.output} "
+                                 f"({result['elapsed_seconds']:.1f}s, accuracy {result['accuracy']:.1f}%)")
+                    else:
+                        progress(f"[{len(results)}/{len(todo)}] FAILED {pair.output}: {result['error']}")
+        except KeyboardInterrupt:
+            for future in in_flight:
+                future.cancel()
+            progress("Interrupted - finished pairs are checkpointed; re-run to resume")
+            raise
+        finally:
+            report = throughput_report(results, len(pairs) - len(todo), len(extracted),
+                                       time.perf_counter() - start, workers)
+            with open(os.path.join(output_dir, REPORT_FILE), 'w', encoding='utf-8') as report_file:
+                json.dump(report, report_file, indent=2, ensure_ascii=False)
+    return report
+
+
+def throughput_report(results, skipped, distinct_pdfs, elapsed, workers):
+    """Batch का aggregate: counts, pairs/cells/lines per second, stage totals"""
+    ok = [result for result in results if result['status'] == 'ok']
+    cells = sum(result['total_checks'] for result in ok)
+    lines = sum(result['pdf_lines'] for result in ok)
+    stage_seconds = {}
+    for result in ok:
+        for stage in result['performance']['stages']:
+            stage_seconds[stage['stage']] = stage_seconds.get(stage['stage'], 0) + stage['wall_seconds']
+    cache_hits = sum(1 for result in ok
+                     for stage in result['performance']['stages']
+                     if stage['stage'] == 'pdf_cache_lookup' and stage['counts'].get('hit'))
+    return {
+        'workers': workers,
+        'pairs_ok': len(ok),
+        'pairs_failed': len(results) - len(ok),
+        'pairs_skipped': skipped,
+        'distinct_pdfs': distinct_pdfs,
+        'pdf_cache_hits': cache_hits,
+        'elapsed_seconds': round(elapsed, 3),
+        'pairs_per_second': round(len(ok) / elapsed, 3) if elapsed else None,
+        'cells_per_second': round(cells / elapsed, 1) if elapsed else None,
+        'pdf_lines_per_second': round(lines / elapsed, 1) if elapsed else None,
+        'cells_compared': cells,
+        'stage_seconds_total': {name: round(seconds, 3) for name, seconds in stage_seconds.items()},
+        'failures': [{'output_file': result['output_file'], 'error': result['error']}
+                     for result in results if result['status'] != 'ok'],
+    }
+
+
+def print_report(report, out=sys.stdout):
+    print(f"\nPairs: {report['pairs_ok']} ok, {report['pairs_failed']} failed, "
+          f"{report['pairs_skipped']} skipped (already done)", file=out)
+    print(f"Elapsed: {report['elapsed_seconds']:.1f}s on {report['workers']} workers - "
+          f"{report['pairs_per_second']} pairs/s, {report['cells_per_second']} cells/s, "
+          f"{report['pdf_lines_per_second']} PDF lines/s", file=out)
+    print(f"Distinct PDFs: {report['distinct_pdfs']}, "
+          f"{report['pdf_cache_hits']} pairs served from the line cache", file=out)
+    if report['stage_seconds_total']:
+        print("Stage time summed over pairs:", file=out)
+        for name, seconds in sorted(report['stage_seconds_total'].items(), key=lambda item: -item[1]):
+            print(f"  {name:<28} {seconds:10.2f}s", file=out)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="Compare many PDF/Excel pairs from a manifest across a process pool."
+    )
+    parser.add_argument("manifest", help="CSV with pdf, excel and optional output columns")
+    parser.add_argument("--output-dir", required=True,
+                        help="Where workbooks, summaries, the checkpoint and the report go")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="Worker processes (0 = one per CPU, default: 0)")
+    parser.add_argument("--max-pending", type=int,
+                        help="Pairs submitted to the pool at once (default: 2 x workers)")
+    parser.add_argument("--scorer", choices=SCORERS, default="index")
+    parser.add_argument("--report-mode", choices=REPORT_MODES, default="in_memory")
+    parser.add_argument("--cache-dir",
+                        help=f"PDF line cache directory (default: <output-dir>/{CACHE_SUBDIR})")
+    parser.add_argument("--cache-max-mb", type=int, default=512,
+                        help="Size budget for the line cache before LRU eviction (default: 512)")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    logging.basicConfig(level=logging.WARNING, format="%(levelname)s: %(message)s")
+
+    try:
+        pairs = read_manifest(args.manifest, args.output_dir)
+    except (OSError, ValueError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+
+    try:
+        report = run_batch(
+            pairs, args.output_dir, workers=args.workers, max_pending=args.max_pending,
+            cache_dir=args.cache_dir, cache_max_bytes=args.cache_max_mb * 1024 * 1024,
+            scorer=args.scorer, report_mode=args.report_mode
+        )
+    except KeyboardInterrupt:
+        return 130
+    print_report(report)
+    return 1 if report['pairs_failed'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1 @@
+"""Performance benchmarks (run with ``python -m benchmarks.run_benchmarks``)"""
@@ -0,0 +1,282 @@
+"""Benchmark extraction, matching and report writing on synthetic data
+
+Run from the repository root::
+
+    python -m benchmarks.run_benchmarks --pages 10,200 --cells 1000,50000 \\
+        --output bench_results.json --compare previous_results.json
+
+Every stage (PDF extraction, Excel ingest, matching, the all-pairs line
+mapping join, report writing) is timed on its own, with the process peak
+RSS reset before the stage so the recorded high-water mark belongs to
+that stage (Linux ``/proc``; elsewhere
+it falls back to the process-wide ``ru_maxrss``). Generated inputs are
+kept in ``--data-dir`` and reused across runs. Cold import times of the
+engine and of each lazily loaded library are measured in fresh
+interpreters and stored under ``cold_imports``.
+"""
+import argparse
+import datetime
+import gc
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+from benchmarks.synthetic import make_excel, make_pdf
+from compare_engine import SCORERS, compare_cells
+from excel_ingest import load_excel
+from instrumentation import current_rss_kb, peak_rss_kb, reset_peak_rss
+from line_index import PdfLineIndex
+from pdf_extract import extract_pdf_lines
+from report_writer import REPORT_MODES, write_highlighted_report
+from similarity_join import line_mapping_table
+
+DEFAULT_DATA_DIR = ".bench_data"
+
+
+def measure(stage, params, fn, repeat=1, setup=None):
+    """``fn`` को ``repeat`` बार चलाओ: wall/CPU time और peak RSS record करो"""
+    wall_times = []
+    cpu_times = []
+    peak_kb = 0
+    peak_delta_kb = 0
+    peak_is_stage_local = False
+    result = None
+    for _ in range(repeat):
+        args = setup() if setup else ()
+        gc.collect()
+        peak_is_stage_local = reset_peak_rss()
+        rss_start_kb = current_rss_kb()
+        cpu_start = time.process_time()
+        wall_start = time.perf_counter()
+        result = fn(*args)
+        wall_times.append(time.perf_counter() - wall_start)
+        cpu_times.append(time.process_time() - cpu_start)
+        peak_kb = max(peak_kb, peak_rss_kb())
+        peak_delta_kb = max(peak_delta_kb, peak_rss_kb() - rss_start_kb)
+
+    record = dict(params)
+    record.update({
+        'stage': stage,
+        'repeat': repeat,
+        'wall_seconds': min(wall_times),
+        'wall_seconds_all': wall_times,
+        'cpu_seconds': min(cpu_times),
+        'peak_rss_mb': round(peak_kb / 1024, 1),
+        # Growth over the RSS at stage start; only meaningful when stage-local
+        'peak_rss_delta_mb': round(peak_delta_kb / 1024, 1),
+        'peak_rss_stage_local': peak_is_stage_local,
+    })
+    print(f"  {stage:<28} {record['wall_seconds']:8.3f}s  peak {record['peak_rss_mb']:8.1f} MB"
+          f"  (+{record['peak_rss_delta_mb']:.1f} MB)", flush=True)
+    return record, result
+
+
+def _dataset_paths(data_dir, pages, cells, args):
+    tag = (f"p{pages}_c{cells}_m{args.match_ratio}_pa{args.partial_ratio}"
+           f"_d{args.duplicate_ratio}_s{args.seed}")
+    return (os.path.join(data_dir, f"synthetic_p{pages}_s{args.seed}.pdf"),
+            os.path.join(data_dir, f"synthetic_{tag}.xlsx"))
+
+
+def prepare_dataset(data_dir, pages, cells, args):
+    """Synthetic PDF/Excel pair बनाओ (या पहले से बना हुआ reuse करो)"""
+    os.makedirs(data_dir, exist_ok=True)
+    pdf_path, excel_path = _dataset_paths(data_dir, pages, cells, args)
+    if not (os.path.exists(pdf_path) and os.path.exists(excel_path)):
+        print(f"Generating {pages} pages / {cells} cells ...", flush=True)
+        line_texts = make_pdf(pdf_path, pages, seed=args.seed)
+        make_excel(excel_path, line_texts, cells, columns=args.columns,
+                   match_ratio=args.match_ratio, partial_ratio=args.partial_ratio,
+                   duplicate_ratio=args.duplicate_ratio, seed=args.seed)
+    return pdf_path, excel_path
+
+
+def run_scale(pages, cells, args):
+    pdf_path, excel_path = prepare_dataset(args.data_dir, pages, cells, args)
+    params = {'pages': pages, 'cells': cells}
+    records = []
+    print(f"[{pages} pages x {cells} cells]", flush=True)
+
+    def extract(workers):
+        with open(pdf_path, 'rb') as pdf_file:
+            return extract_pdf_lines(pdf_file, workers=workers)
+
+    pdf_lines = None
+    for workers in args.workers:
+        record, pdf_lines = measure(f"extract[workers={workers}]", params,
+                                    lambda: extract(workers), args.repeat)
+        record['pdf_lines'] = len(pdf_lines)
+        records.append(record)
+
+    def ingest():
+        with open(excel_path, 'rb') as excel_file:
+            return load_excel(excel_file)
+
+    record, excel_source = measure("excel_ingest", params, ingest, args.repeat)
+    records.append(record)
+
+    record, line_index = measure("build_index", params, lambda: PdfLineIndex(pdf_lines), args.repeat)
+    records.append(record)
+
+    comparison_results = None
+    for scorer in args.scorers:
+        stats = {}
+        record, comparison_results = measure(
+            f"match[{scorer}]", params,
+            lambda: compare_cells(excel_source.df, pdf_lines, line_index=line_index,
+                                  stats=stats, scorer=scorer),
+            args.repeat)
+        record.update(stats)
+        record['statuses'] = comparison_results.status_counts()
+        records.append(record)
+
+    join_stats = {}
+    record, _ = measure(
+        "line_mapping[join]", params,
+        lambda: line_mapping_table(excel_source.df, pdf_lines, line_index, stats=join_stats),
+        args.repeat)
+    record.update(join_stats)
+    records.append(record)
+
+    for mode in args.report_modes:
+        # The in-memory writer patches the workbook, so each run gets a fresh parse
+        record, report = measure(
+            f"report[{mode}]", params,
+            lambda source: write_highlighted_report(source, comparison_results, pdf_lines[:50], mode=mode),
+            args.repeat,
+            setup=lambda: (ingest(),))
+        report.close()
+        records.append(record)
+
+    return records
+
+
+# What a fresh process imports before it can serve the first page / comparison
+COLD_IMPORTS = (
+    ('engine', "import compare_engine"),
+    ('app modules', "import compare_engine, job_runner, results_view, result_export, similarity_join"),
+    ('fitz', "import fitz"),
+    ('PyPDF2', "import PyPDF2"),
+    ('openpyxl', "import openpyxl"),
+)
+
+
+def cold_import_seconds():
+    """हर import fresh interpreter में measure करो (module cache के बिना)"""
+    timings = {}
+    for name, statement in COLD_IMPORTS:
+        code = ("import time; start = time.perf_counter(); " + statement
+                + "; print(time.perf_counter() - start)")
+        try:
+            completed = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True,
+                                       check=True)
+            timings[name] = round(float(completed.stdout.strip().splitlines()[-1]), 4)
+        except (OSError, subprocess.CalledProcessError, ValueError, IndexError):
+            timings[name] = None
+    return timings
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare_to_baseline(records, baseline_path, threshold=0.10):
+    """Baseline results file से wall time ratio print करो"""
+    with open(baseline_path, encoding='utf-8') as baseline_file:
+        baseline = json.load(baseline_file)
+    previous = {(r['pages'], r['cells'], r['stage']): r for r in baseline['results']}
+    print(f"\nvs {baseline_path} ({baseline.get('git_commit') or 'unknown commit'}):")
+    for record in records:
+        old = previous.get((record['pages'], record['cells'], record['stage']))
+        if not old or not old['wall_seconds']:
+            continue
+        ratio = record['wall_seconds'] / old['wall_seconds']
+        flag = "  <-- slower" if ratio > 1 + threshold else ""
+        print(f"  {record['pages']:>5}p {record['cells']:>7}c {record['stage']:<28} "
+              f"{old['wall_seconds']:8.3f}s -> {record['wall_seconds']:8.3f}s  x{ratio:5.2f}{flag}")
+
+
+def _int_list(text):
+    return [int(part) for part in text.split(',') if part]
+
+
+def _name_list(choices):
+    def parse(text):
+        names = [part for part in text.split(',') if part]
+        unknown = set(names) - set(choices)
+        if unknown:
+            raise argparse.ArgumentTypeError(f"unknown: {', '.join(sorted(unknown))}")
+        return names
+    return parse
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=_int_list, default=[10, 200],
+                        help="Comma-separated PDF page counts (default: 10,200)")
+    parser.add_argument("--cells", type=_int_list, default=[1000, 20000],
+                        help="Comma-separated Excel cell counts (default: 1000,20000)")
+    parser.add_argument("--columns", type=int, default=10, help="Excel columns (default: 10)")
+    parser.add_argument("--match-ratio", type=float, default=0.5)
+    parser.add_argument("--partial-ratio", type=float, default=0.2)
+    parser.add_argument("--duplicate-ratio", type=float, default=0.3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=_int_list, default=[1],
+                        help="Extraction worker counts to time (default: 1)")
+    parser.add_argument("--scorers", type=_name_list(SCORERS), default=list(SCORERS))
+    parser.add_argument("--report-modes", type=_name_list(REPORT_MODES), default=list(REPORT_MODES))
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per stage, best is reported")
+    parser.add_argument("--data-dir", default=DEFAULT_DATA_DIR)
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--compare", help="Previous results JSON to compare wall times against")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="Slowdown fraction flagged by --compare (default: 0.10)")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    cold_imports = cold_import_seconds()
+    print("Cold imports: " + ", ".join(f"{name} {seconds}s" for name, seconds in cold_imports.items()))
+
+    records = []
+    for pages in args.pages:
+        for cells in args.cells:
+            records.extend(run_scale(pages, cells, args))
+
+    report = {
+        'created': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        'git_commit': _git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'settings': {
+            'columns': args.columns,
+            'match_ratio': args.match_ratio,
+            'partial_ratio': args.partial_ratio,
+            'duplicate_ratio': args.duplicate_ratio,
+            'seed': args.seed,
+            'repeat': args.repeat,
+        },
+        'cold_imports': cold_imports,
+        'results': records,
+    }
+    with open(args.output, 'w', encoding='utf-8') as output_file:
+        json.dump(report, output_file, indent=2, ensure_ascii=False)
+    print(f"\nWrote {len(records)} results to {args.output}")
+
+    if args.compare:
+        compare_to_baseline(records, args.compare, args.threshold)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,86 @@
+"""Synthetic PDF/Excel pairs with controllable match, partial and duplicate ratios"""
+import random
+
+import fitz  # PyMuPDF
+import pandas as pd
+
+LINES_PER_PAGE = 40
+WORDS_PER_LINE = 8
+VOCABULARY_SIZE = 5000
+
+# Words that never appear in the PDF, used for misses and partial-match noise
+NOISE_PREFIX = "zz"
+
+
+def _vocabulary(rng):
+    return [f"w{i}" for i in range(VOCABULARY_SIZE)] + \
+        [f"{amount:,}.00" for amount in rng.sample(range(100, 1_000_000), 500)]
+
+
+def make_pdf(path, pages, seed=0, lines_per_page=LINES_PER_PAGE):
+    """``pages`` pages का PDF लिखो, हर line की text list लौटाओ"""
+    rng = random.Random(seed)
+    vocabulary = _vocabulary(rng)
+    line_texts = []
+
+    pdf_doc = fitz.open()
+    for page_num in range(pages):
+        page = pdf_doc.new_page()
+        y = 40
+        for _ in range(lines_per_page):
+            text = " ".join(rng.choice(vocabulary) for _ in range(WORDS_PER_LINE))
+            page.insert_text((36, y), text, fontsize=9)
+            line_texts.append(text)
+            y += 19
+    pdf_doc.save(path)
+    pdf_doc.close()
+    return line_texts
+
+
+def _partial_value(rng, line_text):
+    """Line के ज़्यादातर words + एक noise word (>= 70% but < 100% overlap)"""
+    words = line_text.split()
+    kept = rng.sample(words, k=max(3, len(words) - 3))
+    kept.insert(rng.randrange(len(kept) + 1), f"{NOISE_PREFIX}{rng.randrange(10**6)}")
+    return " ".join(kept)
+
+
+def _miss_value(rng):
+    return " ".join(f"{NOISE_PREFIX}{rng.randrange(10**6)}" for _ in range(rng.randint(1, 4)))
+
+
+def make_cell_values(line_texts, cells, match_ratio=0.5, partial_ratio=0.2, duplicate_ratio=0.3,
+                     seed=0):
+    """Excel cells के values generate करो
+
+    Each cell is a repeat of an earlier value with ``duplicate_ratio``;
+    otherwise an exact PDF line (``match_ratio``), a partial line
+    (``partial_ratio``) or a value with no PDF words.
+    """
+    rng = random.Random(seed)
+    values = []
+    for _ in range(cells):
+        roll = rng.random()
+        if values and rng.random() < duplicate_ratio:
+            values.append(rng.choice(values))
+        elif roll < match_ratio:
+            values.append(rng.choice(line_texts))
+        elif roll < match_ratio + partial_ratio:
+            values.append(_partial_value(rng, rng.choice(line_texts)))
+        else:
+            values.append(_miss_value(rng))
+    return values
+
+
+def make_excel(path, line_texts, cells, columns=10, match_ratio=0.5, partial_ratio=0.2,
+               duplicate_ratio=0.3, seed=0):
+    """``cells`` values को ``columns`` columns में फैलाकर .xlsx लिखो"""
+    values = make_cell_values(line_texts, cells, match_ratio, partial_ratio, duplicate_ratio, seed)
+    rows = -(-cells // columns)
+    values += [None] * (rows * columns - cells)
+    df = pd.DataFrame({
+        f"Column {col + 1}": values[col * rows:(col + 1) * rows]
+        for col in range(columns)
+    })
+    df.to_excel(path, index=False)
+    return df
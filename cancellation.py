@@ -0,0 +1,12 @@
+"""Cancellation signal shared by the pipeline and the job runner
+
+``check_cancelled`` callbacks (e.g. ``job_runner.Job.check_cancelled``)
+raise ``JobCancelled``; pipeline code that catches broad exceptions (the
+PDF extraction fallback) lets it through. It lives here so the
+extraction and matching layers, which the CLI and batch runner also use,
+don't depend on the background job module.
+"""
+
+
+class JobCancelled(Exception):
+    """Job cancel होने पर job function के अंदर raise होता है"""
@@ -0,0 +1,117 @@
+"""Command line entry point for headless PDF ↔ Excel line comparison
+
+Usage::
+
+    python compare_cli.py statement.pdf ledger.xlsx LINE_COMPARE_ledger.xlsx
+"""
+import argparse
+import json
+import logging
+import sys
+from contextlib import nullcontext
+
+from compare_engine import SCORERS, compare_files
+from instrumentation import ProfileCapture
+from report_writer import REPORT_MODES
+from pdf_cache import PdfLineCache
+from result_export import EXPORT_FORMATS
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="Compare Excel cells against PDF lines and write a highlighted workbook."
+    )
+    parser.add_argument("pdf", help="PDF file to extract lines from")
+    parser.add_argument("excel", help="Excel file (.xlsx/.xls) to check")
+    parser.add_argument("output", help="Path of the highlighted .xlsx to write")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Processes for PDF page extraction (0 = one per CPU, default: 1)",
+    )
+    parser.add_argument(
+        "--scorer",
+        choices=SCORERS,
+        default="index",
+        help="Cell scoring engine: token-index loop or NumPy whole-sheet (default: index)",
+    )
+    parser.add_argument(
+        "--report-mode",
+        choices=REPORT_MODES,
+        default="in_memory",
+        help="in_memory keeps the original formatting; streaming writes "
+             "large reports in bounded memory (default: in_memory)",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        help="Reuse extracted PDF lines from this on-disk cache directory",
+    )
+    parser.add_argument(
+        "--cache-max-mb",
+        type=int,
+        default=512,
+        help="Size budget for --cache-dir before LRU eviction (default: 512)",
+    )
+    parser.add_argument(
+        "--export",
+        choices=EXPORT_FORMATS,
+        action="append",
+        default=[],
+        help="Also write the full results and PDF line table in this format "
+             "(repeatable: --export csv --export parquet)",
+    )
+    parser.add_argument(
+        "--export-prefix",
+        help="Path prefix for --export files (default: output path without extension); "
+             "writes PREFIX.results.<fmt> and PREFIX.pdf_lines.<fmt>",
+    )
+    parser.add_argument(
+        "--profile",
+        metavar="PREFIX",
+        help="Capture cProfile + tracemalloc; writes PREFIX.prof and PREFIX.txt",
+    )
+    parser.add_argument(
+        "--summary",
+        help="Write the JSON summary to this file instead of stdout",
+    )
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    logging.basicConfig(level=logging.WARNING, format="%(levelname)s: %(message)s")
+
+    cache = None
+    if args.cache_dir:
+        cache = PdfLineCache(args.cache_dir, max_bytes=args.cache_max_mb * 1024 * 1024)
+
+    profile_capture = ProfileCapture() if args.profile else nullcontext()
+    try:
+        with profile_capture:
+            summary = compare_files(
+                args.pdf, args.excel, args.output, workers=args.workers, cache=cache,
+                scorer=args.scorer, report_mode=args.report_mode,
+                export_formats=args.export, export_prefix=args.export_prefix
+            )
+    except (OSError, ValueError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+
+    if args.profile:
+        with open(f"{args.profile}.prof", 'wb') as prof_file:
+            prof_file.write(profile_capture.prof_bytes())
+        with open(f"{args.profile}.txt", 'w', encoding='utf-8') as report_file:
+            report_file.write(profile_capture.text_report())
+
+    summary_json = json.dumps(summary, indent=2, ensure_ascii=False)
+    if args.summary:
+        with open(args.summary, 'w', encoding='utf-8') as summary_file:
+            summary_file.write(summary_json + "\n")
+    else:
+        print(summary_json)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,493 @@
+"""Headless PDF line-by-line comparison engine (extract -> compare -> report)
+
+Nothing in here touches Streamlit, so the same code path serves the web app
+and the batch CLI in ``compare_cli.py``.
+"""
+import os
+import time
+
+import pandas as pd
+
+from excel_ingest import load_excel
+from instrumentation import PerfRecorder, import_timings, lazy_import
+from line_index import PdfLineIndex
+from pdf_cache import cached_extract_pdf_lines, pdf_cache_key
+from pdf_extract import extract_pdf_lines
+from report_writer import (
+    REPORT_MODES,
+    can_patch_report,
+    create_highlighted_excel_line_compare,
+    load_report_workbook,
+    patch_highlighted_excel,
+    report_styles,
+    write_highlighted_excel_streaming,
+    write_highlighted_report,
+)
+from result_export import EXPORT_FORMATS, export_comparison
+from results_table import EMPTY, NO_LINE, STATUSES, ResultsBuilder, status_code_for
+import vector_score
+
+
+SCORERS = ('index', 'vectorized')
+
+# Cells between cancellation checks in the per-cell loop
+CANCEL_CHECK_CELLS = 1000
+
+def warm_up():
+    """Extraction/report libraries और report styles पहले से load करो
+
+    Everything here is otherwise imported lazily by the first comparison;
+    a server calls this once per process in the background so the first
+    user does not pay for it. Returns ``import_timings()``.
+    """
+    lazy_import("fitz")
+    lazy_import("openpyxl")
+    report_styles()
+    return import_timings()
+
+def match_status_for(similarity):
+    """Similarity % को match status में convert करो"""
+    return STATUSES[status_code_for(similarity)]
+
+def cell_text(cell_value):
+    """Excel cell value का string form (NaN/None -> "")"""
+    return str(cell_value) if not pd.isna(cell_value) else ""
+
+def compare_cells(excel_df, pdf_lines, progress_callback=None, line_index=None, stats=None,
+                  scorer='index', known_scores=None, check_cancelled=None):
+    """हर Excel cell के लिए best matching PDF line ढूंढो
+
+    Returns a ``results_table.ComparisonResults`` (one entry per cell).
+    ``progress_callback(processed, total_cells)`` is called after every cell.
+    Pass ``line_index`` to reuse a prebuilt (e.g. cached) ``PdfLineIndex``.
+    Each distinct normalized value is scored once; pass a ``stats`` dict
+    to get the total/non-empty/distinct counts back. ``scorer`` is one of
+    ``SCORERS``: ``'index'`` scores values one by one through the token
+    index, ``'vectorized'`` scores the whole sheet up front with NumPy.
+    Both give identical results. ``known_scores`` maps lowercased values
+    to ``(line_id, similarity)`` scored earlier against the same PDF;
+    those values are not scored again. ``check_cancelled`` is called
+    before every vectorized scoring block and every 1,000 cells. The
+    vectorized scorer reports progress after every scoring block, counting
+    the cells being scored in proportion to the values done.
+    """
+    if scorer not in SCORERS:
+        raise ValueError(f"Unknown scorer {scorer!r}, expected one of {SCORERS}")
+    if line_index is None:
+        line_index = PdfLineIndex(pdf_lines)
+    builder = ResultsBuilder()
+    total_cells = excel_df.size
+    processed = 0
+    # cell_lower -> (line_id, similarity, status), shared by repeated values
+    best_by_value = {}
+    known_scores = known_scores or {}
+    scored_cells = 0
+    scored_values = 0
+
+    # Cells already reported as processed (by vectorized scoring)
+    reported = 0
+
+    if scorer == 'vectorized':
+        distinct_values = {}
+        cells_to_score = 0
+        for column in excel_df.columns:
+            for cell_str in map(cell_text, excel_df[column]):
+                if cell_str.strip():
+                    cell_lower = cell_str.lower()
+                    if cell_lower not in known_scores:
+                        distinct_values[cell_lower] = None
+                        cells_to_score += 1
+        distinct_values = list(distinct_values)
+        scoring_progress = None
+        if progress_callback:
+            def scoring_progress(values_done, values_total):
+                progress_callback(values_done * cells_to_score // values_total, total_cells)
+            reported = cells_to_score
+        for cell_lower, (line_id, similarity) in zip(
+                distinct_values, vector_score.best_match_ids(line_index, distinct_values,
+                                                             check_cancelled=check_cancelled,
+                                                             progress_callback=scoring_progress)):
+            best_by_value[cell_lower] = (
+                NO_LINE if line_id is None else line_id, similarity, status_code_for(similarity)
+            )
+        scored_values = len(distinct_values)
+
+    # For each cell in Excel, find best matching line in PDF
+    for col_idx, column in enumerate(excel_df.columns):
+        for row_idx, cell_value in enumerate(excel_df[column]):
+            processed += 1
+            if progress_callback and processed > reported:
+                progress_callback(processed, total_cells)
+            if check_cancelled is not None and processed % CANCEL_CHECK_CELLS == 0:
+                check_cancelled()
+
+            excel_row = row_idx + 2
+            cell_str = cell_text(cell_value)
+
+            if not cell_str.strip():
+                # Empty cell
+                builder.append(col_idx, excel_row, cell_str, NO_LINE, 0, EMPTY)
+                continue
+
+            # Find best matching line in PDF (once per distinct value)
+            scored_cells += 1
+            cell_lower = cell_str.lower()
+            best = best_by_value.get(cell_lower)
+            if best is None:
+                known = known_scores.get(cell_lower)
+                if known is None:
+                    known = line_index.best_match_id(cell_lower)
+                    scored_values += 1
+                line_id, similarity = known
+                best = best_by_value[cell_lower] = (
+                    NO_LINE if line_id is None else line_id, similarity, status_code_for(similarity)
+                )
+            builder.append(col_idx, excel_row, cell_str, *best)
+
+    if stats is not None:
+        stats.update({
+            'total_cells': total_cells,
+            'scored_cells': scored_cells,
+            'distinct_values': len(best_by_value),
+            'scored_values': scored_values,
+        })
+    return builder.build(excel_df.columns, pdf_lines)
+
+def cell_fingerprints(excel_df):
+    """हर cell का fingerprint: ``(column, excel_row) -> value text``"""
+    return {
+        (column, row_idx + 2): cell_str
+        for column in excel_df.columns
+        for row_idx, cell_str in enumerate(map(cell_text, excel_df[column]))
+    }
+
+class ComparisonSnapshot:
+    """Previous run: PDF content hash, per-cell fingerprints and scores
+
+    ``scores`` is ``ComparisonResults.scores()`` of that run.
+    ``report_bytes`` is the saved highlighted workbook of that run when it
+    was written in memory, so a re-upload can patch a copy of it instead of
+    rebuilding. A snapshot is never modified by later runs.
+    """
+
+    def __init__(self, pdf_key, pdf_lines, line_index, fingerprints, scores, report_bytes=None):
+        self.pdf_key = pdf_key
+        self.pdf_lines = pdf_lines
+        self.line_index = line_index
+        self.fingerprints = fingerprints
+        self.scores = scores
+        self.report_bytes = report_bytes
+
+def compare_cells_incremental(excel_df, pdf_lines, pdf_key, previous=None, progress_callback=None,
+                              line_index=None, stats=None, scorer='index', check_cancelled=None):
+    """Previous run से diff करके सिर्फ changed/new cells re-score करो
+
+    When ``previous`` (a ``ComparisonSnapshot``) was run against the same
+    PDF, unchanged cells reuse its scores and only changed or new values
+    are scored. Returns ``(comparison_results, snapshot, changes)``;
+    ``changes`` is ``(changed_cells, removed_cells)`` as sets of
+    ``(column, excel_row)``, or None when nothing could be reused. ``stats``
+    additionally gets reused/recomputed/removed cell counts.
+    """
+    fingerprints = cell_fingerprints(excel_df)
+    if previous is not None and previous.pdf_key == pdf_key:
+        old = previous.fingerprints
+        changed = {cell for cell, value in fingerprints.items() if old.get(cell) != value}
+        removed = old.keys() - fingerprints.keys()
+        changes = (changed, removed)
+        known_scores = previous.scores
+    else:
+        changes = None
+        known_scores = None
+
+    if line_index is None:
+        line_index = PdfLineIndex(pdf_lines)
+    comparison_results = compare_cells(
+        excel_df, pdf_lines, progress_callback, line_index=line_index, stats=stats,
+        scorer=scorer, known_scores=known_scores, check_cancelled=check_cancelled
+    )
+
+    if stats is not None:
+        recomputed = len(changes[0]) if changes else len(fingerprints)
+        stats.update({
+            'incremental': changes is not None,
+            'reused_cells': len(fingerprints) - recomputed,
+            'recomputed_cells': recomputed,
+            'removed_cells': len(changes[1]) if changes else 0,
+        })
+    snapshot = ComparisonSnapshot(pdf_key, pdf_lines, line_index, fingerprints,
+                                  comparison_results.scores())
+    return comparison_results, snapshot, changes
+
+def summarize_results(comparison_results):
+    """Match status counts और overall accuracy निकालो"""
+    total_checks = len(comparison_results)
+    counts = comparison_results.status_counts()
+
+    perfect_matches = counts['✅ Perfect Match']
+    partial_matches = counts['⚠️ Partial Match']
+    accuracy = (perfect_matches + partial_matches * 0.5) / total_checks * 100 if total_checks > 0 else 0
+
+    return {
+        'total_checks': total_checks,
+        'perfect_matches': perfect_matches,
+        'partial_matches': partial_matches,
+        'no_matches': counts['❌ No Match'],
+        'empty_cells': counts['⚪ Empty'],
+        'accuracy': accuracy,
+    }
+
+def compare_uploads(pdf_file, excel_file, workers=1, cache=None, scorer='index', report_mode='in_memory',
+                    previous=None, perf=None, progress_callback=None, on_stage=None, on_error=None,
+                    check_cancelled=None):
+    """Uploaded PDF/Excel file objects पर पूरा pipeline चलाओ (web app path)
+
+    Reuses ``previous`` (a ``ComparisonSnapshot``) when the PDF is the same:
+    its lines and index are taken over, only changed cells are re-scored
+    and, for the in-memory writer, its highlighted workbook is patched.
+    ``on_stage(name)`` is called before each stage and ``on_error`` gets
+    PDF extraction errors. ``check_cancelled`` (e.g. ``Job.check_cancelled``)
+    is called between PDF pages/page ranges and scoring blocks and stops
+    the run by raising. Raises ``ValueError`` when the PDF has no lines
+    or the sheet is empty. Returns a dict with ``pdf_lines``, ``excel_df``,
+    ``comparison_results``, ``match_stats``, ``snapshot`` and
+    ``highlighted_excel``.
+    """
+    if perf is None:
+        perf = PerfRecorder()
+    stage = on_stage or (lambda name: None)
+    pdf_file.seek(0)
+    excel_file.seek(0)
+
+    # Same PDF as the previous run? Reuse its lines and index
+    stage("Hashing PDF")
+    with perf.stage("pdf_hash"):
+        pdf_key = pdf_cache_key(pdf_file)
+    line_index = None
+    stage("Extracting lines from PDF")
+    if previous is not None and previous.pdf_key == pdf_key:
+        pdf_lines, line_index = previous.pdf_lines, previous.line_index
+    # Extract PDF lines (cached by PDF content hash)
+    elif cache is not None:
+        pdf_lines, line_index = cached_extract_pdf_lines(
+            pdf_file, cache, on_error=on_error, workers=workers, perf=perf, key=pdf_key,
+            check_cancelled=check_cancelled
+        )
+    else:
+        pdf_lines = extract_pdf_lines(pdf_file, on_error=on_error, workers=workers, perf=perf,
+                                      check_cancelled=check_cancelled)
+    if not pdf_lines:
+        raise ValueError("No lines found in PDF! Please check the PDF file.")
+
+    # Read Excel once (values for matching + workbook for highlighting)
+    stage("Reading Excel")
+    with perf.stage("excel_ingest") as counts:
+        excel_source = load_excel(excel_file)
+        excel_df = excel_source.df
+        counts.update(rows=int(excel_df.shape[0]), cells=int(excel_df.size))
+    if excel_df.empty:
+        raise ValueError("Excel file is empty!")
+
+    if line_index is None:
+        stage("Indexing PDF lines")
+        with perf.stage("build_index", lines=len(pdf_lines)):
+            line_index = PdfLineIndex(pdf_lines)
+
+    stage("Comparing cells")
+    match_stats = {}
+    with perf.stage("match", scorer=scorer) as counts:
+        comparison_results, snapshot, changes = compare_cells_incremental(
+            excel_df, pdf_lines, pdf_key, previous, progress_callback,
+            line_index=line_index, stats=match_stats, scorer=scorer, check_cancelled=check_cancelled
+        )
+        counts.update(match_stats)
+
+    # Create highlighted Excel (patch the previous one when only some cells changed)
+    stage("Writing highlighted workbook")
+    with perf.stage("report_write", mode=report_mode, results=len(comparison_results)) as counts:
+        report_wb = None
+        if report_mode == 'in_memory' and changes is not None and previous.report_bytes is not None:
+            # Patch a private copy; the previous snapshot's report stays as it was
+            report_wb = load_report_workbook(previous.report_bytes)
+            if not can_patch_report(report_wb, excel_source):
+                report_wb = None
+        patch = report_wb is not None
+        counts['patched'] = patch
+        if patch:
+            highlighted_excel = patch_highlighted_excel(
+                report_wb, excel_source, comparison_results, *changes, pdf_lines[:50]
+            )
+        else:
+            highlighted_excel = write_highlighted_report(
+                excel_source, comparison_results, pdf_lines[:50], mode=report_mode
+            )
+        if report_mode == 'in_memory':
+            snapshot.report_bytes = highlighted_excel.getvalue()
+    match_stats['report_patched'] = patch
+
+    return {
+        'pdf_lines': pdf_lines,
+        'excel_df': excel_df,
+        'comparison_results': comparison_results,
+        'match_stats': match_stats,
+        'snapshot': snapshot,
+        'highlighted_excel': highlighted_excel,
+    }
+
+def compare_files(pdf_path, excel_path, output_path, workers=1, cache=None, scorer='index',
+                  report_mode='in_memory', perf=None, export_formats=(), export_prefix=None):
+    """PDF और Excel files को compare करके highlighted workbook लिखो
+
+    ``cache`` is an optional ``pdf_cache.PdfLineCache``. Per-stage timings
+    are recorded into ``perf`` (an ``instrumentation.PerfRecorder``, one is
+    created when not given) and included in the returned JSON-serialisable
+    run summary. For each of ``export_formats`` the full results and PDF
+    line table are also written to ``{export_prefix}.results.<fmt>`` and
+    ``{export_prefix}.pdf_lines.<fmt>`` (prefix defaults to the output path
+    without its extension).
+    """
+    if report_mode not in REPORT_MODES:
+        raise ValueError(f"Unknown report mode {report_mode!r}, expected one of {REPORT_MODES}")
+    unknown = set(export_formats) - set(EXPORT_FORMATS)
+    if unknown:
+        raise ValueError(f"Unknown export format(s) {', '.join(sorted(unknown))}, expected {EXPORT_FORMATS}")
+    if perf is None:
+        perf = PerfRecorder()
+    start = time.perf_counter()
+
+    line_index = None
+    with open(pdf_path, 'rb') as pdf_file:
+        if cache is not None:
+            pdf_lines, line_index = cached_extract_pdf_lines(pdf_file, cache, workers=workers,
+                                                             perf=perf)
+        else:
+            pdf_lines = extract_pdf_lines(pdf_file, workers=workers, perf=perf)
+    if not pdf_lines:
+        raise ValueError(f"No lines found in PDF: {pdf_path}")
+
+    with perf.stage("excel_ingest") as counts:
+        with open(excel_path, 'rb') as excel_file:
+            excel_source = load_excel(excel_file)
+        excel_df = excel_source.df
+        counts.update(rows=int(excel_df.shape[0]), cells=int(excel_df.size))
+    if excel_df.empty:
+        raise ValueError(f"Excel file is empty: {excel_path}")
+
+    if line_index is None:
+        with perf.stage("build_index", lines=len(pdf_lines)):
+            line_index = PdfLineIndex(pdf_lines)
+
+    match_stats = {}
+    with perf.stage("match", scorer=scorer) as counts:
+        comparison_results = compare_cells(
+            excel_df, pdf_lines, line_index=line_index, stats=match_stats, scorer=scorer
+        )
+        counts.update(match_stats)
+
+    with perf.stage("report_write", mode=report_mode, results=len(comparison_results)):
+        if report_mode == 'streaming':
+            write_highlighted_excel_streaming(
+                excel_source,
+                comparison_results,
+                pdf_lines[:50],
+                output=output_path
+            )
+        else:
+            highlighted_excel = create_highlighted_excel_line_compare(
+                excel_source,
+                comparison_results,
+                pdf_lines[:50]
+            )
+            with open(output_path, 'wb') as output_file:
+                output_file.write(highlighted_excel.getbuffer())
+
+    exports = []
+    if export_formats:
+        with perf.stage("export", formats=",".join(export_formats), results=len(comparison_results)):
+            exports = export_comparison(
+                comparison_results, pdf_lines,
+                export_prefix or os.path.splitext(output_path)[0], export_formats
+            )
+
+    summary = summarize_results(comparison_results)
+    summary.update({
+        'pdf_file': str(pdf_path),
+        'excel_file': str(excel_path),
+        'output_file': str(output_path),
+        'pdf_lines': len(pdf_lines),
+        'excel_rows': int(excel_df.shape[0]),
+        'workers': workers,
+        'scorer': scorer,
+        'report_mode': report_mode,
+        'match_stats': match_stats,
+        'cache': cache.stats() if cache is not None else None,
+        'exports': exports,
+        'imports': import_timings(),
+        'performance': perf.to_dict(),
+        'elapsed_seconds': round(time.perf_counter() - start, 3),
+    })
+    return summary
+
+def compare_excel_to_store(store, excel_path, output_path, candidate_limit=None, report_mode='in_memory',
+                           perf=None):
+    """Excel file को ``line_store.PdfLineStore`` की सभी lines से compare करो
+
+    Like ``compare_files``, but best lines come from the store's FTS5
+    candidates (``StoreMatcher``) instead of one extracted PDF. Only the
+    matched lines are loaded; the report's PDF line sample is the first
+    50 of them. Returns the run summary.
+    """
+    if report_mode not in REPORT_MODES:
+        raise ValueError(f"Unknown report mode {report_mode!r}, expected one of {REPORT_MODES}")
+    if perf is None:
+        perf = PerfRecorder()
+    start = time.perf_counter()
+    store_stats = store.stats()
+    if not store_stats['lines']:
+        raise ValueError(f"Line store {store.db_path} has no lines")
+
+    with perf.stage("excel_ingest") as counts:
+        with open(excel_path, 'rb') as excel_file:
+            excel_source = load_excel(excel_file)
+        excel_df = excel_source.df
+        counts.update(rows=int(excel_df.shape[0]), cells=int(excel_df.size))
+    if excel_df.empty:
+        raise ValueError(f"Excel file is empty: {excel_path}")
+
+    matcher = store.matcher(candidate_limit)
+    match_stats = {}
+    with perf.stage("match", scorer='line_store') as counts:
+        comparison_results = compare_cells(
+            excel_df, matcher.pdf_lines, line_index=matcher, stats=match_stats
+        )
+        match_stats.update(store_queries=matcher.queries, store_candidates=matcher.candidates,
+                           matched_lines=len(matcher.pdf_lines))
+        counts.update(match_stats)
+
+    with perf.stage("report_write", mode=report_mode, results=len(comparison_results)):
+        if report_mode == 'streaming':
+            write_highlighted_excel_streaming(
+                excel_source, comparison_results, matcher.pdf_lines[:50], output=output_path
+            )
+        else:
+            highlighted_excel = create_highlighted_excel_line_compare(
+                excel_source, comparison_results, matcher.pdf_lines[:50]
+            )
+            with open(output_path, 'wb') as output_file:
+                output_file.write(highlighted_excel.getbuffer())
+
+    summary = summarize_results(comparison_results)
+    summary.update({
+        'line_store': str(store.db_path),
+        'excel_file': str(excel_path),
+        'output_file': str(output_path),
+        'store_documents': store_stats['documents'],
+        'store_lines': store_stats['lines'],
+        'excel_rows': int(excel_df.shape[0]),
+        'candidate_limit': candidate_limit,
+        'report_mode': report_mode,
+        'match_stats': match_stats,
+        'performance': perf.to_dict(),
+        'elapsed_seconds': round(time.perf_counter() - start, 3),
+    })
+    return summary
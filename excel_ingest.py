@@ -0,0 +1,78 @@
+"""Single-parse Excel ingestion shared by the matcher and the report writer
+
+An upload is parsed into an ``ExcelSource``: the DataFrame the matcher
+scores and the openpyxl workbook (plus header -> column map) the
+highlighter writes into. The workbook keeps its formulas, so the report
+does too; the DataFrame needs the values Excel cached for them, which
+takes a second, values-only parse - only done when the compared sheet
+actually has formulas. openpyxl is imported on first use.
+"""
+import pandas as pd
+
+from instrumentation import lazy_import
+
+
+class ExcelSource:
+    """Parsed Excel file - matcher के लिए ``df``, highlighter के लिए ``wb``"""
+
+    def __init__(self, name, df, wb):
+        self.name = name
+        self.df = df
+        self.wb = wb
+        self.ws = wb.worksheets[0]
+        # Map column names to indices (header row)
+        self.col_map = {}
+        for idx, cell in enumerate(self.ws[1], 1):
+            self.col_map[cell.value] = idx
+
+
+def _workbook_from_df(df):
+    """.xls DataFrame से openpyxl workbook बनाओ (row-wise bulk append)"""
+    openpyxl = lazy_import("openpyxl")
+    styles = lazy_import("openpyxl.styles")
+    wb = openpyxl.Workbook()
+    ws = wb.active
+
+    # Write headers
+    ws.append(list(df.columns))
+    header_font = styles.Font(bold=True)
+    header_alignment = styles.Alignment(horizontal='center')
+    for cell in ws[1]:
+        cell.font = header_font
+        cell.alignment = header_alignment
+
+    # Write data, one append per row instead of one ws.cell() per value
+    rows = df.astype(object).where(df.notna(), None).to_numpy().tolist()
+    for row in rows:
+        ws.append(row)
+    return wb
+
+
+def _has_formulas(ws):
+    return any(cell.data_type == 'f' for row in ws.iter_rows() for cell in row)
+
+
+def load_excel(excel_file):
+    """Excel upload parse करो (formulas report के लिए, values matching के लिए)
+
+    ``.xlsx`` files are loaded with openpyxl keeping formulas. Without
+    formulas on the compared sheet the DataFrame is read from that same
+    workbook; otherwise from a second, ``data_only`` load (cached formula
+    values). ``.xls`` files are read once with pandas and converted to an
+    openpyxl workbook in bulk.
+    """
+    name = getattr(excel_file, 'name', '')
+    if name.endswith('.xlsx'):
+        openpyxl = lazy_import("openpyxl")
+        start = excel_file.tell() if hasattr(excel_file, 'seek') else None
+        wb = openpyxl.load_workbook(excel_file)
+        values_wb = wb
+        if _has_formulas(wb.worksheets[0]):
+            if start is not None:
+                excel_file.seek(start)
+            values_wb = openpyxl.load_workbook(excel_file, data_only=True)
+        df = pd.read_excel(values_wb, engine='openpyxl')
+    else:
+        df = pd.read_excel(excel_file)
+        wb = _workbook_from_df(df)
+    return ExcelSource(name, df, wb)
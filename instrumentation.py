@@ -0,0 +1,280 @@
+"""Per-stage timing, memory and item-count instrumentation for the pipeline
+
+``PerfRecorder.stage()`` wraps one pipeline stage and records wall time,
+CPU time, peak memory and whatever item counts the stage reports.
+``ProfileCapture`` is the opt-in cProfile + tracemalloc capture of a whole
+run. ``lazy_import`` loads heavy libraries on first use and keeps their
+import times for the startup report.
+"""
+import cProfile
+import importlib
+import io
+import json
+import marshal
+import pstats
+import resource
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+
+
+def _proc_status_kb(field):
+    try:
+        with open('/proc/self/status') as status:
+            for line in status:
+                if line.startswith(field):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def reset_peak_rss():
+    """Process का peak RSS reset करो (Linux only); True if it worked"""
+    try:
+        with open('/proc/self/clear_refs', 'w') as clear_refs:
+            clear_refs.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def current_rss_kb():
+    return _proc_status_kb('VmRSS:') or 0
+
+
+def peak_rss_kb():
+    peak = _proc_status_kb('VmHWM:')
+    if peak is not None:
+        return peak
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS reports bytes, Linux kilobytes
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+
+# Stages currently running in any thread; peaks are process-wide, so a stage
+# overlapping another thread's stage can't have its own peak measured
+_stages_lock = threading.Lock()
+_active_stages = []
+
+
+def _enter_stage():
+    """Stage register करो; ``(token, alone)`` लौटाओ"""
+    thread_id = threading.get_ident()
+    token = {'thread': thread_id, 'concurrent': False}
+    with _stages_lock:
+        for other in _active_stages:
+            if other['thread'] != thread_id:
+                other['concurrent'] = token['concurrent'] = True
+        _active_stages.append(token)
+    return token, not token['concurrent']
+
+
+def _exit_stage(token):
+    with _stages_lock:
+        _active_stages.remove(token)
+    return token['concurrent']
+
+
+class PerfRecorder:
+    """Pipeline stages के measurements (wall/CPU time, peak memory, counts)
+
+    Peak RSS (where the platform allows resetting it) and, when tracemalloc
+    is running (see ``ProfileCapture``), the Python-heap peak are measured
+    per stage. Both peaks are process-wide, so they are only reset and
+    reported for stages that ran while no other thread (another job) was
+    inside a stage; overlapping stages get ``concurrent: True`` instead.
+    """
+
+    def __init__(self):
+        self.stages = []
+
+    @contextmanager
+    def stage(self, name, **counts):
+        """Stage को measure करो; yielded dict में counts add कर सकते हैं"""
+        record = {'stage': name}
+        stage_counts = dict(counts)
+        token, alone = _enter_stage()
+        # Resetting the peaks mid-way through another job's stage would
+        # under-report it, so only a stage running alone resets them
+        rss_local = alone and reset_peak_rss()
+        rss_start = current_rss_kb()
+        tracing = alone and tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.reset_peak()
+            heap_start = tracemalloc.get_traced_memory()[0]
+        cpu_start = time.process_time()
+        wall_start = time.perf_counter()
+        try:
+            yield stage_counts
+        except BaseException as e:
+            record['error'] = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            record['wall_seconds'] = round(time.perf_counter() - wall_start, 6)
+            record['cpu_seconds'] = round(time.process_time() - cpu_start, 6)
+            if _exit_stage(token):
+                record['concurrent'] = True
+            else:
+                record['peak_rss_mb'] = round(peak_rss_kb() / 1024, 1)
+                if rss_local:
+                    record['peak_rss_delta_mb'] = round((peak_rss_kb() - rss_start) / 1024, 1)
+                if tracing:
+                    record['peak_heap_delta_mb'] = round(
+                        (tracemalloc.get_traced_memory()[1] - heap_start) / 1024 / 1024, 2
+                    )
+            record['counts'] = stage_counts
+            self.stages.append(record)
+
+    def add(self, name, wall_seconds, cpu_seconds=None, **counts):
+        """Already-measured (e.g. accumulated) time को stage की तरह जोड़ो"""
+        record = {'stage': name, 'wall_seconds': round(wall_seconds, 6)}
+        if cpu_seconds is not None:
+            record['cpu_seconds'] = round(cpu_seconds, 6)
+        record['counts'] = counts
+        self.stages.append(record)
+
+    def total_wall_seconds(self):
+        return sum(record['wall_seconds'] for record in self.stages)
+
+    def to_dict(self):
+        return {
+            'stages': list(self.stages),
+            'total_wall_seconds': round(self.total_wall_seconds(), 6),
+        }
+
+    def to_json(self):
+        return json.dumps(self.to_dict(), indent=2, ensure_ascii=False)
+
+    def table_rows(self):
+        """Display के लिए flat rows (counts एक string में)"""
+        rows = []
+        for record in self.stages:
+            rows.append({
+                'stage': record['stage'],
+                'wall_s': record['wall_seconds'],
+                'cpu_s': record.get('cpu_seconds'),
+                'peak_rss_mb': record.get('peak_rss_mb'),
+                'rss_delta_mb': record.get('peak_rss_delta_mb'),
+                'heap_delta_mb': record.get('peak_heap_delta_mb'),
+                'concurrent': record.get('concurrent', False),
+                'counts': ", ".join(f"{k}={v}" for k, v in record['counts'].items()),
+                'error': record.get('error', ''),
+            })
+        return rows
+
+
+def perf_stage(perf, name, **counts):
+    """``perf`` None हो तो no-op stage (yields a throwaway counts dict)"""
+    if perf is None:
+        return nullcontext(dict(counts))
+    return perf.stage(name, **counts)
+
+
+# module name -> seconds its first import took in this process
+_import_seconds = {}
+
+
+def lazy_import(module_name):
+    """Module को पहली ज़रूरत पर import करो; import time record होता है"""
+    # Always go through the import system: a module another thread (the
+    # warm-up) is still importing is already in sys.modules, half initialized
+    loaded = module_name in sys.modules
+    start = time.perf_counter()
+    module = importlib.import_module(module_name)
+    if not loaded:
+        _import_seconds.setdefault(module_name, time.perf_counter() - start)
+    return module
+
+
+def record_import_time(name, seconds):
+    """Already-measured import (e.g. app startup) record करो; पहला measurement रहता है"""
+    _import_seconds.setdefault(name, seconds)
+
+
+def import_timings():
+    """``{module: seconds}`` of the imports measured so far in this process"""
+    return {name: round(seconds, 6) for name, seconds in _import_seconds.items()}
+
+
+# tracemalloc is process-wide: captures running at the same time (concurrent
+# jobs) share one trace, started by the first and stopped by the last
+_tracemalloc_lock = threading.Lock()
+_tracemalloc_users = 0
+_tracemalloc_owned = False
+
+
+def _acquire_tracemalloc():
+    global _tracemalloc_users, _tracemalloc_owned
+    with _tracemalloc_lock:
+        if _tracemalloc_users == 0:
+            # Tracing started elsewhere (e.g. PYTHONTRACEMALLOC) is left running
+            _tracemalloc_owned = not tracemalloc.is_tracing()
+            if _tracemalloc_owned:
+                tracemalloc.start()
+        _tracemalloc_users += 1
+
+
+def _release_tracemalloc():
+    global _tracemalloc_users
+    with _tracemalloc_lock:
+        _tracemalloc_users -= 1
+        if _tracemalloc_users == 0 and _tracemalloc_owned:
+            tracemalloc.stop()
+
+
+class ProfileCapture:
+    """Opt-in cProfile + tracemalloc capture of a whole run
+
+    Several captures may run at once in different threads; the snapshot
+    then also holds the other runs' live allocations. On Python 3.12+ only
+    one cProfile can be active per process, so an overlapping capture
+    skips cProfile and keeps only the tracemalloc part.
+    """
+
+    def __init__(self, top=40):
+        self.top = top
+        self.profile = None
+        self.snapshot = None
+
+    def __enter__(self):
+        _acquire_tracemalloc()
+        self.profile = cProfile.Profile()
+        try:
+            self.profile.enable()
+        except ValueError:
+            # "Another profiling tool is already active" (3.12+)
+            self.profile = None
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.profile is not None:
+            self.profile.disable()
+        try:
+            # Still counted as a user here, so nobody can stop the trace yet
+            self.snapshot = tracemalloc.take_snapshot()
+        finally:
+            _release_tracemalloc()
+        return False
+
+    def prof_bytes(self):
+        """Raw ``.prof`` file (pstats / snakeviz compatible)"""
+        if self.profile is None:
+            return marshal.dumps({})
+        self.profile.create_stats()
+        return marshal.dumps(self.profile.stats)
+
+    def text_report(self):
+        """cProfile top functions + tracemalloc top allocations as text"""
+        out = io.StringIO()
+        out.write(f"=== cProfile: top {self.top} by cumulative time ===\n")
+        if self.profile is None:
+            out.write("Skipped: another run in this process was already being profiled\n")
+        else:
+            pstats.Stats(self.profile, stream=out).sort_stats('cumulative').print_stats(self.top)
+        out.write(f"\n=== tracemalloc: top {self.top} allocation sites (live at end of run) ===\n")
+        for stat in self.snapshot.statistics('lineno')[:self.top]:
+            out.write(f"{stat}\n")
+        return out.getvalue()
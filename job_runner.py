@@ -0,0 +1,192 @@
+"""Background comparison jobs: thread pool, in-process job store, cancellation
+
+A ``JobStore`` runs job functions on a small thread pool so a long
+comparison never blocks the Streamlit script thread. Each ``Job`` carries
+its state, current stage and cell progress; the UI polls ``snapshot()``
+instead of receiving a message per cell. ``ThrottledProgress`` is the
+``progress_callback`` that publishes at most every ``interval`` seconds
+and stops the job once cancellation was requested. Jobs live in the
+store until they are released or expire, so a session can reattach to a
+running job by id (e.g. after a page reload).
+"""
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from cancellation import JobCancelled
+
+logger = logging.getLogger(__name__)
+
+JOB_STATES = ('queued', 'running', 'done', 'failed', 'cancelled')
+FINISHED_STATES = ('done', 'failed', 'cancelled')
+
+# Seconds between published progress updates
+DEFAULT_PROGRESS_INTERVAL = 0.5
+
+
+class Job:
+    """एक background job का state (thread-safe updates)"""
+
+    def __init__(self, label=""):
+        self.id = uuid.uuid4().hex[:12]
+        self.label = label
+        self.state = 'queued'
+        self.stage = "Queued"
+        self.processed = 0
+        self.total = 0
+        self.messages = []
+        self.result = None
+        self.error = None
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self._cancel = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def cancel_requested(self):
+        return self._cancel.is_set()
+
+    def cancel(self):
+        self._cancel.set()
+
+    def check_cancelled(self):
+        if self._cancel.is_set():
+            raise JobCancelled()
+
+    def set_stage(self, stage):
+        """नया stage publish करो; cancel हुआ हो तो यहीं रुक जाओ"""
+        self.check_cancelled()
+        with self._lock:
+            self.stage = stage
+            self.processed = 0
+            self.total = 0
+
+    def set_progress(self, processed, total):
+        with self._lock:
+            self.processed = processed
+            self.total = total
+
+    def warn(self, message):
+        with self._lock:
+            self.messages.append(message)
+
+    @property
+    def finished_state(self):
+        return self.state in FINISHED_STATES
+
+    def snapshot(self):
+        """UI के लिए consistent copy (dict)"""
+        with self._lock:
+            now = self.finished or time.time()
+            return {
+                'id': self.id,
+                'label': self.label,
+                'state': self.state,
+                'stage': self.stage,
+                'processed': self.processed,
+                'total': self.total,
+                'messages': list(self.messages),
+                'error': self.error,
+                'cancel_requested': self._cancel.is_set(),
+                'elapsed_seconds': now - self.started if self.started else 0.0,
+            }
+
+
+class ThrottledProgress:
+    """``progress_callback(processed, total)`` जो time-based cadence पर publish करे
+
+    Every call checks for cancellation (a cheap flag test); the job's
+    progress is only updated when ``interval`` seconds have passed or the
+    last cell is reached. ``calls``, ``published`` and ``wall_seconds``
+    (time spent inside the callback) feed the performance report.
+    """
+
+    def __init__(self, job, interval=DEFAULT_PROGRESS_INTERVAL):
+        self.job = job
+        self.interval = interval
+        self.calls = 0
+        self.published = 0
+        self.wall_seconds = 0.0
+        self._last = 0.0
+
+    def __call__(self, processed, total):
+        start = time.perf_counter()
+        self.calls += 1
+        self.job.check_cancelled()
+        if processed == total or start - self._last >= self.interval:
+            self._last = start
+            self.published += 1
+            self.job.set_progress(processed, total)
+        self.wall_seconds += time.perf_counter() - start
+
+
+class JobStore:
+    """Jobs को thread pool पर चलाओ और id से ढूंढने लायक रखो
+
+    Finished jobs are dropped ``keep_seconds`` after they end (or as soon
+    as ``release`` is called), which also frees their results.
+    """
+
+    def __init__(self, max_workers=2, keep_seconds=3600):
+        self.keep_seconds = keep_seconds
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="compare-job")
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, fn, label=""):
+        """``fn(job)`` को background में चलाओ; ``Job`` तुरंत लौटता है"""
+        self.prune()
+        job = Job(label)
+        with self._lock:
+            self._jobs[job.id] = job
+        self._executor.submit(self._run, job, fn)
+        return job
+
+    def _run(self, job, fn):
+        if job.cancel_requested:
+            job.state = 'cancelled'
+            job.finished = time.time()
+            return
+        job.state = 'running'
+        job.started = time.time()
+        try:
+            job.result = fn(job)
+            job.state = 'done'
+        except JobCancelled:
+            job.state = 'cancelled'
+        except Exception as e:
+            logger.exception("Job %s failed", job.id)
+            job.error = str(e)
+            job.state = 'failed'
+        finally:
+            job.finished = time.time()
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id):
+        job = self.get(job_id)
+        if job is not None:
+            job.cancel()
+        return job
+
+    def release(self, job_id):
+        """Job (और उसका result) store से हटाओ"""
+        with self._lock:
+            return self._jobs.pop(job_id, None)
+
+    def jobs(self):
+        with self._lock:
+            return list(self._jobs.values())
+
+    def prune(self):
+        """Expired finished jobs हटाओ"""
+        cutoff = time.time() - self.keep_seconds
+        with self._lock:
+            for job_id, job in list(self._jobs.items()):
+                if job.finished_state and job.finished and job.finished < cutoff:
+                    del self._jobs[job_id]
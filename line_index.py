@@ -0,0 +1,82 @@
+"""Token index over extracted PDF lines for fast best-line lookup"""
+from typed_values import cell_value_key, line_value_keys
+
+
+class PdfLineIndex:
+    """PDF lines का index - exact match map + typed value map + token posting lists"""
+
+    def __init__(self, pdf_lines):
+        self.pdf_lines = pdf_lines
+        self.exact = {}
+        # Canonical number/amount/date key -> first line containing it
+        self.typed = {}
+        self.token_ids = {}
+        self.line_words = []
+        self.postings = []
+
+        for line_id, pdf_line in enumerate(pdf_lines):
+            line_lower = pdf_line.lower_line
+            # First occurrence wins, same as the old linear scan
+            self.exact.setdefault(line_lower, line_id)
+            for value_key in line_value_keys(line_lower):
+                self.typed.setdefault(value_key, line_id)
+
+            word_ids = set()
+            for word in line_lower.split():
+                token_id = self.token_ids.get(word)
+                if token_id is None:
+                    token_id = len(self.postings)
+                    self.token_ids[word] = token_id
+                    self.postings.append([])
+                if token_id not in word_ids:
+                    word_ids.add(token_id)
+                    self.postings[token_id].append(line_id)
+            self.line_words.append(frozenset(word_ids))
+
+    def best_match(self, cell_lower):
+        """Return (pdf_line, similarity) for the best matching line, or (None, 0)"""
+        line_id, similarity = self.best_match_id(cell_lower)
+        if line_id is None:
+            return None, similarity
+        return self.pdf_lines[line_id], similarity
+
+    def typed_match_id(self, cell_lower):
+        """Cell एक number/amount/date हो तो उस value वाली पहली line, वरना None"""
+        value_key = cell_value_key(cell_lower)
+        if value_key is None:
+            return None
+        return self.typed.get(value_key)
+
+    def best_match_id(self, cell_lower):
+        """``best_match`` जैसा, पर line की जगह उसका index (line_id) लौटाओ
+
+        An exact line match wins, then a typed value found in a line
+        (``1250.0`` matches ``1,250.00``) counts as 100%, and only then
+        are lines scored by word overlap.
+        """
+        line_id = self.exact.get(cell_lower)
+        if line_id is None:
+            line_id = self.typed_match_id(cell_lower)
+        if line_id is not None:
+            return line_id, 100
+
+        cell_words = set(cell_lower.split())
+        if not cell_words:
+            return None, 0
+
+        # Only lines sharing at least one token with the cell are scored
+        overlap = {}
+        for word in cell_words:
+            token_id = self.token_ids.get(word)
+            if token_id is None:
+                continue
+            for line_id in self.postings[token_id]:
+                overlap[line_id] = overlap.get(line_id, 0) + 1
+
+        if not overlap:
+            return None, 0
+
+        # Highest overlap wins; ties go to the earliest line like the old loop
+        best_id = min(overlap, key=lambda line_id: (-overlap[line_id], line_id))
+        similarity = overlap[best_id] / len(cell_words) * 100
+        return best_id, similarity
@@ -0,0 +1,352 @@
+"""Persistent SQLite line store for comparing against a library of PDFs
+
+Usage::
+
+    python line_store.py contracts.db ingest contracts/2024/*.pdf
+    python line_store.py contracts.db list
+    python line_store.py contracts.db compare ledger.xlsx LINE_COMPARE_ledger.xlsx
+
+Lines of every ingested PDF are kept in one SQLite database, keyed by
+document, page and line number, with an FTS5 index over ``clean_line``
+and a table of the typed values (numbers, amounts, dates) in each line.
+Instead of loading all lines into a ``PdfLineIndex``, ``StoreMatcher``
+asks FTS5 for the lines sharing a word with a cell and re-scores those
+candidates with the usual word-overlap rule, so memory stays flat no
+matter how many lines are stored. PDFs are identified by content hash
+and ingesting the same PDF twice is a no-op.
+"""
+import argparse
+import json
+import logging
+import os
+import sqlite3
+import sys
+import time
+
+from compare_engine import compare_excel_to_store
+from pdf_cache import pdf_cache_key
+from pdf_extract import PdfLine, iter_pdf_lines
+from report_writer import REPORT_MODES
+from typed_values import cell_value_key, line_value_keys
+
+logger = logging.getLogger(__name__)
+
+# Bump when the table layout or the stored value keys change
+SCHEMA_VERSION = 3
+
+# Lines inserted per executemany() batch during ingest
+INSERT_BATCH_SIZE = 10000
+
+# Best-ranked FTS candidates re-scored per cell (None = every candidate)
+DEFAULT_CANDIDATE_LIMIT = 2000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    doc_id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    pdf_key TEXT NOT NULL UNIQUE,
+    line_count INTEGER NOT NULL DEFAULT 0,
+    added REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS lines (
+    line_id INTEGER PRIMARY KEY,
+    doc_id INTEGER NOT NULL REFERENCES documents(doc_id),
+    page INTEGER NOT NULL,
+    line_num INTEGER NOT NULL,
+    clean_line TEXT NOT NULL,
+    lower_line TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS lines_lower ON lines(lower_line);
+CREATE INDEX IF NOT EXISTS lines_doc ON lines(doc_id);
+CREATE TABLE IF NOT EXISTS line_values (
+    value_key TEXT NOT NULL,
+    line_id INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS line_values_key ON line_values(value_key, line_id);
+CREATE VIRTUAL TABLE IF NOT EXISTS lines_fts USING fts5(
+    clean_line, content='lines', content_rowid='line_id'
+);
+"""
+
+
+class StoredPdfLine(PdfLine):
+    """Store से आई PdfLine, साथ में document का नाम"""
+
+    __slots__ = ('document',)
+
+    def __init__(self, document, page, line_num, clean_line):
+        super().__init__(page, line_num, clean_line, clean_line)
+        self.document = document
+
+    def to_dict(self):
+        record = super().to_dict()
+        record['document'] = self.document
+        return record
+
+
+def fts_query(words):
+    """Cell words की FTS5 query: हर word एक quoted phrase, OR से जुड़े
+
+    FTS5 splits a whitespace word like ``1,250.00`` into several tokens;
+    quoting keeps them as one phrase, so every line that contains the word
+    is a candidate. Words without letters or digits give an empty phrase
+    and match nothing.
+    """
+    return " OR ".join('"' + word.replace('"', '""') + '"' for word in sorted(words))
+
+
+class PdfLineStore:
+    """SQLite database of PDF lines (documents + lines + FTS5 index)"""
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path)
+        self.conn.executescript(SCHEMA)
+        version = self.conn.execute("PRAGMA user_version").fetchone()[0]
+        if version == 0:
+            self.conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        elif version != SCHEMA_VERSION:
+            raise ValueError(f"Line store {db_path} has schema version {version}, "
+                             f"expected {SCHEMA_VERSION}")
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+        return False
+
+    def add_document(self, pdf_file, name, on_error=None):
+        """PDF की lines store में डालो; returns ``(doc_id, added)``
+
+        Lines are streamed page by page into the database, so ingesting a
+        large PDF does not hold all of its lines in memory. A PDF whose
+        content is already stored is skipped (``added`` is False).
+        """
+        pdf_key = pdf_cache_key(pdf_file)
+        row = self.conn.execute("SELECT doc_id FROM documents WHERE pdf_key = ?", (pdf_key,)).fetchone()
+        if row is not None:
+            return row[0], False
+
+        with self.conn:
+            doc_id = self.conn.execute(
+                "INSERT INTO documents (name, pdf_key, added) VALUES (?, ?, ?)",
+                (name, pdf_key, time.time())
+            ).lastrowid
+            # Line ids are assigned here so typed values can refer to them
+            first_line_id = self.conn.execute("SELECT COALESCE(MAX(line_id), 0) + 1 FROM lines").fetchone()[0]
+            line_count = 0
+            batch = []
+            value_batch = []
+            for pdf_line in iter_pdf_lines(pdf_file, on_error):
+                line_id = first_line_id + line_count + len(batch)
+                lower_line = pdf_line.lower_line
+                batch.append((line_id, doc_id, pdf_line.page, pdf_line.line_num, pdf_line.clean_line,
+                              lower_line))
+                value_batch.extend((value_key, line_id) for value_key in line_value_keys(lower_line))
+                if len(batch) >= INSERT_BATCH_SIZE:
+                    line_count += self._insert_lines(batch, value_batch)
+                    batch = []
+                    value_batch = []
+            line_count += self._insert_lines(batch, value_batch)
+            if line_count:
+                self.conn.execute(
+                    "INSERT INTO lines_fts (rowid, clean_line) "
+                    "SELECT line_id, clean_line FROM lines WHERE doc_id = ?", (doc_id,)
+                )
+            self.conn.execute("UPDATE documents SET line_count = ? WHERE doc_id = ?",
+                              (line_count, doc_id))
+        return doc_id, True
+
+    def _insert_lines(self, batch, value_batch):
+        self.conn.executemany(
+            "INSERT INTO lines (line_id, doc_id, page, line_num, clean_line, lower_line) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            batch
+        )
+        self.conn.executemany("INSERT INTO line_values (value_key, line_id) VALUES (?, ?)", value_batch)
+        return len(batch)
+
+    def remove_document(self, doc_id):
+        """Document और उसकी lines (FTS entries समेत) हटाओ"""
+        with self.conn:
+            self.conn.execute(
+                "INSERT INTO lines_fts (lines_fts, rowid, clean_line) "
+                "SELECT 'delete', line_id, clean_line FROM lines WHERE doc_id = ?", (doc_id,)
+            )
+            self.conn.execute(
+                "DELETE FROM line_values WHERE line_id IN (SELECT line_id FROM lines WHERE doc_id = ?)",
+                (doc_id,)
+            )
+            self.conn.execute("DELETE FROM lines WHERE doc_id = ?", (doc_id,))
+            removed = self.conn.execute("DELETE FROM documents WHERE doc_id = ?", (doc_id,)).rowcount
+        return removed > 0
+
+    def documents(self):
+        """Stored documents: list of dicts (doc_id, name, pdf_key, line_count, added)"""
+        rows = self.conn.execute(
+            "SELECT doc_id, name, pdf_key, line_count, added FROM documents ORDER BY doc_id"
+        )
+        return [dict(zip(('doc_id', 'name', 'pdf_key', 'line_count', 'added'), row)) for row in rows]
+
+    def stats(self):
+        documents, lines = self.conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(line_count), 0) FROM documents"
+        ).fetchone()
+        size_bytes = os.path.getsize(self.db_path) if os.path.exists(self.db_path) else 0
+        return {'documents': documents, 'lines': lines, 'size_bytes': size_bytes}
+
+    def matcher(self, candidate_limit=DEFAULT_CANDIDATE_LIMIT):
+        return StoreMatcher(self, candidate_limit)
+
+
+class StoreMatcher:
+    """``PdfLineIndex`` की जगह store से best line ढूंढो (``compare_cells`` के लिए)
+
+    Only the lines that end up as a best match are loaded; they are
+    collected in ``pdf_lines`` and the ids handed to ``compare_cells`` are
+    positions in that list. Pass ``pdf_lines`` as the PDF lines of the
+    comparison. With ``candidate_limit`` set, only that many best-ranked
+    (bm25) FTS candidates are re-scored per cell, which bounds the work
+    for very common words; ``None`` re-scores every candidate and gives
+    exactly the in-memory index result.
+    """
+
+    def __init__(self, store, candidate_limit=DEFAULT_CANDIDATE_LIMIT):
+        self.conn = store.conn
+        self.candidate_limit = candidate_limit
+        self.pdf_lines = []
+        # store line_id -> position in pdf_lines
+        self._local_ids = {}
+        self.queries = 0
+        self.candidates = 0
+
+    def _local_id(self, line_id):
+        local_id = self._local_ids.get(line_id)
+        if local_id is None:
+            document, page, line_num, clean_line = self.conn.execute(
+                "SELECT d.name, l.page, l.line_num, l.clean_line FROM lines l "
+                "JOIN documents d ON d.doc_id = l.doc_id WHERE l.line_id = ?", (line_id,)
+            ).fetchone()
+            local_id = self._local_ids[line_id] = len(self.pdf_lines)
+            self.pdf_lines.append(StoredPdfLine(document, page, line_num, clean_line))
+        return local_id
+
+    def best_match(self, cell_lower):
+        """Return (pdf_line, similarity) for the best matching line, or (None, 0)"""
+        line_id, similarity = self.best_match_id(cell_lower)
+        if line_id is None:
+            return None, similarity
+        return self.pdf_lines[line_id], similarity
+
+    def best_match_id(self, cell_lower):
+        """``PdfLineIndex.best_match_id`` जैसा; id ``pdf_lines`` में position है"""
+        self.queries += 1
+        row = self.conn.execute(
+            "SELECT MIN(line_id) FROM lines WHERE lower_line = ?", (cell_lower,)
+        ).fetchone()
+        if row[0] is None:
+            value_key = cell_value_key(cell_lower)
+            if value_key is not None:
+                row = self.conn.execute(
+                    "SELECT MIN(line_id) FROM line_values WHERE value_key = ?", (value_key,)
+                ).fetchone()
+        if row[0] is not None:
+            return self._local_id(row[0]), 100
+
+        cell_words = set(cell_lower.split())
+        if not cell_words:
+            return None, 0
+
+        sql = ("SELECT l.line_id, l.lower_line FROM lines_fts "
+               "JOIN lines l ON l.line_id = lines_fts.rowid WHERE lines_fts MATCH ?")
+        params = (fts_query(cell_words),)
+        if self.candidate_limit is not None:
+            sql += " ORDER BY rank LIMIT ?"
+            params += (self.candidate_limit,)
+
+        # Highest overlap wins; ties go to the earliest stored line
+        best_key = None
+        for line_id, lower_line in self.conn.execute(sql, params):
+            self.candidates += 1
+            overlap = len(cell_words.intersection(lower_line.split()))
+            if overlap and (best_key is None or (-overlap, line_id) < best_key):
+                best_key = (-overlap, line_id)
+        if best_key is None:
+            return None, 0
+        return self._local_id(best_key[1]), -best_key[0] / len(cell_words) * 100
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="Keep PDF lines in a SQLite/FTS5 store and compare Excel files against all of them."
+    )
+    parser.add_argument("db", help="SQLite database file (created if missing)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    ingest = commands.add_parser("ingest", help="Add PDFs to the store")
+    ingest.add_argument("pdfs", nargs="+", help="PDF files to add")
+
+    commands.add_parser("list", help="List stored documents")
+
+    remove = commands.add_parser("remove", help="Remove a stored document")
+    remove.add_argument("doc_id", type=int)
+
+    compare = commands.add_parser("compare", help="Compare an Excel file against every stored line")
+    compare.add_argument("excel", help="Excel file (.xlsx/.xls) to check")
+    compare.add_argument("output", help="Path of the highlighted .xlsx to write")
+    compare.add_argument("--candidate-limit", type=int, default=DEFAULT_CANDIDATE_LIMIT,
+                         help="FTS candidates re-scored per cell, 0 = all "
+                              f"(default: {DEFAULT_CANDIDATE_LIMIT})")
+    compare.add_argument("--report-mode", choices=REPORT_MODES, default="in_memory")
+    compare.add_argument("--summary", help="Write the JSON summary to this file instead of stdout")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    logging.basicConfig(level=logging.WARNING, format="%(levelname)s: %(message)s")
+
+    with PdfLineStore(args.db) as store:
+        if args.command == "ingest":
+            for pdf_path in args.pdfs:
+                try:
+                    with open(pdf_path, 'rb') as pdf_file:
+                        doc_id, added = store.add_document(pdf_file, os.path.basename(pdf_path))
+                except Exception as e:
+                    print(f"error: {pdf_path}: {e}", file=sys.stderr)
+                    continue
+                print(f"{'added  ' if added else 'skipped'} #{doc_id} {pdf_path}")
+            stats = store.stats()
+            print(f"{stats['documents']} documents, {stats['lines']} lines, "
+                  f"{stats['size_bytes'] / 1024 / 1024:.1f} MB")
+        elif args.command == "list":
+            for document in store.documents():
+                print(f"#{document['doc_id']:<6} {document['line_count']:>9} lines  {document['name']}")
+        elif args.command == "remove":
+            if not store.remove_document(args.doc_id):
+                print(f"error: no document #{args.doc_id}", file=sys.stderr)
+                return 1
+        else:
+            try:
+                summary = compare_excel_to_store(
+                    store, args.excel, args.output, candidate_limit=args.candidate_limit or None,
+                    report_mode=args.report_mode
+                )
+            except (OSError, ValueError) as e:
+                print(f"error: {e}", file=sys.stderr)
+                return 1
+            summary_json = json.dumps(summary, indent=2, ensure_ascii=False)
+            if args.summary:
+                with open(args.summary, 'w', encoding='utf-8') as summary_file:
+                    summary_file.write(summary_json + "\n")
+            else:
+                print(summary_json)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,186 @@
+"""Content-addressed on-disk cache for extracted PDF lines
+
+Entries are keyed by a SHA-256 of the PDF bytes plus the extraction
+settings, stored as pickles and evicted least-recently-used once the cache
+directory grows past its size budget.
+"""
+import hashlib
+import logging
+import os
+import pickle
+import tempfile
+from functools import lru_cache
+from importlib import metadata
+
+from instrumentation import perf_stage
+from line_index import PdfLineIndex
+from pdf_extract import extract_pdf_lines
+
+logger = logging.getLogger(__name__)
+
+# Bump when extraction output or the PdfLineIndex layout changes so stale entries stop matching
+EXTRACTION_VERSION = "3"
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "pdf_line_compare")
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# Distributions whose version changes the extracted text
+EXTRACTION_BACKENDS = ('PyMuPDF', 'PyPDF2')
+
+
+@lru_cache(maxsize=1)
+def extraction_settings():
+    """Extraction output तय करने वाली settings: format version + backend versions"""
+    settings = {'extraction': EXTRACTION_VERSION}
+    for backend in EXTRACTION_BACKENDS:
+        try:
+            settings[backend] = metadata.version(backend)
+        except metadata.PackageNotFoundError:
+            settings[backend] = "missing"
+    return settings
+
+
+def pdf_cache_key(pdf_file, **settings):
+    """PDF bytes + extraction settings का hash (file position restore होती है)
+
+    ``extraction_settings()`` is always part of the key; ``settings`` adds
+    to or overrides it. Worker count is deliberately not a setting, since
+    parallel extraction returns the same lines.
+    """
+    digest = hashlib.sha256()
+    start = pdf_file.tell()
+    for chunk in iter(lambda: pdf_file.read(HASH_CHUNK_SIZE), b''):
+        digest.update(chunk)
+    pdf_file.seek(start)
+
+    settings = dict(extraction_settings(), **settings)
+    for name in sorted(settings):
+        digest.update(f";{name}={settings[name]}".encode())
+    return digest.hexdigest()
+
+
+class PdfLineCache:
+    """Extracted lines (और prebuilt PdfLineIndex) का persistent LRU cache"""
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.pkl")
+
+    def get(self, key):
+        """Return ``(pdf_lines, line_index)`` or ``None`` on a miss"""
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as cache_file:
+                pdf_lines, line_index = pickle.load(cache_file)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except Exception as e:
+            logger.warning("Dropping unreadable cache entry %s: %s", path, e)
+            self._remove(path)
+            self.misses += 1
+            return None
+
+        # Touch so eviction sees this entry as recently used; another process
+        # may have evicted it since the load, which is still a hit
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        self.hits += 1
+        return pdf_lines, line_index
+
+    def put(self, key, pdf_lines, line_index=None):
+        """Entry atomically लिखो, फिर size budget तक evict करो"""
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as cache_file:
+                pickle.dump((pdf_lines, line_index), cache_file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self._path(key))
+        except BaseException:
+            self._remove(tmp_path)
+            raise
+        self.evict()
+
+    def _entries(self):
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith('.pkl'):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def evict(self):
+        """Oldest entries हटाओ जब तक total size budget के अंदर न आ जाए"""
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            self._remove(path)
+            total -= size
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def clear(self):
+        for _, _, path in self._entries():
+            self._remove(path)
+
+    def stats(self):
+        entries = self._entries()
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'entries': len(entries),
+            'size_bytes': sum(size for _, size, _ in entries),
+            'max_bytes': self.max_bytes,
+        }
+
+
+def cached_extract_pdf_lines(pdf_file, cache, on_error=None, workers=1, perf=None, key=None,
+                             check_cancelled=None):
+    """Cache hit पर extraction skip करो, miss पर extract + index करके store करो
+
+    Returns ``(pdf_lines, line_index)``. ``perf`` is an optional
+    ``instrumentation.PerfRecorder``; pass ``key`` when the caller already
+    computed ``pdf_cache_key(pdf_file)``. ``check_cancelled`` is passed
+    on to ``extract_pdf_lines``.
+    """
+    with perf_stage(perf, "pdf_cache_lookup") as counts:
+        if key is None:
+            key = pdf_cache_key(pdf_file)
+        cached = cache.get(key)
+        counts['hit'] = cached is not None
+    if cached is not None:
+        pdf_lines, line_index = cached
+        if line_index is None:
+            with perf_stage(perf, "build_index", lines=len(pdf_lines)):
+                line_index = PdfLineIndex(pdf_lines)
+        return pdf_lines, line_index
+
+    pdf_lines = extract_pdf_lines(pdf_file, on_error=on_error, workers=workers, perf=perf,
+                                  check_cancelled=check_cancelled)
+    with perf_stage(perf, "build_index", lines=len(pdf_lines)):
+        line_index = PdfLineIndex(pdf_lines)
+    # Empty extractions are not worth caching; the caller reports them
+    if pdf_lines:
+        with perf_stage(perf, "pdf_cache_store", lines=len(pdf_lines)):
+            cache.put(key, pdf_lines, line_index)
+    return pdf_lines, line_index
@@ -0,0 +1,284 @@
+"""PDF line extraction (PyMuPDF with a PyPDF2 fallback), serial or per-page parallel
+
+The upload is spooled to a temp file in chunks and pages are read lazily
+from disk as compact ``PdfLine`` records. ``iter_pdf_lines`` yields them
+page by page, so its memory stays flat as the page count grows; the line
+store ingests through it. ``extract_pdf_lines`` (the comparison path)
+still returns the full list, because the match index, the results and the
+report all need every line at once - its memory grows with the number of
+lines, but not with the PDF bytes. PyMuPDF is imported on first
+extraction and PyPDF2 only when the fallback actually runs.
+"""
+import io
+import logging
+import multiprocessing
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, wait
+from contextlib import contextmanager
+
+from cancellation import JobCancelled
+from instrumentation import lazy_import, perf_stage
+
+logger = logging.getLogger(__name__)
+
+# Chunks per worker, so one slow page range doesn't leave other workers idle
+CHUNKS_PER_WORKER = 4
+
+# Uploads are copied to disk in blocks of this size
+SPOOL_CHUNK_SIZE = 1024 * 1024
+
+# How often a cancellable parallel extraction checks while waiting on a page range
+CANCEL_POLL_SECONDS = 0.2
+
+
+class PdfLine:
+    """एक PDF line - सिर्फ एक canonical string (clean_line) store होती है"""
+
+    __slots__ = ('page', 'line_num', 'clean_line', '_original')
+
+    def __init__(self, page, line_num, original_line, clean_line=None):
+        if clean_line is None:
+            clean_line = original_line.strip()
+        self.page = page
+        self.line_num = line_num
+        self.clean_line = clean_line
+        # Only keep the raw line when stripping actually changed it
+        self._original = None if original_line == clean_line else original_line
+
+    @property
+    def original_line(self):
+        return self.clean_line if self._original is None else self._original
+
+    @property
+    def lower_line(self):
+        return self.clean_line.lower()
+
+    def to_dict(self):
+        return {
+            'page': self.page,
+            'line_num': self.line_num,
+            'original_line': self.original_line,
+            'clean_line': self.clean_line,
+            'lower_line': self.lower_line
+        }
+
+    def __eq__(self, other):
+        if not isinstance(other, PdfLine):
+            return NotImplemented
+        return (self.page, self.line_num, self.original_line) == \
+            (other.page, other.line_num, other.original_line)
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"PdfLine(page={self.page}, line_num={self.line_num}, clean_line={self.clean_line!r})"
+
+
+def _page_lines(page_text, page_num):
+    """एक page के text को non-empty PdfLine records में split करो"""
+    for line_num, line in enumerate(page_text.split('\n'), 1):
+        line_clean = line.strip()
+        if line_clean:  # Only non-empty lines
+            yield PdfLine(page_num, line_num, line, line_clean)
+
+
+def _is_disk_file(pdf_file):
+    try:
+        pdf_file.fileno()
+    except (AttributeError, OSError, io.UnsupportedOperation):
+        return False
+    name = getattr(pdf_file, 'name', None)
+    return isinstance(name, str) and os.path.isfile(name)
+
+
+@contextmanager
+def spool_pdf(pdf_file):
+    """Upload को disk पर spool करो और file path दो
+
+    Real files on disk are used in place; anything else (uploads, BytesIO)
+    is copied to a named temp file chunk by chunk instead of read() into
+    one bytes blob.
+    """
+    if _is_disk_file(pdf_file):
+        yield pdf_file.name
+        return
+
+    with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as tmp:
+        shutil.copyfileobj(pdf_file, tmp, SPOOL_CHUNK_SIZE)
+        pdf_path = tmp.name
+    try:
+        yield pdf_path
+    finally:
+        os.unlink(pdf_path)
+
+
+def _iter_fitz_pages(pdf_path, start=0, stop=None, check_cancelled=None):
+    """PyMuPDF से pages [start, stop) की lines, page by page"""
+    fitz = lazy_import("fitz")  # PyMuPDF
+    with fitz.open(pdf_path) as pdf_doc:
+        if stop is None:
+            stop = len(pdf_doc)
+        for page_num in range(start, stop):
+            if check_cancelled is not None:
+                check_cancelled()
+            page_text = pdf_doc.load_page(page_num).get_text()
+            yield from _page_lines(page_text, page_num + 1)
+
+
+def _iter_pypdf2_pages(pdf_path, start=0, stop=None, check_cancelled=None):
+    """PyPDF2 से pages [start, stop) की lines (line_num assigned by caller)"""
+    # Only loaded when the PyMuPDF pass failed
+    PyPDF2 = lazy_import("PyPDF2")
+    with open(pdf_path, 'rb') as pdf_file:
+        pdf_reader = PyPDF2.PdfReader(pdf_file)
+        if stop is None:
+            stop = len(pdf_reader.pages)
+        for page_num in range(start, stop):
+            if check_cancelled is not None:
+                check_cancelled()
+            page_text = pdf_reader.pages[page_num].extract_text()
+            yield from _page_lines(page_text, page_num + 1)
+
+
+def _fitz_page_range(pdf_path, start, stop):
+    """Worker: PyMuPDF page range as a list"""
+    return list(_iter_fitz_pages(pdf_path, start, stop))
+
+
+def _pypdf2_page_range(pdf_path, start, stop):
+    """Worker: PyPDF2 page range as a list"""
+    return list(_iter_pypdf2_pages(pdf_path, start, stop))
+
+
+def _number_fallback_lines(records):
+    """PyPDF2 fallback numbers lines across the whole document, not per page"""
+    for line_counter, record in enumerate(records, 1):
+        record.line_num = line_counter
+        yield record
+
+
+def _page_ranges(page_count, workers):
+    chunk_size = max(1, -(-page_count // (workers * CHUNKS_PER_WORKER)))
+    return [(start, min(start + chunk_size, page_count))
+            for start in range(0, page_count, chunk_size)]
+
+
+def _extract_parallel(worker_fn, pdf_path, page_count, workers, check_cancelled=None):
+    """Page ranges को worker processes में बांटो और page order में merge करो
+
+    ``check_cancelled`` is polled while waiting; when it raises, page
+    ranges that have not started yet are cancelled (running ones finish
+    in the background) and the exception propagates.
+    """
+    ranges = _page_ranges(page_count, workers)
+    pdf_lines = []
+    if not ranges:
+        return pdf_lines
+    # Spawned, not forked: the app forks from a process with job and warm-up
+    # threads running, and a child inheriting one of their locks can hang
+    pool = ProcessPoolExecutor(max_workers=min(workers, len(ranges)),
+                               mp_context=multiprocessing.get_context("spawn"))
+    try:
+        futures = [pool.submit(worker_fn, pdf_path, start, stop) for start, stop in ranges]
+        # Collected in submission order, so the merge stays in page order
+        for future in futures:
+            if check_cancelled is not None:
+                while not future.done():
+                    check_cancelled()
+                    wait([future], timeout=CANCEL_POLL_SECONDS)
+            pdf_lines.extend(future.result())
+    except BaseException:
+        pool.shutdown(wait=False, cancel_futures=True)
+        raise
+    pool.shutdown()
+    return pdf_lines
+
+
+def resolve_workers(workers):
+    """``None``/0 means one worker per CPU"""
+    if not workers:
+        return os.cpu_count() or 1
+    return max(1, int(workers))
+
+
+def iter_pdf_path_lines(pdf_path, on_error=None):
+    """Disk पर रखी PDF की lines page by page yield करो
+
+    PyMuPDF is tried first. If it fails before the first line is yielded
+    ``on_error`` is called and extraction falls back to PyPDF2; a failure
+    after lines have been handed out is re-raised.
+    """
+    yielded = False
+    try:
+        # PyMuPDF use करो जो better lines देता है
+        for pdf_line in _iter_fitz_pages(pdf_path):
+            yielded = True
+            yield pdf_line
+        return
+    except Exception as e:
+        if yielded:
+            raise
+        logger.warning("PDF extraction error: %s", e)
+        if on_error:
+            on_error(e)
+
+    # Fallback to PyPDF2
+    yield from _number_fallback_lines(_iter_pypdf2_pages(pdf_path))
+
+
+def iter_pdf_lines(pdf_file, on_error=None):
+    """Upload/file object से PdfLine records page by page yield करो"""
+    with spool_pdf(pdf_file) as pdf_path:
+        yield from iter_pdf_path_lines(pdf_path, on_error)
+
+
+def extract_pdf_lines(pdf_file, on_error=None, workers=1, perf=None, check_cancelled=None):
+    """PDF से lines निकालो (line-by-line), पूरी list के रूप में
+
+    ``on_error`` is called with the PyMuPDF exception before falling back
+    to PyPDF2; by default the error is only logged. With ``workers > 1``
+    page ranges are extracted in separate processes; the result is the
+    same as serial extraction. ``perf`` is an optional
+    ``instrumentation.PerfRecorder``; the PyMuPDF pass and the PyPDF2
+    fallback are recorded as separate stages. ``check_cancelled`` (e.g.
+    ``Job.check_cancelled``) is called between pages and page ranges; the
+    exception it raises stops extraction without trying the fallback. Use
+    ``iter_pdf_lines`` when the lines can be consumed one page at a time.
+    """
+    workers = resolve_workers(workers)
+
+    # Workers open the document themselves from the spooled path
+    with spool_pdf(pdf_file) as pdf_path:
+        try:
+            with perf_stage(perf, "pdf_extract_pymupdf", workers=workers) as counts:
+                with lazy_import("fitz").open(pdf_path) as pdf_doc:
+                    page_count = len(pdf_doc)
+                if workers > 1:
+                    pdf_lines = _extract_parallel(_fitz_page_range, pdf_path, page_count, workers,
+                                                  check_cancelled)
+                else:
+                    pdf_lines = list(_iter_fitz_pages(pdf_path, check_cancelled=check_cancelled))
+                counts.update(pages=page_count, lines=len(pdf_lines))
+            return pdf_lines
+
+        except JobCancelled:
+            raise
+        except Exception as e:
+            logger.warning("PDF extraction error: %s", e)
+            if on_error:
+                on_error(e)
+
+        # Fallback to PyPDF2
+        with perf_stage(perf, "pdf_extract_pypdf2_fallback", workers=workers) as counts:
+            with open(pdf_path, 'rb') as fallback_file:
+                page_count = len(lazy_import("PyPDF2").PdfReader(fallback_file).pages)
+            if workers > 1:
+                pdf_lines = _extract_parallel(_pypdf2_page_range, pdf_path, page_count, workers,
+                                              check_cancelled)
+            else:
+                pdf_lines = list(_iter_pypdf2_pages(pdf_path, check_cancelled=check_cancelled))
+            pdf_lines = list(_number_fallback_lines(pdf_lines))
+            counts.update(pages=page_count, lines=len(pdf_lines))
+        return pdf_lines
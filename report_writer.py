@@ -0,0 +1,388 @@
+"""Highlighted-workbook report writers
+
+``create_highlighted_excel_line_compare`` patches the parsed workbook in
+memory and keeps the original formatting; ``patch_highlighted_excel``
+re-patches a fresh copy of a saved report (``load_report_workbook``) after
+a re-upload, touching only changed cells. ``write_highlighted_excel_streaming``
+rebuilds it with openpyxl's write-only workbook and shared named styles, so
+large reports stream to a temp file in bounded memory. openpyxl is only
+imported when a report is written; the status fills and fonts are built
+once per process (``report_styles``).
+"""
+import io
+import os
+import tempfile
+from copy import copy
+from functools import lru_cache
+
+from excel_ingest import ExcelSource, load_excel
+from instrumentation import lazy_import
+from results_table import STATUSES
+
+REPORT_MODES = ('in_memory', 'streaming')
+
+ANALYSIS_SHEET = "Line-by-Line Analysis"
+
+STATUS_ICONS = {
+    '✅ Perfect Match': "✅",
+    '⚠️ Partial Match': "⚠️",
+    '❌ No Match': "❌",
+    '⚪ Empty': "⚪",
+}
+
+# Fill/font colours per match status; Empty cells only get the icon
+STATUS_COLORS = {
+    '✅ Perfect Match': ("C6EFCE", "00AA00"),
+    '⚠️ Partial Match': ("FFEB9C", "FF9900"),
+    '❌ No Match': ("FFCCCC", "FF0000"),
+}
+
+ANALYSIS_FONTS = {
+    'title': dict(size=16, bold=True),
+    'bold': dict(bold=True),
+    'accuracy': dict(color="FF0000", bold=True, size=14),
+}
+
+
+@lru_cache(maxsize=None)
+def report_styles():
+    """Status fills/fonts और analysis fonts, process में एक बार बनते हैं
+
+    Returns ``(fills, fonts, analysis_fonts)`` keyed by status / font key.
+    openpyxl style objects are immutable, so every workbook can share them.
+    """
+    styles = lazy_import("openpyxl.styles")
+    fills = {
+        status: styles.PatternFill(start_color=fill, end_color=fill, fill_type="solid")
+        for status, (fill, _) in STATUS_COLORS.items()
+    }
+    fonts = {status: styles.Font(color=font, bold=True) for status, (_, font) in STATUS_COLORS.items()}
+    analysis_fonts = {key: styles.Font(**font_args) for key, font_args in ANALYSIS_FONTS.items()}
+    return fills, fonts, analysis_fonts
+
+
+def _analysis_rows(comparison_results, pdf_lines_sample):
+    """Analysis sheet की rows: ``(row_num, [(col, value, font_key), ...])``"""
+    rows = []
+
+    def put(row_num, *cells):
+        rows.append((row_num, list(cells)))
+
+    # Title
+    put(1, (1, "📊 PDF LINE-BY-LINE COMPARISON REPORT", 'title'))
+
+    # Summary statistics
+    total_checks = len(comparison_results)
+    counts = comparison_results.status_counts()
+    perfect_matches = counts['✅ Perfect Match']
+    partial_matches = counts['⚠️ Partial Match']
+    no_matches = counts['❌ No Match']
+
+    put(3, (1, "📈 COMPARISON STATISTICS", 'bold'))
+    put(5, (1, f"Total Excel Cells Checked: {total_checks}", None))
+    put(6, (1, f"✅ Perfect Matches: {perfect_matches} ({(perfect_matches/total_checks*100):.1f}%)", None))
+    put(7, (1, f"⚠️ Partial Matches: {partial_matches} ({(partial_matches/total_checks*100):.1f}%)", None))
+    put(8, (1, f"❌ No Matches: {no_matches} ({(no_matches/total_checks*100):.1f}%)", None))
+
+    accuracy = (perfect_matches + partial_matches * 0.5) / total_checks * 100
+    put(10, (1, f"🎯 OVERALL ACCURACY: {accuracy:.1f}%", 'accuracy'))
+
+    # PDF Lines Sample
+    put(12, (1, "📄 PDF LINES SAMPLE (First 50 lines)", 'bold'))
+
+    row_num = 14
+    for i, line in enumerate(pdf_lines_sample[:50], 1):
+        put(row_num, (1, f"Line {i}:", None), (2, line.clean_line[:100], None))
+        row_num += 1
+
+    # Detailed comparison results
+    row_num += 2
+    put(row_num, (1, "🔍 DETAILED COMPARISON RESULTS", 'bold'))
+
+    headers = ['Excel Cell', 'Excel Value', 'Match Status', 'Matched PDF Line', 'Similarity %']
+    put(row_num + 2, *[(col_idx, header, 'bold') for col_idx, header in enumerate(headers, 1)])
+
+    data_start_row = row_num + 3
+    for idx, result in enumerate(comparison_results[:100]):  # Show first 100 results
+        matched = result['matched_pdf_line'][:50] if result['matched_pdf_line'] else "No match"
+        put(
+            data_start_row + idx,
+            (1, result['excel_cell'], None),
+            (2, str(result['excel_value'])[:50], None),
+            (3, result['match_status'], None),
+            (4, matched, None),
+            (5, f"{result['similarity_percent']:.1f}%", None),
+        )
+
+    return rows
+
+
+def _highlighted_cells(col_map, comparison_results, indices=None):
+    """``(row, col_idx, status, cell text)`` for every result cell that gets an icon"""
+    col_idx_by_code = [col_map.get(column) for column in comparison_results.columns]
+    if indices is None:
+        indices = range(len(comparison_results))
+    values = comparison_results.values
+    for i in indices:
+        col_idx = col_idx_by_code[comparison_results.col_codes[i]]
+        if not col_idx:
+            continue
+        yield (int(comparison_results.rows[i]), col_idx, STATUSES[comparison_results.status[i]],
+               values[comparison_results.value_ids[i]])
+
+
+def _highlight_cells(ws, col_map, comparison_results, indices=None):
+    """Result cells में status icon + fill/font लगाओ"""
+    fills, fonts, _ = report_styles()
+
+    # Apply formatting based on comparison results
+    for excel_row, col_idx, status, excel_value in _highlighted_cells(col_map, comparison_results, indices):
+        icon = STATUS_ICONS.get(status)
+        if icon is None:
+            continue
+
+        cell = ws.cell(row=excel_row, column=col_idx)
+        if status in fills:
+            cell.fill = fills[status]
+            cell.font = fonts[status]
+        # Formula cells keep their formula; the fill carries the status
+        if cell.data_type != 'f':
+            cell.value = f"{icon} {excel_value}"
+
+
+def _add_analysis_sheet(wb, comparison_results, pdf_lines_sample):
+    # Add comparison summary sheet
+    analysis_ws = wb.create_sheet(ANALYSIS_SHEET)
+    analysis_fonts = report_styles()[2]
+    for row_num, cells in _analysis_rows(comparison_results, pdf_lines_sample):
+        for col_idx, value, font_key in cells:
+            cell = analysis_ws.cell(row=row_num, column=col_idx, value=value)
+            if font_key:
+                cell.font = analysis_fonts[font_key]
+
+    # Auto-adjust column widths
+    for column in analysis_ws.columns:
+        max_length = 0
+        column_letter = column[0].column_letter
+        for cell in column:
+            try:
+                if len(str(cell.value)) > max_length:
+                    max_length = len(str(cell.value))
+            except:
+                pass
+        adjusted_width = min(max_length + 2, 50)
+        analysis_ws.column_dimensions[column_letter].width = adjusted_width
+
+
+def _save_to_bytes(wb):
+    output = io.BytesIO()
+    wb.save(output)
+    output.seek(0)
+    return output
+
+
+def create_highlighted_excel_line_compare(excel_source, comparison_results, pdf_lines_sample):
+    """Create Excel file with line-by-line comparison results
+
+    ``excel_source`` is the ``ExcelSource`` the comparison ran on (a raw
+    upload is also accepted and parsed here). Its workbook is modified in
+    place.
+    """
+    if not isinstance(excel_source, ExcelSource):
+        excel_source = load_excel(excel_source)
+    _highlight_cells(excel_source.ws, excel_source.col_map, comparison_results)
+    _add_analysis_sheet(excel_source.wb, comparison_results, pdf_lines_sample)
+    return _save_to_bytes(excel_source.wb)
+
+
+def _sheet_values(ws):
+    return list(ws.iter_rows(values_only=True))
+
+
+def load_report_workbook(report_bytes):
+    """Saved report को नए workbook में खोलो (patching के लिए अपनी copy)"""
+    return lazy_import("openpyxl").load_workbook(io.BytesIO(report_bytes))
+
+
+def can_patch_report(report_wb, excel_source):
+    """Previous report workbook इस upload पर patch हो सकता है?
+
+    The compared sheet must keep its header row and every other sheet must
+    be unchanged; otherwise the report has to be rebuilt. So must a sheet
+    with blank or duplicate headers: their data columns have no header
+    cell of their own in ``col_map``, so changed cells there could not be
+    patched like the rebuild writes them.
+    """
+    col_map = excel_source.col_map
+    if any(col_map.get(column) != col_idx for col_idx, column in enumerate(excel_source.df.columns, 1)):
+        return False
+    report_sheets = [ws for ws in report_wb.worksheets if ws.title != ANALYSIS_SHEET]
+    source_sheets = excel_source.wb.worksheets
+    if [ws.title for ws in report_sheets] != [ws.title for ws in source_sheets]:
+        return False
+    report_header = [cell.value for cell in report_sheets[0][1]]
+    if report_header != [cell.value for cell in excel_source.ws[1]]:
+        return False
+    return all(_sheet_values(report_ws) == _sheet_values(source_ws)
+               for report_ws, source_ws in zip(report_sheets[1:], source_sheets[1:]))
+
+
+def patch_highlighted_excel(report_wb, excel_source, comparison_results, changed_cells, removed_cells,
+                            pdf_lines_sample):
+    """Previous run का highlighted workbook सिर्फ बदले हुए cells पर patch करो
+
+    ``comparison_results`` is a ``results_table.ComparisonResults``;
+    ``changed_cells`` / ``removed_cells`` are ``(column, excel_row)`` sets
+    from ``compare_engine.compare_cells_incremental``. Those cells get the
+    upload's value and formatting back before the new highlight is applied;
+    every other cell keeps its highlight. The analysis sheet is rebuilt
+    (its summary covers every cell). ``report_wb`` is modified in place,
+    so pass a copy from ``load_report_workbook``, never a workbook someone
+    else still holds; check ``can_patch_report`` first.
+    """
+    ws = report_wb.worksheets[0]
+    source_ws = excel_source.ws
+    col_map = excel_source.col_map
+    for column, excel_row in changed_cells | removed_cells:
+        col_idx = col_map.get(column)
+        if not col_idx:
+            continue
+        source_cell = source_ws.cell(row=excel_row, column=col_idx)
+        cell = ws.cell(row=excel_row, column=col_idx)
+        cell.value = source_cell.value
+        cell.font = copy(source_cell.font)
+        cell.fill = copy(source_cell.fill)
+        cell.border = copy(source_cell.border)
+        cell.alignment = copy(source_cell.alignment)
+        cell.number_format = source_cell.number_format
+
+    _highlight_cells(ws, col_map, comparison_results, [
+        i for i, cell_key in enumerate(comparison_results.cell_keys()) if cell_key in changed_cells
+    ])
+
+    del report_wb[ANALYSIS_SHEET]
+    _add_analysis_sheet(report_wb, comparison_results, pdf_lines_sample)
+    return _save_to_bytes(report_wb)
+
+
+def _register_named_styles(wb):
+    """Status/analysis styles workbook में एक बार register करो, नाम लौटाओ"""
+    NamedStyle = lazy_import("openpyxl.styles").NamedStyle
+    fills, fonts, analysis_fonts = report_styles()
+    names = {}
+    for status in STATUS_COLORS:
+        name = f"match {STATUS_ICONS[status]}"
+        wb.add_named_style(NamedStyle(name, fill=fills[status], font=fonts[status]))
+        names[status] = name
+    for font_key, font in analysis_fonts.items():
+        name = f"report {font_key}"
+        wb.add_named_style(NamedStyle(name, font=font))
+        names[font_key] = name
+    return names
+
+
+class _StyledCells:
+    """Write-only cells with a named style, resolved once per style per sheet"""
+
+    def __init__(self, ws):
+        self.ws = ws
+        self.style_arrays = {}
+        self.WriteOnlyCell = lazy_import("openpyxl.cell").WriteOnlyCell
+
+    def __call__(self, value, style_name):
+        style_array = self.style_arrays.get(style_name)
+        if style_array is None:
+            prototype = self.WriteOnlyCell(self.ws)
+            prototype.style = style_name
+            style_array = self.style_arrays[style_name] = prototype._style
+        cell = self.WriteOnlyCell(self.ws, value=value)
+        cell._style = copy(style_array)
+        return cell
+
+
+def write_highlighted_excel_streaming(excel_source, comparison_results, pdf_lines_sample, output=None):
+    """Write-only workbook से highlighted report stream करो
+
+    Cell values and highlights match ``create_highlighted_excel_line_compare``.
+    The compared sheet and any other sheets are re-written cell by cell
+    (values and formulas), so the original cell formatting is not carried
+    over. Rows go straight to
+    ``output`` (a path or binary file). Without ``output`` the report is
+    saved to a temp file and returned as an open read-only handle.
+    """
+    if not isinstance(excel_source, ExcelSource):
+        excel_source = load_excel(excel_source)
+    wb = lazy_import("openpyxl").Workbook(write_only=True)
+    styles = _register_named_styles(wb)
+
+    # (row, col) -> (status, cell text) for every highlighted cell
+    highlights = {
+        (excel_row, col_idx): (status, excel_value)
+        for excel_row, col_idx, status, excel_value in _highlighted_cells(excel_source.col_map,
+                                                                          comparison_results)
+        if status in STATUS_ICONS
+    }
+
+    for source_ws in excel_source.wb.worksheets:
+        ws = wb.create_sheet(source_ws.title)
+        styled = _StyledCells(ws)
+        is_compared = source_ws is excel_source.ws
+        for row_idx, values in enumerate(source_ws.iter_rows(values_only=True), 1):
+            if not is_compared:
+                ws.append(values)
+                continue
+
+            row = []
+            for col_idx, value in enumerate(values, 1):
+                highlight = highlights.get((row_idx, col_idx))
+                if highlight is None:
+                    row.append(styled(value, styles['bold']) if row_idx == 1 else value)
+                    continue
+                status, excel_value = highlight
+                if not (isinstance(value, str) and value.startswith('=')):
+                    value = f"{STATUS_ICONS[status]} {excel_value}"
+                row.append(styled(value, styles[status]) if status in styles else value)
+            ws.append(row)
+
+    # Analysis sheet: widths come from maxima tracked while building the rows
+    analysis_rows = _analysis_rows(comparison_results, pdf_lines_sample)
+    widths = {}
+    for _, cells in analysis_rows:
+        for col_idx, value, _ in cells:
+            widths[col_idx] = max(widths.get(col_idx, 0), len(str(value)))
+
+    analysis_ws = wb.create_sheet(ANALYSIS_SHEET)
+    styled = _StyledCells(analysis_ws)
+    get_column_letter = lazy_import("openpyxl.utils").get_column_letter
+    for col_idx, max_length in widths.items():
+        analysis_ws.column_dimensions[get_column_letter(col_idx)].width = min(max_length + 2, 50)
+
+    next_row = 1
+    for row_num, cells in analysis_rows:
+        for _ in range(row_num - next_row):
+            analysis_ws.append([])
+        row = [None] * max(col_idx for col_idx, _, _ in cells)
+        for col_idx, value, font_key in cells:
+            row[col_idx - 1] = styled(value, styles[font_key]) if font_key else value
+        analysis_ws.append(row)
+        next_row = row_num + 1
+
+    if output is None:
+        with tempfile.NamedTemporaryFile(suffix='.xlsx', delete=False) as tmp:
+            wb.save(tmp)
+        # Read-only handle (what st.download_button accepts); the inode
+        # lives on until the handle is closed
+        output = open(tmp.name, 'rb')
+        os.unlink(tmp.name)
+        return output
+    wb.save(output)
+    return output
+
+
+def write_highlighted_report(excel_source, comparison_results, pdf_lines_sample, mode='in_memory'):
+    """``mode`` के हिसाब से report writer चुनो (file-like object लौटता है)"""
+    if mode == 'streaming':
+        return write_highlighted_excel_streaming(excel_source, comparison_results, pdf_lines_sample)
+    if mode == 'in_memory':
+        return create_highlighted_excel_line_compare(excel_source, comparison_results, pdf_lines_sample)
+    raise ValueError(f"Unknown report mode {mode!r}, expected one of {REPORT_MODES}")
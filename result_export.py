@@ -0,0 +1,196 @@
+"""Chunked exports of the full comparison results and PDF line table
+
+The highlighted workbook only carries a sample of the analysis; these
+exports write every result row and every extracted PDF line as CSV,
+Parquet or JSONL for downstream systems. Rows are built from the
+columnar ``ComparisonResults`` arrays one chunk at a time and appended to
+the output, so memory stays bounded by the chunk size rather than the
+result count. Parquet needs ``pyarrow``.
+"""
+import importlib.util
+import io
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from results_table import EMPTY, NO_LINE, STATUSES
+
+EXPORT_FORMATS = ('csv', 'parquet', 'jsonl')
+
+EXPORT_MIME_TYPES = {
+    'csv': "text/csv",
+    'parquet': "application/vnd.apache.parquet",
+    'jsonl': "application/jsonl",
+}
+
+# Rows per chunk (about 50 MB of pandas objects for results)
+DEFAULT_CHUNK_ROWS = 100_000
+
+RESULT_COLUMNS = (
+    'excel_cell', 'excel_column', 'excel_row', 'excel_value', 'match_status',
+    'similarity_percent', 'pdf_page', 'pdf_line_num', 'matched_pdf_line',
+)
+LINE_COLUMNS = ('line_id', 'page', 'line_num', 'clean_line')
+
+
+def available_formats():
+    """Formats जो इस environment में लिखे जा सकते हैं (Parquet को pyarrow चाहिए)"""
+    if importlib.util.find_spec("pyarrow") is None:
+        return tuple(fmt for fmt in EXPORT_FORMATS if fmt != 'parquet')
+    return EXPORT_FORMATS
+
+
+def _nullable_ints(values, missing):
+    return pd.arrays.IntegerArray(np.where(missing, 0, values).astype(np.int32), missing)
+
+
+def result_chunks(comparison_results, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """``ComparisonResults`` को ``RESULT_COLUMNS`` वाले DataFrame chunks में yield करो"""
+    results = comparison_results
+    column_names = np.array([str(column) for column in results.columns], dtype=object)
+    values = np.asarray(results.values, dtype=object)
+    status_names = np.asarray(STATUSES, dtype=object)
+    # Per-line lookups with a trailing entry for NO_LINE (-1)
+    pdf_lines = results.pdf_lines
+    line_texts = np.empty(len(pdf_lines) + 1, dtype=object)
+    line_texts[:-1] = [pdf_line.clean_line for pdf_line in pdf_lines]
+    line_pages = np.fromiter((pdf_line.page for pdf_line in pdf_lines), dtype=np.int64,
+                             count=len(pdf_lines))
+    line_nums = np.fromiter((pdf_line.line_num for pdf_line in pdf_lines), dtype=np.int64,
+                            count=len(pdf_lines))
+    line_pages = np.append(line_pages, 0)
+    line_nums = np.append(line_nums, 0)
+
+    for start in range(0, len(results), chunk_rows):
+        stop = min(start + chunk_rows, len(results))
+        rows = results.rows[start:stop]
+        status = results.status[start:stop]
+        line_ids = np.where(status == EMPTY, NO_LINE, results.line_ids[start:stop])
+        no_line = line_ids == NO_LINE
+        excel_column = column_names[results.col_codes[start:stop]]
+        yield pd.DataFrame({
+            'excel_cell': excel_column + rows.astype(str).astype(object),
+            'excel_column': excel_column,
+            'excel_row': rows,
+            'excel_value': values[results.value_ids[start:stop]],
+            'match_status': status_names[status],
+            'similarity_percent': results.similarity[start:stop],
+            'pdf_page': _nullable_ints(line_pages[line_ids], no_line),
+            'pdf_line_num': _nullable_ints(line_nums[line_ids], no_line),
+            'matched_pdf_line': line_texts[line_ids],
+        }, columns=RESULT_COLUMNS)
+
+
+def line_chunks(pdf_lines, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """PDF line table (``LINE_COLUMNS``) के DataFrame chunks"""
+    for start in range(0, len(pdf_lines), chunk_rows):
+        chunk = pdf_lines[start:start + chunk_rows]
+        yield pd.DataFrame({
+            'line_id': np.arange(start, start + len(chunk), dtype=np.int64),
+            'page': np.fromiter((pdf_line.page for pdf_line in chunk), dtype=np.int32, count=len(chunk)),
+            'line_num': np.fromiter((pdf_line.line_num for pdf_line in chunk), dtype=np.int32,
+                                    count=len(chunk)),
+            'clean_line': np.array([pdf_line.clean_line for pdf_line in chunk], dtype=object),
+        }, columns=LINE_COLUMNS)
+
+
+def _arrow_schema(table_name):
+    import pyarrow as pa
+
+    if table_name == 'results':
+        return pa.schema([
+            ('excel_cell', pa.string()), ('excel_column', pa.string()), ('excel_row', pa.int32()),
+            ('excel_value', pa.string()), ('match_status', pa.string()),
+            ('similarity_percent', pa.float64()), ('pdf_page', pa.int32()),
+            ('pdf_line_num', pa.int32()), ('matched_pdf_line', pa.string()),
+        ])
+    return pa.schema([
+        ('line_id', pa.int64()), ('page', pa.int32()), ('line_num', pa.int32()),
+        ('clean_line', pa.string()),
+    ])
+
+
+def write_chunks(chunks, output, fmt, table_name):
+    """Chunks को ``output`` (path या binary file) में ``fmt`` में लिखो; row count लौटाओ"""
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format {fmt!r}, expected one of {EXPORT_FORMATS}")
+    rows = 0
+    if fmt == 'parquet':
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ValueError("Parquet export needs pyarrow (pip install pyarrow)") from e
+        schema = _arrow_schema(table_name)
+        with pq.ParquetWriter(output, schema, compression='zstd') as writer:
+            for chunk in chunks:
+                writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+                rows += len(chunk)
+        return rows
+
+    if isinstance(output, (str, os.PathLike)):
+        text_file = open(output, 'w', encoding='utf-8', newline='')
+    else:
+        text_file = io.TextIOWrapper(output, encoding='utf-8', newline='')
+    try:
+        for chunk in chunks:
+            if fmt == 'csv':
+                chunk.to_csv(text_file, header=rows == 0, index=False)
+            else:
+                chunk.to_json(text_file, orient='records', lines=True, force_ascii=False)
+            rows += len(chunk)
+        if fmt == 'csv' and rows == 0:
+            text_file.write(",".join(RESULT_COLUMNS if table_name == 'results' else LINE_COLUMNS) + "\n")
+    finally:
+        if isinstance(output, (str, os.PathLike)):
+            text_file.close()
+        else:
+            # Hand the binary file back to the caller open
+            text_file.flush()
+            text_file.detach()
+    return rows
+
+
+def export_results(comparison_results, output, fmt, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """पूरे comparison results export करो"""
+    return write_chunks(result_chunks(comparison_results, chunk_rows), output, fmt, 'results')
+
+
+def export_pdf_lines(pdf_lines, output, fmt, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """पूरी PDF line table export करो"""
+    return write_chunks(line_chunks(pdf_lines, chunk_rows), output, fmt, 'pdf_lines')
+
+
+def export_to_tempfile(write, fmt):
+    """``write(file)`` से temp file भरो और उसे पढ़ने के लिए खुला लौटाओ (downloads के लिए)"""
+    export_file = tempfile.TemporaryFile()
+    write(export_file, fmt)
+    export_file.seek(0)
+    return export_file
+
+
+def export_comparison(comparison_results, pdf_lines, prefix, formats, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """``{prefix}.results.{fmt}`` और ``{prefix}.pdf_lines.{fmt}`` लिखो
+
+    Returns one summary dict per written file (path, rows, seconds,
+    rows per second).
+    """
+    written = []
+    for fmt in formats:
+        for table_name, export, data in (('results', export_results, comparison_results),
+                                         ('pdf_lines', export_pdf_lines, pdf_lines)):
+            path = f"{prefix}.{table_name}.{fmt}"
+            start = time.perf_counter()
+            rows = export(data, path, fmt, chunk_rows)
+            elapsed = time.perf_counter() - start
+            written.append({
+                'path': path,
+                'format': fmt,
+                'rows': rows,
+                'seconds': round(elapsed, 3),
+                'rows_per_second': round(rows / elapsed, 1) if elapsed else None,
+            })
+    return written
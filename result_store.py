@@ -0,0 +1,472 @@
+"""Shared, size-bounded store for finished comparison results
+
+Sessions keep only a handle; the PDF lines, Excel frame, results and the
+incremental snapshot live here, shared by every session of the server
+process. ``put`` writes each result through to a pickle in ``spill_dir``
+and the saved highlighted workbook (bytes, never an openpyxl object) to
+its own ``.xlsx`` next to it, so the in-memory copy can be dropped at any
+time: least-recently-used results leave memory once their approximate
+total (never less than their pickled size) passes ``memory_budget`` and
+are reloaded from disk on the next access. Results not accessed for
+``ttl_seconds`` are deleted; past ``disk_budget`` files left by earlier
+processes go first, then the oldest workbooks (``report`` rebuilds them
+from the stored Excel upload) and then whole results.
+"""
+import copy
+import io
+import itertools
+import logging
+import os
+import pickle
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from excel_ingest import load_excel
+from report_writer import write_highlighted_report
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SPILL_DIR = os.path.join(os.path.expanduser("~"), ".cache", "pdf_line_compare_results")
+DEFAULT_MEMORY_BUDGET = 1024 * 1024 * 1024
+DEFAULT_DISK_BUDGET = 4 * 1024 * 1024 * 1024
+DEFAULT_TTL_SECONDS = 4 * 3600
+
+# Size estimates look at this many items per container, this many levels deep
+SIZE_SAMPLE = 32
+SIZE_DEPTH = 6
+
+# PDF lines listed on the workbook's analysis sheet (same as compare_uploads)
+PDF_LINES_SAMPLE = 50
+
+PAYLOAD_SUFFIX = '.pkl'
+REPORT_SUFFIX = '.xlsx'
+
+_SCALARS = (str, bytes, bytearray, int, float, complex, bool, type(None))
+
+
+def _sampled_bytes(items, count, seen, depth):
+    sample = list(itertools.islice(items, SIZE_SAMPLE))
+    if not sample:
+        return 0
+    total = sum(approx_bytes(item, seen, depth) for item in sample)
+    return int(total * count / len(sample))
+
+
+def _slot_values(value):
+    for cls in type(value).__mro__:
+        slots = cls.__dict__.get('__slots__', ())
+        for name in (slots,) if isinstance(slots, str) else slots:
+            if name not in ('__dict__', '__weakref__') and hasattr(value, name):
+                yield getattr(value, name)
+
+
+def approx_bytes(value, seen=None, depth=SIZE_DEPTH):
+    """Object graph का अंदाज़न memory size
+
+    Containers are sampled (``SIZE_SAMPLE`` items, extrapolated to their
+    length) and objects already in ``seen`` count as zero, so shared
+    references are counted once. Cheap enough to run on every rerun.
+    """
+    if seen is None:
+        seen = set()
+    if id(value) in seen:
+        return 0
+    seen.add(id(value))
+
+    if isinstance(value, pd.DataFrame):
+        return sum(approx_bytes(value.iloc[:, i], seen, depth) for i in range(value.shape[1]))
+    if isinstance(value, pd.Series):
+        size = int(value.memory_usage(index=False, deep=False))
+        if value.dtype == object and len(value):
+            size += _sampled_bytes(iter(value.array), len(value), seen, 0)
+        return size
+    if isinstance(value, np.ndarray):
+        size = value.nbytes
+        if value.dtype == object and value.size:
+            size += _sampled_bytes(value.flat, value.size, seen, 0)
+        return size
+    if isinstance(value, io.BytesIO):
+        return sys.getsizeof(value) + value.getbuffer().nbytes
+
+    size = sys.getsizeof(value)
+    if depth == 0 or isinstance(value, _SCALARS):
+        return size
+    if isinstance(value, dict):
+        return size + _sampled_bytes(itertools.chain.from_iterable(value.items()), 2 * len(value),
+                                     seen, depth - 1)
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return size + _sampled_bytes(iter(value), len(value), seen, depth - 1)
+    # Plain objects: their attributes are part of the object, not a level deeper
+    attrs = getattr(value, '__dict__', None)
+    if attrs is not None:
+        size += approx_bytes(attrs, seen, depth)
+    return size + sum(approx_bytes(item, seen, depth - 1) for item in _slot_values(value))
+
+
+class StoredResult:
+    """Store की एक entry: metadata, और memory में हो तो payload"""
+
+    def __init__(self, handle, label=""):
+        self.handle = handle
+        self.label = label
+        self.created = time.time()
+        self.last_access = self.created
+        self.payload = None
+        # Objects built from the payload (views, joins); dropped with it
+        self.derived = {}
+        self.payload_bytes = 0
+        self.payload_ids = set()
+        self.memory_bytes = 0
+        self.pickle_bytes = 0
+        self.report_bytes = 0
+
+    @property
+    def in_memory(self):
+        return self.payload is not None
+
+    @property
+    def disk_bytes(self):
+        return self.pickle_bytes + self.report_bytes
+
+
+class ResultStore:
+    """Comparison results का process-wide store (memory + disk, LRU/TTL eviction)
+
+    ``put`` returns a handle; ``get`` returns the payload dict
+    (``pdf_lines``, ``excel_df``, ``comparison_results``, ``snapshot``,
+    ``excel_name``, ``excel_bytes``, ``report_mode``) or None once the
+    result expired.
+    """
+
+    def __init__(self, spill_dir=DEFAULT_SPILL_DIR, memory_budget=DEFAULT_MEMORY_BUDGET,
+                 disk_budget=DEFAULT_DISK_BUDGET, ttl_seconds=DEFAULT_TTL_SECONDS):
+        self.spill_dir = spill_dir
+        self.memory_budget = memory_budget
+        self.disk_budget = disk_budget
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.reloads = 0
+        self.regenerated = 0
+        # Files in spill_dir that belong to no entry (earlier processes, crashed writes)
+        self.orphan_bytes = 0
+        # LRU order: least recently used first
+        self._entries = OrderedDict()
+        # Handles being written by put, not yet entries; prune leaves their files alone
+        self._pending = set()
+        self._lock = threading.Lock()
+        os.makedirs(spill_dir, exist_ok=True)
+        self.prune()
+
+    def _path(self, handle, suffix):
+        return os.path.join(self.spill_dir, f"{handle}{suffix}")
+
+    def _write(self, path, write):
+        """``write(file)`` से temp file भरो और atomically ``path`` पर रखो; size लौटाओ"""
+        fd, tmp_path = tempfile.mkstemp(dir=self.spill_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as out:
+                write(out)
+            os.replace(tmp_path, path)
+        except BaseException:
+            self._remove(tmp_path)
+            raise
+        return os.path.getsize(path)
+
+    def _write_report(self, handle, report_file):
+        """Report (BytesIO या streaming writer की temp file) spill करो और उसे close करो"""
+        try:
+            report_file.seek(0)
+            return self._write(self._path(handle, REPORT_SUFFIX),
+                               lambda out: shutil.copyfileobj(report_file, out))
+        finally:
+            # Frees the streaming writer's unlinked temp file
+            report_file.close()
+
+    def _read_report(self, handle):
+        try:
+            with open(self._path(handle, REPORT_SUFFIX), 'rb') as report_file:
+                return report_file.read()
+        except FileNotFoundError:
+            return None
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def _remove_files(self, handle):
+        self._remove(self._path(handle, PAYLOAD_SUFFIX))
+        self._remove(self._path(handle, REPORT_SUFFIX))
+
+    def _attach(self, entry, payload):
+        # Loaded objects take at least their pickled size; the sampled walk
+        # is usually higher (dict/object overhead) and then wins
+        seen = set()
+        entry.payload_bytes = max(entry.pickle_bytes, approx_bytes(payload, seen))
+        entry.payload_ids = seen
+        entry.memory_bytes = entry.payload_bytes
+        entry.derived = {}
+        entry.payload = payload
+
+    def _drop_payload(self, entry):
+        entry.payload = None
+        entry.derived = {}
+        entry.payload_ids = set()
+        entry.memory_bytes = 0
+
+    def put(self, result, excel_bytes=None, report_mode='in_memory', label=""):
+        """``compare_uploads`` का result store करो और handle लौटाओ
+
+        Written through to disk right away (the caller is a background
+        job), so dropping the in-memory copy later never has to write.
+        The highlighted workbook (any file-like object; it is closed here)
+        is only kept in its ``.xlsx`` file; the stored snapshot carries no
+        copy of it (``snapshot`` reads it back).
+        ``excel_bytes`` (the uploaded workbook) lets ``report`` rebuild the
+        highlighted workbook after its file was evicted.
+        """
+        self.prune()
+        handle = uuid.uuid4().hex
+        snapshot = result['snapshot']
+        if snapshot is not None and snapshot.report_bytes is not None:
+            snapshot = copy.copy(snapshot)
+            snapshot.report_bytes = None
+        payload = {
+            'pdf_lines': result['pdf_lines'],
+            'excel_df': result['excel_df'],
+            'comparison_results': result['comparison_results'],
+            'snapshot': snapshot,
+            'excel_name': label,
+            'excel_bytes': excel_bytes,
+            'report_mode': report_mode,
+        }
+        entry = StoredResult(handle, label)
+        with self._lock:
+            self._pending.add(handle)
+        try:
+            entry.pickle_bytes = self._write(
+                self._path(handle, PAYLOAD_SUFFIX),
+                lambda out: pickle.dump(payload, out, protocol=pickle.HIGHEST_PROTOCOL)
+            )
+            entry.report_bytes = self._write_report(handle, result['highlighted_excel'])
+        except BaseException:
+            result['highlighted_excel'].close()
+            self._remove_files(handle)
+            with self._lock:
+                self._pending.discard(handle)
+            raise
+        self._attach(entry, payload)
+        with self._lock:
+            self._entries[handle] = entry
+            self._pending.discard(handle)
+        self.evict(keep=handle)
+        return handle
+
+    def _touch(self, handle):
+        with self._lock:
+            entry = self._entries.get(handle)
+            if entry is not None:
+                entry.last_access = time.time()
+                self._entries.move_to_end(handle)
+            return entry
+
+    def _load(self, entry):
+        path = self._path(entry.handle, PAYLOAD_SUFFIX)
+        try:
+            with open(path, 'rb') as payload_file:
+                payload = pickle.load(payload_file)
+        except Exception as e:
+            logger.warning("Dropping unreadable stored result %s: %s", path, e)
+            self.release(entry.handle)
+            return None
+        with self._lock:
+            # Another session may have reloaded it meanwhile
+            if entry.payload is not None:
+                return entry.payload
+            self._attach(entry, payload)
+            self.reloads += 1
+        return payload
+
+    def get(self, handle):
+        """Handle का payload dict (ज़रूरत हो तो disk से reload), expire होने पर None"""
+        entry = self._touch(handle)
+        if entry is None:
+            return None
+        payload = entry.payload
+        if payload is None:
+            payload = self._load(entry)
+            if payload is None:
+                return None
+        else:
+            self.hits += 1
+        self.evict(keep=handle)
+        return payload
+
+    def derived(self, handle, name, build):
+        """Payload से बना object (जैसे ``ResultsView``) cache करो; payload के साथ ही evict होता है"""
+        payload = self.get(handle)
+        if payload is None:
+            return None
+        with self._lock:
+            entry = self._entries.get(handle)
+            value = entry.derived.get(name) if entry is not None else None
+        if value is None:
+            value = build(payload)
+            with self._lock:
+                if entry is not None and entry.payload is payload:
+                    entry.derived[name] = value
+        return value
+
+    def snapshot(self, handle):
+        """Incremental re-compare के लिए ``ComparisonSnapshot`` (या None)
+
+        Returns a copy; for an in-memory report its ``report_bytes`` are
+        read from the stored workbook, or None once that file was evicted
+        (the next run then writes its report from scratch).
+        """
+        payload = self.get(handle)
+        if payload is None or payload['snapshot'] is None:
+            return None
+        snapshot = copy.copy(payload['snapshot'])
+        if payload['report_mode'] == 'in_memory':
+            snapshot.report_bytes = self._read_report(handle)
+        return snapshot
+
+    def report(self, handle):
+        """Highlighted workbook के bytes; file evict हुई हो तो दोबारा बनाओ"""
+        if self._touch(handle) is None:
+            return None
+        report_data = self._read_report(handle)
+        if report_data is not None:
+            return report_data
+        payload = self.get(handle)
+        if payload is None or payload['excel_bytes'] is None:
+            return None
+        excel_file = io.BytesIO(payload['excel_bytes'])
+        excel_file.name = payload['excel_name']
+        report_file = write_highlighted_report(
+            load_excel(excel_file), payload['comparison_results'],
+            payload['pdf_lines'][:PDF_LINES_SAMPLE], mode=payload['report_mode']
+        )
+        report_bytes = self._write_report(handle, report_file)
+        with self._lock:
+            entry = self._entries.get(handle)
+            if entry is not None:
+                entry.report_bytes = report_bytes
+            self.regenerated += 1
+        self.evict(keep=handle)
+        return self._read_report(handle)
+
+    def release(self, handle):
+        """Result (memory और disk दोनों) हटाओ"""
+        with self._lock:
+            entry = self._entries.pop(handle, None)
+        self._remove_files(handle)
+        return entry
+
+    def evict(self, keep=None):
+        """Budgets लागू करो: TTL, फिर memory (payload drop), फिर disk (workbook, फिर पूरा result)
+
+        ``keep`` (the result being handed out right now) is never evicted.
+        """
+        cutoff = time.time() - self.ttl_seconds
+        removed = []
+        dropped_reports = []
+        with self._lock:
+            for handle, entry in list(self._entries.items()):
+                if handle != keep and entry.last_access < cutoff:
+                    removed.append(self._entries.pop(handle))
+
+            # Derived views grow as pages are opened, so they are re-measured here
+            memory = 0
+            for entry in self._entries.values():
+                if entry.in_memory:
+                    entry.memory_bytes = entry.payload_bytes + approx_bytes(entry.derived, set(entry.payload_ids))
+                    memory += entry.memory_bytes
+            for handle, entry in self._entries.items():
+                if memory <= self.memory_budget:
+                    break
+                if handle != keep and entry.in_memory:
+                    memory -= entry.memory_bytes
+                    self._drop_payload(entry)
+
+            disk = self.orphan_bytes + sum(entry.disk_bytes for entry in self._entries.values())
+            for handle, entry in self._entries.items():
+                if disk <= self.disk_budget:
+                    break
+                if handle != keep and entry.report_bytes:
+                    disk -= entry.report_bytes
+                    entry.report_bytes = 0
+                    dropped_reports.append(handle)
+            for handle, entry in list(self._entries.items()):
+                if disk <= self.disk_budget:
+                    break
+                if handle != keep:
+                    disk -= entry.disk_bytes
+                    removed.append(self._entries.pop(handle))
+
+        for handle in dropped_reports:
+            self._remove(self._path(handle, REPORT_SUFFIX))
+        for entry in removed:
+            self._remove_files(entry.handle)
+
+    def prune(self):
+        """Expired results और पिछले processes की छूटी हुई files हटाओ
+
+        Files of no known result count against ``disk_budget``: expired
+        ones are deleted, and the oldest of the rest go first when the
+        budget is exceeded. Temp files may still be written to, so they
+        are only deleted once expired.
+        """
+        cutoff = time.time() - self.ttl_seconds
+        with self._lock:
+            known = set(self._entries) | self._pending
+            disk = sum(entry.disk_bytes for entry in self._entries.values())
+        orphans = []
+        for name in os.listdir(self.spill_dir):
+            handle, suffix = os.path.splitext(name)
+            if handle in known or suffix not in (PAYLOAD_SUFFIX, REPORT_SUFFIX, '.tmp'):
+                continue
+            path = os.path.join(self.spill_dir, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            if stat.st_mtime < cutoff:
+                self._remove(path)
+            else:
+                orphans.append((stat.st_mtime, path, suffix, stat.st_size))
+
+        orphan_bytes = sum(size for _, _, _, size in orphans)
+        for _, path, suffix, size in sorted(orphans):
+            if disk + orphan_bytes <= self.disk_budget:
+                break
+            if suffix != '.tmp':
+                self._remove(path)
+                orphan_bytes -= size
+        self.orphan_bytes = orphan_bytes
+        self.evict()
+
+    def stats(self):
+        with self._lock:
+            entries = list(self._entries.values())
+        return {
+            'entries': len(entries),
+            'in_memory': sum(entry.in_memory for entry in entries),
+            'memory_bytes': sum(entry.memory_bytes for entry in entries),
+            'memory_budget': self.memory_budget,
+            'disk_bytes': self.orphan_bytes + sum(entry.disk_bytes for entry in entries),
+            'disk_budget': self.disk_budget,
+            'hits': self.hits,
+            'reloads': self.reloads,
+            'regenerated': self.regenerated,
+        }
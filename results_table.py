@@ -0,0 +1,173 @@
+"""Columnar storage for comparison results
+
+One row per Excel cell, kept as typed NumPy arrays instead of one dict per
+cell: the column as a code into the sheet's column names, the row number,
+the cell text as a reference into a table of distinct values, the matched
+line as an index into the PDF line table, the similarity and the match
+status as a small categorical code.
+"""
+from array import array
+
+import numpy as np
+import pandas as pd
+
+STATUSES = ('✅ Perfect Match', '⚠️ Partial Match', '❌ No Match', '⚪ Empty')
+PERFECT, PARTIAL, NO_MATCH, EMPTY = range(len(STATUSES))
+
+# line_ids entry for cells without a matched PDF line
+NO_LINE = -1
+
+
+def status_code_for(similarity):
+    """Similarity % का status code (``STATUSES`` में index)"""
+    if similarity == 100:
+        return PERFECT
+    elif similarity >= 70:
+        return PARTIAL
+    return NO_MATCH
+
+
+class ResultsBuilder:
+    """Results row by row जमा करो, ``build()`` से ``ComparisonResults`` बनाओ"""
+
+    def __init__(self):
+        self.col_codes = array('i')
+        self.rows = array('i')
+        self.value_ids = array('i')
+        self.line_ids = array('i')
+        self.similarity = array('d')
+        self.status = array('b')
+        # cell text -> id in the distinct value table
+        self.value_table = {}
+
+    def append(self, col_code, excel_row, cell_str, line_id, similarity, status):
+        value_id = self.value_table.get(cell_str)
+        if value_id is None:
+            value_id = self.value_table[cell_str] = len(self.value_table)
+        self.col_codes.append(col_code)
+        self.rows.append(excel_row)
+        self.value_ids.append(value_id)
+        self.line_ids.append(line_id)
+        self.similarity.append(similarity)
+        self.status.append(status)
+
+    def build(self, columns, pdf_lines):
+        return ComparisonResults(
+            columns=list(columns),
+            col_codes=np.frombuffer(self.col_codes, dtype=np.int32),
+            rows=np.frombuffer(self.rows, dtype=np.int32),
+            values=list(self.value_table),
+            value_ids=np.frombuffer(self.value_ids, dtype=np.int32),
+            line_ids=np.frombuffer(self.line_ids, dtype=np.int32),
+            similarity=np.frombuffer(self.similarity, dtype=np.float64),
+            status=np.frombuffer(self.status, dtype=np.int8),
+            pdf_lines=pdf_lines,
+        )
+
+
+class ComparisonResults:
+    """Comparison results, column-wise (one entry per Excel cell, sheet order)
+
+    Indexing and iteration still give the old per-cell dicts
+    (``excel_cell``, ``excel_column``, ``excel_row``, ``excel_value``,
+    ``matched_pdf_line``, ``pdf_line_info``, ``similarity_percent``,
+    ``match_status``), built on demand.
+    """
+
+    def __init__(self, columns, col_codes, rows, values, value_ids, line_ids, similarity, status,
+                 pdf_lines):
+        self.columns = columns
+        self.col_codes = col_codes
+        self.rows = rows
+        self.values = values
+        self.value_ids = value_ids
+        self.line_ids = line_ids
+        self.similarity = similarity
+        self.status = status
+        self.pdf_lines = pdf_lines
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __bool__(self):
+        return len(self.rows) > 0
+
+    def record(self, i):
+        """Row ``i`` पुराने result dict की शक्ल में"""
+        column = self.columns[self.col_codes[i]]
+        excel_row = int(self.rows[i])
+        status = int(self.status[i])
+        record = {
+            'excel_cell': f"{column}{excel_row}",
+            'excel_column': column,
+            'excel_row': excel_row,
+            'excel_value': self.values[self.value_ids[i]],
+        }
+        if status == EMPTY:
+            record['matched_pdf_line'] = None
+        else:
+            line_id = int(self.line_ids[i])
+            pdf_line = self.pdf_lines[line_id] if line_id != NO_LINE else None
+            record['matched_pdf_line'] = pdf_line.clean_line if pdf_line else None
+            record['pdf_line_info'] = pdf_line
+        record['similarity_percent'] = float(self.similarity[i])
+        record['match_status'] = STATUSES[status]
+        return record
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return [self.record(i) for i in range(len(self))[key]]
+        if key < 0:
+            key += len(self)
+        if not 0 <= key < len(self):
+            raise IndexError("result index out of range")
+        return self.record(key)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self.record(i)
+
+    def status_counts(self):
+        """``{status: count}`` for every status in ``STATUSES``"""
+        counts = np.bincount(self.status, minlength=len(STATUSES))
+        return dict(zip(STATUSES, counts.tolist()))
+
+    def cell_keys(self):
+        """``(column, excel_row)`` per result, in result order"""
+        return list(zip(np.asarray(self.columns, dtype=object)[self.col_codes].tolist(),
+                        self.rows.tolist()))
+
+    def scores(self):
+        """Non-empty cells का memo: lowercased value -> ``(line_id, similarity)``"""
+        scored = np.flatnonzero(self.status != EMPTY)
+        return {
+            self.values[value_id].lower(): (line_id if line_id != NO_LINE else None, similarity)
+            for value_id, line_id, similarity in zip(self.value_ids[scored].tolist(),
+                                                     self.line_ids[scored].tolist(),
+                                                     self.similarity[scored].tolist())
+        }
+
+    def matched_lines(self, indices=None):
+        """Matched PDF line text per result (None where there is no line)"""
+        line_ids = self.line_ids if indices is None else self.line_ids[indices]
+        line_texts = np.empty(len(self.pdf_lines) + 1, dtype=object)
+        line_texts[:-1] = [pdf_line.clean_line for pdf_line in self.pdf_lines]
+        # NO_LINE (-1) picks the trailing None
+        return line_texts[line_ids]
+
+    def to_frame(self):
+        """Results का DataFrame (categorical column/status, no per-row dicts)"""
+        columns = pd.Categorical.from_codes(self.col_codes, categories=pd.Index(self.columns, dtype=object))
+        excel_value = np.asarray(self.values, dtype=object)[self.value_ids]
+        matched = self.matched_lines()
+        matched[self.status == EMPTY] = None
+        return pd.DataFrame({
+            'excel_cell': np.asarray(columns.astype(str), dtype=object) + self.rows.astype(str).astype(object),
+            'excel_column': columns,
+            'excel_row': self.rows,
+            'excel_value': excel_value,
+            'matched_pdf_line': matched,
+            'line_id': self.line_ids,
+            'similarity_percent': self.similarity,
+            'match_status': pd.Categorical.from_codes(self.status, categories=STATUSES),
+        })
@@ -0,0 +1,120 @@
+"""Derived display frames for the results section, built once per run
+
+Everything the results section shows (status counts, the indicator
+overlay on the Excel data, the All / No Match / Perfect tables and the
+best-match line groups) is computed here with vectorized pandas/NumPy
+operations and cached on the ``ResultsView``. The app keeps one view per
+comparison run and only slices pages out of it on rerun.
+"""
+import math
+
+import numpy as np
+import pandas as pd
+
+from results_table import EMPTY, NO_MATCH, PERFECT
+
+STATUS_INDICATORS = np.array(["✅", "⚠️", "❌", "⚪"], dtype=object)
+
+PAGE_SIZES = (50, 100, 200, 500, 1000)
+
+TABLES = ('all', 'no_match', 'perfect')
+
+
+def page_bounds(total_rows, page, page_size):
+    """1-based ``page`` के लिए (start, stop, page_count), page clamp होकर"""
+    page_count = max(1, math.ceil(total_rows / page_size))
+    page = min(max(page, 1), page_count)
+    start = (page - 1) * page_size
+    return start, min(start + page_size, total_rows), page_count
+
+
+class ResultsView:
+    """एक comparison run के cached derived frames"""
+
+    def __init__(self, comparison_results, excel_df):
+        self.results = comparison_results
+        self.excel_df = excel_df
+        self.status_counts = comparison_results.status_counts()
+        self._frames = {}
+
+    def _cached(self, name, build):
+        frame = self._frames.get(name)
+        if frame is None:
+            frame = self._frames[name] = build()
+        return frame
+
+    @property
+    def frame(self):
+        """Full results frame (``ComparisonResults.to_frame()``)"""
+        return self._cached('frame', self.results.to_frame)
+
+    def overlay(self):
+        """Excel data with a status icon in front of every non-empty value"""
+        return self._cached('overlay', self._build_overlay)
+
+    def _build_overlay(self):
+        display_df = self.excel_df.copy()
+        results = self.results
+        indicators = STATUS_INDICATORS[results.status]
+        positions = results.rows - 2  # Convert to 0-based index
+        in_range = (positions >= 0) & (positions < len(display_df))
+        for col_code, column in enumerate(results.columns):
+            if column not in display_df.columns:
+                continue
+            mask = in_range & (results.col_codes == col_code)
+            values = display_df[column]
+            icons = pd.Series(None, index=display_df.index, dtype=object)
+            icons.iloc[positions[mask]] = indicators[mask]
+            marked = values.notna() & icons.notna()
+            if marked.any():
+                display_df[column] = values.astype(object)
+                display_df.loc[marked, column] = icons[marked] + " " + values[marked].map(str)
+        return display_df
+
+    def table(self, name):
+        """All / No Match / Perfect tab का display frame"""
+        if name not in TABLES:
+            raise ValueError(f"Unknown results table {name!r}, expected one of {TABLES}")
+        return self._cached(f"table:{name}", lambda: self._build_table(name))
+
+    def _build_table(self, name):
+        frame = self.frame
+        similarity = pd.Series(np.char.mod('%.1f%%', frame['similarity_percent'].to_numpy()),
+                               index=frame.index, dtype=object)
+        if name == 'all':
+            table = frame[['excel_cell', 'excel_value', 'match_status']].copy()
+            table['similarity_percent'] = similarity
+            return table
+        if name == 'no_match':
+            mask = self.results.status == NO_MATCH
+            table = frame.loc[mask, ['excel_cell', 'excel_value']].copy()
+            table['similarity_percent'] = similarity[mask]
+            return table
+        mask = self.results.status == PERFECT
+        table = frame.loc[mask, ['excel_cell', 'excel_value']].copy()
+        matched = frame.loc[mask, 'matched_pdf_line'].astype(str)
+        long_lines = matched.str.len() > 60
+        table['matched_pdf_line'] = matched.where(~long_lines, matched.str[:60] + "...")
+        return table
+
+    def page(self, name, page, page_size):
+        """Table का एक page: ``(rows, start, stop, page_count)``"""
+        table = self.table(name) if name in TABLES else self.overlay()
+        start, stop, page_count = page_bounds(len(table), page, page_size)
+        return table.iloc[start:stop], start, stop, page_count
+
+    def best_line_groups(self, limit=20):
+        """पहली ``limit`` matched lines (text[:50]) -> [(excel_cell, similarity)]"""
+        return self._cached(f"groups:{limit}", lambda: self._build_line_groups(limit))
+
+    def _build_line_groups(self, limit):
+        frame = self.frame
+        matched = frame[frame['matched_pdf_line'].notna() & (self.results.status != EMPTY)]
+        keys = matched['matched_pdf_line'].str[:50]
+        first_keys = pd.unique(keys)[:limit]
+        shown = matched[keys.isin(first_keys)]
+        groups = {key: [] for key in first_keys}
+        for key, excel_cell, similarity in zip(keys[shown.index], shown['excel_cell'],
+                                               shown['similarity_percent']):
+            groups[key].append((excel_cell, similarity))
+        return groups
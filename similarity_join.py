@@ -0,0 +1,163 @@
+"""All-pairs similarity join between Excel cell values and PDF lines
+
+Unlike ``compare_cells`` (one best line per cell), the join returns every
+(cell, line) pair whose word-overlap similarity ``|cell ∩ line| / |cell|``
+reaches the threshold. Brute force would score every cell against every
+line. Instead candidates are pruned with two filters:
+
+* prefix filter - with tokens in a global rare-first order, a pair that
+  reaches ``alpha`` overlapping words must share one of the cell's first
+  ``|cell| - alpha + 1`` known tokens, so only those posting lists are read;
+* length filter - a line with fewer than ``alpha`` distinct words can never
+  reach the threshold and is skipped before verification.
+
+Surviving candidates are verified with the exact overlap, so the pairs are
+the same as a brute-force scan would find.
+"""
+import pandas as pd
+
+from compare_engine import cell_text, match_status_for
+from line_index import PdfLineIndex
+
+# Same cut-off as a partial match in ``match_status_for``
+DEFAULT_THRESHOLD = 70
+
+MAPPING_COLUMNS = [
+    'pdf_page', 'pdf_line_num', 'pdf_line', 'excel_cell', 'excel_value',
+    'similarity_percent', 'match_status', 'best_for_cell', 'lines_for_cell', 'cells_for_line',
+]
+
+
+def _min_overlap(n_words, threshold):
+    """Threshold तक पहुंचने के लिए कम से कम कितने common words चाहिए"""
+    for overlap in range(1, n_words + 1):
+        # Same float expression as the scorer, so borderline pairs agree
+        if overlap / n_words * 100 >= threshold:
+            return overlap
+    return n_words + 1
+
+
+def _token_ranks(line_index):
+    """Global token order: rarest (shortest posting list) first"""
+    order = sorted(range(len(line_index.postings)),
+                   key=lambda token_id: (len(line_index.postings[token_id]), token_id))
+    ranks = [0] * len(order)
+    for rank, token_id in enumerate(order):
+        ranks[token_id] = rank
+    return ranks
+
+
+def similarity_join(line_index, cell_values, threshold=DEFAULT_THRESHOLD, stats=None):
+    """हर (value, line) pair जिसकी similarity >= ``threshold`` हो
+
+    ``cell_values`` are lowercased, non-empty distinct values. Yields
+    ``(value_id, line_id, similarity)`` grouped by value, lines in PDF
+    order. Pass a ``stats`` dict to get candidate/verified counts back.
+    """
+    ranks = _token_ranks(line_index)
+    line_sizes = [len(words) for words in line_index.line_words]
+    candidates_total = 0
+    pairs_total = 0
+
+    for value_id, cell_lower in enumerate(cell_values):
+        cell_words = set(cell_lower.split())
+        if not cell_words:
+            continue
+        alpha = _min_overlap(len(cell_words), threshold)
+
+        # Words missing from the PDF still count in |cell| but can't overlap
+        known = [line_index.token_ids[word] for word in cell_words if word in line_index.token_ids]
+        prefix_len = len(known) - alpha + 1
+        if prefix_len <= 0:
+            continue
+        known.sort(key=ranks.__getitem__)
+        cell_token_ids = frozenset(known)
+
+        candidates = set()
+        for token_id in known[:prefix_len]:
+            for line_id in line_index.postings[token_id]:
+                if line_sizes[line_id] >= alpha:
+                    candidates.add(line_id)
+        candidates_total += len(candidates)
+
+        for line_id in sorted(candidates):
+            overlap = len(cell_token_ids & line_index.line_words[line_id])
+            if overlap >= alpha:
+                pairs_total += 1
+                yield value_id, line_id, overlap / len(cell_words) * 100
+
+    if stats is not None:
+        stats.update({
+            'values': len(cell_values),
+            'lines': len(line_index.line_words),
+            'brute_force_pairs': len(cell_values) * len(line_index.line_words),
+            'candidate_pairs': candidates_total,
+            'matched_pairs': pairs_total,
+        })
+
+
+def line_mapping_table(excel_df, pdf_lines, line_index=None, threshold=DEFAULT_THRESHOLD, stats=None):
+    """Complete many-to-many PDF line ↔ Excel cell mapping as a DataFrame
+
+    One row per (PDF line, Excel cell) pair at or above ``threshold``,
+    sorted by PDF line then sheet order. ``best_for_cell`` marks the pair
+    ``compare_cells`` reports for that cell; ``lines_for_cell`` > 1 points
+    at text repeated across PDF lines, ``cells_for_line`` > 1 at a line
+    split over several cells.
+    """
+    if line_index is None:
+        line_index = PdfLineIndex(pdf_lines)
+
+    # Distinct lowercased value -> cells holding it, in sheet order
+    cells_by_value = {}
+    cell_seq = 0
+    for column in excel_df.columns:
+        for row_idx, cell_value in enumerate(excel_df[column]):
+            cell_seq += 1
+            cell_str = cell_text(cell_value)
+            if cell_str.strip():
+                cells_by_value.setdefault(cell_str.lower(), []).append(
+                    (cell_seq, f"{column}{row_idx + 2}", cell_str)
+                )
+    cell_values = list(cells_by_value)
+
+    pairs = list(similarity_join(line_index, cell_values, threshold, stats=stats))
+
+    # Best line per value, same rule as best_match_id: an exact line, then
+    # a line holding the same typed value (both 100%), else the highest
+    # similarity with ties going to the earliest line
+    best_line = {}
+    for value_id, line_id, similarity in pairs:
+        current = best_line.get(value_id)
+        if current is None or similarity > current[1]:
+            best_line[value_id] = (line_id, similarity)
+    value_matches = {}
+    for value_id, cell_lower in enumerate(cell_values):
+        line_id = line_index.exact.get(cell_lower)
+        if line_id is None:
+            line_id = line_index.typed_match_id(cell_lower)
+        if line_id is not None:
+            best_line[value_id] = (line_id, 100)
+            value_matches[value_id] = line_id
+    if value_matches:
+        # A typed match can share few or no words with its line; report it
+        # at 100% like compare_cells, adding the pair when the join missed it
+        pairs = [(value_id, line_id, 100 if value_matches.get(value_id) == line_id else similarity)
+                 for value_id, line_id, similarity in pairs]
+        joined = {(value_id, line_id) for value_id, line_id, _ in pairs}
+        pairs.extend((value_id, line_id, 100) for value_id, line_id in value_matches.items()
+                     if (value_id, line_id) not in joined)
+
+    rows = []
+    for value_id, line_id, similarity in pairs:
+        pdf_line = pdf_lines[line_id]
+        is_best = best_line[value_id][0] == line_id
+        for seq, excel_cell, excel_value in cells_by_value[cell_values[value_id]]:
+            rows.append((line_id, seq, pdf_line.page, pdf_line.line_num, pdf_line.clean_line,
+                         excel_cell, excel_value, similarity, match_status_for(similarity), is_best))
+
+    mapping = pd.DataFrame(rows, columns=['line_id', 'cell_seq'] + MAPPING_COLUMNS[:-2])
+    mapping['lines_for_cell'] = mapping.groupby('excel_cell')['line_id'].transform('size')
+    mapping['cells_for_line'] = mapping.groupby('line_id')['excel_cell'].transform('size')
+    mapping = mapping.sort_values(['line_id', 'cell_seq']).drop(columns=['line_id', 'cell_seq'])
+    return mapping.reset_index(drop=True)
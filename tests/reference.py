@@ -0,0 +1,99 @@
+"""Brute-force references the optimized matchers are checked against
+
+``baseline_best_match`` is the original cells x lines loop from the app,
+plus the typed-value rule (an amount/date/code found in a line counts as
+100% when no line matches exactly).
+"""
+import random
+
+import pandas as pd
+
+from compare_engine import cell_text
+from pdf_extract import PdfLine
+from results_table import EMPTY, NO_LINE, status_code_for
+from typed_values import cell_value_key, line_value_keys
+
+# Few distinct words, so overlaps and ties are common
+VOCABULARY = ["invoice", "total", "vendor", "acme", "corp", "due", "paid", "tax", "net", "1,250.00",
+              "1250", "15%", "00123", "2024-01-05"]
+
+
+def baseline_best_match(cell_lower, pdf_lines):
+    """Original loop: ``(line_id, similarity)``, line_id None if nothing overlaps"""
+    best_id = None
+    best_similarity = 0
+    cell_words = set(cell_lower.split())
+    for line_id, pdf_line in enumerate(pdf_lines):
+        line_lower = pdf_line.lower_line
+        line_words = set(line_lower.split())
+        if cell_lower == line_lower:
+            return line_id, 100
+        if cell_words and line_words:
+            common_words = cell_words.intersection(line_words)
+            similarity = len(common_words) / len(cell_words) * 100
+            if similarity > best_similarity:
+                best_similarity = similarity
+                best_id = line_id
+
+    value_key = cell_value_key(cell_lower)
+    if value_key is not None:
+        for line_id, pdf_line in enumerate(pdf_lines):
+            if value_key in line_value_keys(pdf_line.lower_line):
+                return line_id, 100
+    return best_id, best_similarity
+
+
+def baseline_results(excel_df, pdf_lines):
+    """Original loop per cell: ``(line_id, similarity, status)`` in sheet order"""
+    expected = []
+    for column in excel_df.columns:
+        for cell_value in excel_df[column]:
+            cell_str = cell_text(cell_value)
+            if not cell_str.strip():
+                expected.append((NO_LINE, 0, EMPTY))
+                continue
+            line_id, similarity = baseline_best_match(cell_str.lower(), pdf_lines)
+            expected.append((NO_LINE if line_id is None else line_id, similarity,
+                             status_code_for(similarity)))
+    return expected
+
+
+def baseline_join(cell_values, pdf_lines, threshold):
+    """Every (value, line) pair with word overlap >= threshold, brute force"""
+    pairs = []
+    for value_id, cell_lower in enumerate(cell_values):
+        cell_words = set(cell_lower.split())
+        if not cell_words:
+            continue
+        for line_id, pdf_line in enumerate(pdf_lines):
+            overlap = len(cell_words & set(pdf_line.lower_line.split()))
+            similarity = overlap / len(cell_words) * 100
+            if overlap and similarity >= threshold:
+                pairs.append((value_id, line_id, similarity))
+    return pairs
+
+
+def random_lines(seed, count=60):
+    rng = random.Random(seed)
+    lines = [PdfLine(1 + line_id // 20, 1 + line_id % 20,
+                     " ".join(rng.choice(VOCABULARY).upper() if rng.random() < 0.2 else rng.choice(VOCABULARY)
+                              for _ in range(rng.randint(1, 5))))
+             for line_id in range(count)]
+    # Exact duplicates: the first one must win
+    return lines + lines[:5]
+
+
+def random_sheet(seed, rows=40):
+    rng = random.Random(seed + 1)
+
+    def cell():
+        roll = rng.random()
+        if roll < 0.1:
+            return None
+        if roll < 0.15:
+            return "   "
+        if roll < 0.2:
+            return rng.randint(1, 2000)
+        return " ".join(rng.choice(VOCABULARY) for _ in range(rng.randint(1, 4)))
+
+    return pd.DataFrame({name: [cell() for _ in range(rows)] for name in ("a", "b", "c")})
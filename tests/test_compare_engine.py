@@ -0,0 +1,35 @@
+import pandas as pd
+import pytest
+
+from compare_engine import compare_cells
+from pdf_extract import PdfLine
+from reference import baseline_results, random_lines, random_sheet
+
+LINES = [
+    PdfLine(1, 1, "Invoice 1001 Vendor Acme"),
+    PdfLine(1, 2, "Vendor Acme Corp"),
+    PdfLine(1, 3, "vendor acme"),
+    PdfLine(1, 4, "Total 1,250.00 due"),
+    PdfLine(2, 1, "Vendor Acme"),
+]
+
+
+def actual_results(results):
+    return list(zip(results.line_ids.tolist(), results.similarity.tolist(), results.status.tolist()))
+
+
+def test_ties_and_exact_lines_follow_baseline():
+    excel_df = pd.DataFrame({'a': ["vendor acme", "acme", "acme corp ltd", "1250.0", None, "  ", "unknown"]})
+    results = compare_cells(excel_df, LINES)
+    expected = baseline_results(excel_df, LINES)
+    assert actual_results(results) == expected
+    # Exact line beats the earlier line containing both words; ties go to the earliest line
+    assert expected[0][:2] == (2, 100) and expected[1][:2] == (0, 100)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_index_scorer_matches_baseline(seed):
+    pdf_lines = random_lines(seed)
+    excel_df = random_sheet(seed)
+    results = compare_cells(excel_df, pdf_lines, scorer='index')
+    assert actual_results(results) == baseline_results(excel_df, pdf_lines)
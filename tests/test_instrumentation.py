@@ -0,0 +1,67 @@
+import threading
+import tracemalloc
+
+from instrumentation import PerfRecorder, ProfileCapture
+
+
+def test_overlapping_captures_share_tracemalloc():
+    second_entered = threading.Event()
+    first_done = threading.Event()
+    captures = {}
+
+    def second():
+        with ProfileCapture() as capture:
+            second_entered.set()
+            # Still running when the capture that started the trace exits
+            first_done.wait(5)
+        captures['second'] = capture
+
+    with ProfileCapture() as capture:
+        thread = threading.Thread(target=second)
+        thread.start()
+        second_entered.wait(5)
+    captures['first'] = capture
+    first_done.set()
+    thread.join(5)
+
+    assert captures['first'].snapshot is not None
+    assert captures['second'].snapshot is not None
+    assert "tracemalloc" in captures['second'].text_report()
+    assert not tracemalloc.is_tracing()
+
+
+def test_capture_leaves_existing_trace_running():
+    tracemalloc.start()
+    try:
+        with ProfileCapture():
+            pass
+        assert tracemalloc.is_tracing()
+    finally:
+        tracemalloc.stop()
+
+
+def test_stages_overlapping_another_thread_skip_peaks():
+    inside = threading.Event()
+    release = threading.Event()
+    other = PerfRecorder()
+
+    def other_job():
+        with other.stage("other"):
+            inside.set()
+            release.wait(5)
+
+    perf = PerfRecorder()
+    with perf.stage("alone"):
+        pass
+    thread = threading.Thread(target=other_job)
+    thread.start()
+    inside.wait(5)
+    with perf.stage("overlapping"):
+        pass
+    release.set()
+    thread.join(5)
+
+    alone, overlapping = perf.stages
+    assert 'concurrent' not in alone and 'peak_rss_mb' in alone
+    assert overlapping['concurrent'] and 'peak_rss_delta_mb' not in overlapping
+    assert other.stages[0]['concurrent']
@@ -0,0 +1,73 @@
+import io
+
+import pytest
+from openpyxl import Workbook, load_workbook
+
+from compare_engine import compare_uploads
+
+PDF_TEXT = ["Invoice 1001 Vendor Acme", "Total 1,250.00", "note A", "Qty 15"]
+
+
+@pytest.fixture(scope="module")
+def pdf_bytes():
+    fitz = pytest.importorskip("fitz")
+    with fitz.open() as pdf_doc:
+        page = pdf_doc.new_page()
+        for line_num, text in enumerate(PDF_TEXT):
+            page.insert_text((72, 72 + 14 * line_num), text)
+        return pdf_doc.tobytes()
+
+
+def make_pdf(pdf_bytes):
+    # Same bytes every run, so the incremental path sees the same PDF
+    pdf_file = io.BytesIO(pdf_bytes)
+    pdf_file.name = "invoice.pdf"
+    return pdf_file
+
+
+def make_excel(header, rows):
+    wb = Workbook()
+    wb.active.append(header)
+    for row in rows:
+        wb.active.append(row)
+    excel_file = io.BytesIO()
+    wb.save(excel_file)
+    excel_file.seek(0)
+    excel_file.name = "invoice.xlsx"
+    return excel_file
+
+
+def sheet_cells(report_file):
+    report_file.seek(0)
+    ws = load_workbook(report_file).worksheets[0]
+    return [[(cell.value, cell.fill.fgColor.rgb) for cell in row] for row in ws.iter_rows()]
+
+
+def rerun(pdf_bytes, header, before, after):
+    """``after`` को ``before`` के snapshot पर चलाओ; ``(patched?, report, rebuilt report)``"""
+    first = compare_uploads(make_pdf(pdf_bytes), make_excel(header, before))
+    second = compare_uploads(make_pdf(pdf_bytes), make_excel(header, after), previous=first['snapshot'])
+    rebuilt = compare_uploads(make_pdf(pdf_bytes), make_excel(header, after))
+    return second['match_stats']['report_patched'], second['highlighted_excel'], rebuilt['highlighted_excel']
+
+
+BEFORE = [["Invoice 1001", "1250.0", "note A", "15"],
+          ["Invoice 1002", "99", "note B", "7"]]
+AFTER = [["Invoice 1001", "1250.00", "note A (corrected)", "15"],
+         ["Invoice 1002", "99", "note B", "8"]]
+
+
+def test_patched_report_matches_rebuild(pdf_bytes):
+    patched, report, rebuilt = rerun(pdf_bytes, ["invoice", "amount", "note", "qty"], BEFORE, AFTER)
+    assert patched
+    assert sheet_cells(report) == sheet_cells(rebuilt)
+
+
+@pytest.mark.parametrize("header", [
+    ["invoice", "amount", None, "qty"],
+    ["invoice", "amount", "note", "note"],
+])
+def test_unmapped_columns_match_rebuild(pdf_bytes, header):
+    patched, report, rebuilt = rerun(pdf_bytes, header, BEFORE, AFTER)
+    assert not patched
+    assert sheet_cells(report) == sheet_cells(rebuilt)
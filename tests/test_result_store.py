@@ -0,0 +1,62 @@
+import io
+
+import pandas as pd
+import pytest
+
+from compare_engine import compare_uploads
+from report_writer import REPORT_MODES
+from result_store import ResultStore
+
+PDF_TEXT = ["Invoice 1001", "Total 1,250.00", "Vendor Acme Corp"]
+
+
+def make_pdf():
+    fitz = pytest.importorskip("fitz")
+    with fitz.open() as pdf_doc:
+        page = pdf_doc.new_page()
+        for line_num, text in enumerate(PDF_TEXT):
+            page.insert_text((72, 72 + 14 * line_num), text)
+        pdf_file = io.BytesIO(pdf_doc.tobytes())
+    pdf_file.name = "invoice.pdf"
+    return pdf_file
+
+
+def make_excel():
+    excel_file = io.BytesIO()
+    pd.DataFrame({
+        'invoice': ["Invoice 1001", "Invoice 1002"],
+        'amount': ["1250.0", "99"],
+    }).to_excel(excel_file, index=False)
+    excel_file.seek(0)
+    excel_file.name = "invoice.xlsx"
+    return excel_file
+
+
+@pytest.mark.parametrize("report_mode", REPORT_MODES)
+def test_put_stores_report_of_either_writer(tmp_path, report_mode):
+    excel_file = make_excel()
+    result = compare_uploads(make_pdf(), excel_file, report_mode=report_mode)
+    report_file = result['highlighted_excel']
+    report_file.seek(0)
+    expected = report_file.read()
+
+    store = ResultStore(str(tmp_path))
+    handle = store.put(result, excel_bytes=excel_file.getvalue(), report_mode=report_mode)
+
+    assert report_file.closed
+    assert store.report(handle) == expected
+    assert store.get(handle)['comparison_results'] is result['comparison_results']
+
+
+@pytest.mark.parametrize("report_mode", REPORT_MODES)
+def test_evicted_report_is_rebuilt(tmp_path, report_mode):
+    excel_file = make_excel()
+    result = compare_uploads(make_pdf(), excel_file, report_mode=report_mode)
+    store = ResultStore(str(tmp_path))
+    handle = store.put(result, excel_bytes=excel_file.getvalue(), report_mode=report_mode)
+
+    (tmp_path / f"{handle}.xlsx").unlink()
+    report_data = store.report(handle)
+
+    assert report_data[:2] == b"PK"
+    assert store.stats()['regenerated'] == 1
@@ -0,0 +1,25 @@
+import pytest
+
+from compare_engine import cell_text
+from line_index import PdfLineIndex
+from reference import baseline_join, random_lines, random_sheet
+from similarity_join import similarity_join
+
+
+def sheet_values(excel_df):
+    return list(dict.fromkeys(
+        cell_text(value).lower() for column in excel_df.columns for value in excel_df[column]
+        if cell_text(value).strip()
+    ))
+
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("threshold", [34, 50, 70, 100])
+def test_join_finds_the_brute_force_pairs(seed, threshold):
+    pdf_lines = random_lines(seed)
+    cell_values = sheet_values(random_sheet(seed)) + ["words the pdf never uses", "acme unknown unknown"]
+    stats = {}
+    pairs = list(similarity_join(PdfLineIndex(pdf_lines), cell_values, threshold, stats=stats))
+    assert pairs == baseline_join(cell_values, pdf_lines, threshold)
+    assert stats['matched_pairs'] == len(pairs)
+    assert stats['candidate_pairs'] <= stats['brute_force_pairs']
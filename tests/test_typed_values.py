@@ -0,0 +1,34 @@
+from line_index import PdfLineIndex
+from pdf_extract import PdfLine
+from typed_values import cell_value_key, line_value_keys
+
+
+def test_amount_formats_share_a_key():
+    assert cell_value_key("1250.0") == "n:1250"
+    assert "n:1250" in line_value_keys("total ₹ 1,250.00 due")
+
+
+def test_leading_zeros_are_kept():
+    assert cell_value_key("00123") == "c:00123"
+    assert cell_value_key("123") == "n:123"
+    assert "n:123" not in line_value_keys("account 00123")
+    assert "c:00123" in line_value_keys("account 00123,")
+
+
+def test_leading_zero_code_does_not_match_number():
+    index = PdfLineIndex([PdfLine(1, 1, "Account 00123"), PdfLine(1, 2, "Qty 123")])
+    assert index.best_match_id("00123") == (0, 100)
+    assert index.best_match_id("123") == (1, 100)
+
+
+def test_percent_is_its_own_kind():
+    assert cell_value_key("15%") == "p:15"
+    assert cell_value_key("15") == "n:15"
+    assert "n:15" not in line_value_keys("discount 15%")
+    assert "p:15" in line_value_keys("discount 15.0%")
+
+
+def test_percent_does_not_match_plain_number():
+    index = PdfLineIndex([PdfLine(1, 1, "Discount 15%"), PdfLine(1, 2, "Items 15")])
+    assert index.best_match_id("15%") == (0, 100)
+    assert index.best_match_id("15") == (1, 100)
@@ -0,0 +1,55 @@
+import pytest
+
+from compare_engine import cell_text, compare_cells
+from line_index import PdfLineIndex
+from reference import baseline_best_match, baseline_results, random_lines, random_sheet
+import vector_score
+
+
+def actual_results(results):
+    return list(zip(results.line_ids.tolist(), results.similarity.tolist(), results.status.tolist()))
+
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("block_pairs", [7, vector_score.DEFAULT_BLOCK_PAIRS])
+def test_best_match_ids_match_baseline(seed, block_pairs):
+    pdf_lines = random_lines(seed)
+    excel_df = random_sheet(seed)
+    cell_values = sorted({cell_text(value).lower() for column in excel_df.columns for value in excel_df[column]
+                          if cell_text(value).strip()})
+    cell_values += ["words the pdf never uses", "acme acme", "vendor  acme"]
+    expected = [baseline_best_match(cell_lower, pdf_lines) for cell_lower in cell_values]
+    assert vector_score.best_match_ids(PdfLineIndex(pdf_lines), cell_values, block_pairs) == expected
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_vectorized_scorer_matches_baseline(seed):
+    pdf_lines = random_lines(seed)
+    excel_df = random_sheet(seed)
+    results = compare_cells(excel_df, pdf_lines, scorer='vectorized')
+    assert actual_results(results) == baseline_results(excel_df, pdf_lines)
+
+
+
+def test_scoring_reports_progress_per_block(monkeypatch):
+    scoring = []
+    calls = []
+
+    def best_match_ids(*args, **kwargs):
+        scoring.append(True)
+        try:
+            return original(*args, block_pairs=50, **kwargs)
+        finally:
+            scoring.pop()
+
+    original = vector_score.best_match_ids
+    monkeypatch.setattr(vector_score, 'best_match_ids', best_match_ids)
+    excel_df = random_sheet(0, rows=400)
+    compare_cells(excel_df, random_lines(0), scorer='vectorized',
+                  progress_callback=lambda processed, total: calls.append((processed, bool(scoring))))
+
+    processed = [done for done, _ in calls]
+    # Several updates while the blocks are scored, never going back
+    assert len({done for done, during_scoring in calls if during_scoring}) > 2
+    assert processed == sorted(processed)
+    assert processed[-1] == excel_df.size
@@ -0,0 +1,143 @@
+"""Canonical keys for numbers, amounts and dates
+
+Excel hands us typed values (``1250.0``, ``2024-03-31 00:00:00``) while
+PDFs print them formatted (``₹ 1,250.00``, ``31/03/2024``), so the word
+overlap rule never sees them as equal. Both sides are reduced here to the
+same canonical key: ``n:<decimal>`` for numbers and amounts (currency
+symbol and thousands separators dropped, ``(…)`` and a leading ``-`` read
+as negative), ``p:<decimal>`` for percentages and ``d:YYYY-MM-DD`` for
+dates (numeric dates are read day first). Digit strings with leading
+zeros (IDs, account codes such as ``00123``) are codes, not numbers: their
+key ``c:<digits>`` keeps every digit, so ``00123`` never equals ``123``. ``line_value_keys`` finds every such value inside a PDF line;
+``cell_value_key`` only accepts a cell that is a single value as a whole.
+"""
+import re
+from datetime import date
+from decimal import Decimal, InvalidOperation
+from functools import lru_cache
+
+MONTHS = {
+    'jan': 1, 'feb': 2, 'mar': 3, 'apr': 4, 'may': 5, 'jun': 6,
+    'jul': 7, 'aug': 8, 'sep': 9, 'oct': 10, 'nov': 11, 'dec': 12,
+}
+
+CURRENCY = r'(?:₹|\$|€|£|rs\.?|inr|usd|eur)'
+
+MONTH_NAMES = r'(?P<mon>jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]*\.?'
+
+# Group names: year/month/day (numeric) or mon (month name)
+DATE_PATTERNS = (
+    # 2024-03-31, optionally with the time part pandas adds to datetimes
+    re.compile(r'(?P<year>\d{4})-(?P<month>\d{1,2})-(?P<day>\d{1,2})'
+               r'(?:[ t]\d{1,2}:\d{2}(?::\d{2}(?:\.\d+)?)?)?'),
+    # 31/03/2024, 31-03-2024, 31.03.2024 (day first)
+    re.compile(r'(?P<day>\d{1,2})(?P<sep>[/.-])(?P<month>\d{1,2})(?P=sep)(?P<year>\d{4})'),
+    # 31 Mar 2024, 31-Mar-2024, 31 March, 2024
+    re.compile(r'(?P<day>\d{1,2})[ -]' + MONTH_NAMES + r',?[ -](?P<year>\d{4})'),
+)
+
+# Month-name dates written with spaces span several words of a line
+SPACED_MONTH_DATE = re.compile(r'(?<![\w.])\d{1,2} ' + MONTH_NAMES + r',? \d{4}(?![\w.])')
+
+NUMBER_PATTERN = re.compile(
+    r'(?P<open>\()?(?P<sign>[-−])?(?:' + CURRENCY + r'\s?)?(?P<sign2>[-−])?'
+    r'(?P<int>\d{1,3}(?:,\d{2,3})+|\d+)(?P<frac>\.\d+)?(?P<close>\))?(?:/-)?(?P<percent>%)?'
+)
+
+HAS_DIGIT = re.compile(r'\d').search
+
+# Sentence punctuation that may trail a value inside a line
+TRAILING_PUNCTUATION = ',;:.'
+
+
+def _date_key(match):
+    groups = match.groupdict()
+    month = MONTHS[groups['mon']] if groups.get('mon') else int(groups['month'])
+    try:
+        value = date(int(groups['year']), month, int(groups['day']))
+    except ValueError:
+        return None
+    return f"d:{value.isoformat()}"
+
+
+def _number_key(match):
+    int_part = match.group('int')
+    if len(int_part) > 1 and int_part[0] == '0':
+        # 0123 is a code, not the number 123
+        return None
+    if bool(match.group('open')) != bool(match.group('close')):
+        # Unbalanced bracket: not an accounting negative, read the bare number
+        negative = bool(match.group('sign') or match.group('sign2'))
+    else:
+        negative = bool(match.group('open') or match.group('sign') or match.group('sign2'))
+    try:
+        value = Decimal(int_part.replace(',', '') + (match.group('frac') or ''))
+    except InvalidOperation:
+        return None
+    if negative:
+        value = -value
+    # 1250.00, 1,250 and 1250.0 all become "1250"
+    text = format(value.normalize(), 'f')
+    kind = 'p' if match.group('percent') else 'n'
+    return f"{kind}:{'0' if text == '-0' else text}"
+
+
+def _value_key(text):
+    if text.isascii() and text.isdigit():
+        # Common case (counters, page numbers, whole amounts) without the regexes
+        if len(text) > 1 and text[0] == '0':
+            return f"c:{text}"
+        return f"n:{text}"
+    for pattern in DATE_PATTERNS:
+        match = pattern.fullmatch(text)
+        if match is not None:
+            return _date_key(match)
+    match = NUMBER_PATTERN.fullmatch(text)
+    if match is not None:
+        return _number_key(match)
+    return None
+
+
+@lru_cache(maxsize=1 << 16)
+def word_value_key(word):
+    """Line के एक whitespace word की canonical key (या None); memoized
+
+    Amounts, page numbers and dates repeat across lines, so most words
+    are answered from the cache.
+    """
+    key = _value_key(word)
+    if key is None and word[-1] in TRAILING_PUNCTUATION:
+        stripped = word.rstrip(TRAILING_PUNCTUATION)
+        if stripped:
+            key = _value_key(stripped)
+    return key
+
+
+def line_value_keys(lower_line):
+    """Lowercased PDF line में मिले सभी typed values की canonical keys
+
+    Values are read word by word (``₹1,250.00``, ``(500)``,
+    ``31/03/2024``); only month-name dates written with spaces are
+    matched across words.
+    """
+    if not HAS_DIGIT(lower_line):
+        return []
+    keys = []
+    for word in lower_line.split():
+        key = word_value_key(word)
+        if key is not None:
+            keys.append(key)
+    if ' ' in lower_line and any(month in lower_line for month in MONTHS):
+        for match in SPACED_MONTH_DATE.finditer(lower_line):
+            key = _value_key(match.group(0).replace(',', ''))
+            if key is not None:
+                keys.append(key)
+    return keys
+
+
+def cell_value_key(cell_lower):
+    """Cell पूरा एक number/amount/date हो तो उसकी canonical key, वरना None"""
+    cell = cell_lower.strip()
+    if not cell or not HAS_DIGIT(cell):
+        return None
+    return _value_key(cell)
@@ -0,0 +1,144 @@
+"""Vectorized whole-sheet scoring with sparse binary token matrices
+
+Cells and PDF lines are both encoded as sparse binary token matrices:
+cells as (cell, token) coordinate pairs, lines as the CSR posting lists of
+``PdfLineIndex``. Their product (the word-overlap counts) is computed
+blockwise in NumPy, and the argmax per cell gives the same best line and
+similarity as ``PdfLineIndex.best_match``.
+"""
+import numpy as np
+
+# Upper bound on (cell, line) overlap pairs expanded per block (~100 MB peak)
+DEFAULT_BLOCK_PAIRS = 4_000_000
+
+
+def line_token_matrix(line_index):
+    """Posting lists को CSR arrays (indptr, line ids) में pack करो"""
+    lengths = np.fromiter((len(p) for p in line_index.postings), dtype=np.int64,
+                          count=len(line_index.postings))
+    indptr = np.zeros(len(lengths) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=indptr[1:])
+    if indptr[-1]:
+        indices = np.concatenate([np.asarray(p, dtype=np.int64) for p in line_index.postings if p])
+    else:
+        indices = np.zeros(0, dtype=np.int64)
+    return indptr, indices
+
+
+def _encode_cells(line_index, cell_values):
+    """Non-exact cells को (cell, token) pairs में encode करो"""
+    pair_cells = []
+    pair_tokens = []
+    word_counts = np.zeros(len(cell_values), dtype=np.int64)
+    token_ids = line_index.token_ids
+    for cell_id, cell_lower in enumerate(cell_values):
+        cell_words = set(cell_lower.split())
+        word_counts[cell_id] = len(cell_words)
+        for word in cell_words:
+            token_id = token_ids.get(word)
+            if token_id is not None:
+                pair_cells.append(cell_id)
+                pair_tokens.append(token_id)
+    return (np.asarray(pair_cells, dtype=np.int64),
+            np.asarray(pair_tokens, dtype=np.int64),
+            word_counts)
+
+
+def _score_block(pair_cells, pair_starts, pair_lengths, indices, n_lines):
+    """एक block के overlap counts, per cell best (count, line id)"""
+    total = int(pair_lengths.sum())
+    # Expand each (cell, token) pair into (cell, line) for every line in the posting list
+    offsets = np.repeat(np.cumsum(pair_lengths) - pair_lengths, pair_lengths)
+    line_ids = indices[np.arange(total, dtype=np.int64) - offsets + np.repeat(pair_starts, pair_lengths)]
+    cell_ids = np.repeat(pair_cells, pair_lengths)
+
+    keys, counts = np.unique(cell_ids * n_lines + line_ids, return_counts=True)
+    key_cells = keys // n_lines
+    key_lines = keys % n_lines
+
+    # Highest count wins, ties go to the lowest line id (same as the scalar path)
+    scores = counts.astype(np.int64) * n_lines + (n_lines - 1 - key_lines)
+    group_starts = np.flatnonzero(np.r_[True, key_cells[1:] != key_cells[:-1]])
+    best_scores = np.maximum.reduceat(scores, group_starts)
+    return (key_cells[group_starts],
+            best_scores // n_lines,
+            n_lines - 1 - best_scores % n_lines)
+
+
+def best_matches(line_index, cell_values, block_pairs=DEFAULT_BLOCK_PAIRS):
+    """हर normalized cell value के लिए (pdf_line, similarity) batch में निकालो
+
+    Returns a list aligned with ``cell_values``; each entry equals
+    ``line_index.best_match(value)``.
+    """
+    pdf_lines = line_index.pdf_lines
+    return [(pdf_lines[line_id] if line_id is not None else None, similarity)
+            for line_id, similarity in best_match_ids(line_index, cell_values, block_pairs)]
+
+
+def best_match_ids(line_index, cell_values, block_pairs=DEFAULT_BLOCK_PAIRS, check_cancelled=None,
+                   progress_callback=None):
+    """``best_matches`` जैसा, पर ``(line_id, similarity)`` (line_id None if no match)
+
+    ``check_cancelled`` is called before every scoring block;
+    ``progress_callback(values_done, len(cell_values))`` after every block
+    (and once at the end).
+    """
+    pdf_lines = line_index.pdf_lines
+    results = [(None, 0)] * len(cell_values)
+
+    def report_done():
+        if progress_callback is not None:
+            progress_callback(len(cell_values), len(cell_values))
+
+    fuzzy_ids = []
+    for cell_id, cell_lower in enumerate(cell_values):
+        line_id = line_index.exact.get(cell_lower)
+        if line_id is None:
+            line_id = line_index.typed_match_id(cell_lower)
+        if line_id is not None:
+            results[cell_id] = (line_id, 100)
+        else:
+            fuzzy_ids.append(cell_id)
+
+    if not fuzzy_ids or not pdf_lines:
+        report_done()
+        return results
+
+    fuzzy_values = [cell_values[cell_id] for cell_id in fuzzy_ids]
+    pair_cells, pair_tokens, word_counts = _encode_cells(line_index, fuzzy_values)
+    if not len(pair_cells):
+        report_done()
+        return results
+
+    indptr, indices = line_token_matrix(line_index)
+    pair_starts = indptr[pair_tokens]
+    pair_lengths = indptr[pair_tokens + 1] - pair_starts
+    n_lines = len(pdf_lines)
+
+    # Block boundaries fall on cell edges; pairs are already grouped by cell
+    cell_edges = np.flatnonzero(np.r_[True, pair_cells[1:] != pair_cells[:-1], True])
+    edge_pairs = np.r_[0, np.cumsum(pair_lengths)][cell_edges]
+    last_edge = len(cell_edges) - 1
+    # Values settled without scoring: exact/typed matches and no known words
+    values_settled = len(cell_values) - last_edge
+    block_start = 0
+    while block_start < last_edge:
+        if check_cancelled is not None:
+            check_cancelled()
+        block_end = int(np.searchsorted(edge_pairs, edge_pairs[block_start] + block_pairs, side='right')) - 1
+        block_end = min(max(block_end, block_start + 1), last_edge)
+
+        lo, hi = cell_edges[block_start], cell_edges[block_end]
+        best_cells, best_counts, best_lines = _score_block(
+            pair_cells[lo:hi], pair_starts[lo:hi], pair_lengths[lo:hi], indices, n_lines
+        )
+        for cell, count, line_id in zip(best_cells.tolist(), best_counts.tolist(), best_lines.tolist()):
+            similarity = count / int(word_counts[cell]) * 100
+            results[fuzzy_ids[cell]] = (line_id, similarity)
+
+        block_start = block_end
+        if progress_callback is not None:
+            progress_callback(values_settled + block_end, len(cell_values))
+
+    return results